@@ -0,0 +1,138 @@
+"""Render cost of the /wordle responses before and after embed templates
+
+Needs py-cord installed. Run from the repository root:
+    python -m benchmarks.embed_render --renders 20000
+"""
+
+import argparse
+import random
+import sys
+import timeit
+import tracemalloc
+from types import SimpleNamespace
+from typing import Callable, Dict
+
+from discord import Color, Embed
+
+# The views import game and bot the way the running bot does
+sys.path.insert(0, "src")
+
+from bot.views.wordle_messages import create_scoreboard, guess_message  # noqa: E402
+from game.user import User  # noqa: E402
+
+
+def legacy_guess_message(ctx, user, visual: str, attempts: int) -> Embed:
+    """guess_message as it was before templates"""
+    embed = Embed(title="Wordle Guess", color=Color.blue())
+    embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.avatar.url)
+
+    embed.add_field(name="Your Guess", value=visual, inline=False)
+    embed.description = f"Not quite! You have {6 - attempts} attempts remaining."
+
+    if attempts == 1:
+        embed.set_footer(text=f"Score: {user.score} | Streak: {user.streak}")
+    else:
+        facts = [
+            "The Somali language is part of the Afro-Asiatic family and is spoken by over 15 million people.",
+            "Somali uses the Latin alphabet, but it was standardized as the official script in 1972.",
+            "Somali is known for its rich use of vowels and emphasis on vowel harmony.",
+            "Many Somali words are derived from Arabic, reflecting the close cultural and linguistic ties.",
+        ]
+        embed.set_footer(text=random.choice(facts))
+    return embed
+
+
+def legacy_scoreboard(users) -> Embed:
+    """create_scoreboard as it was before templates"""
+    embed = Embed(title="🏆 Wordle Leaderboard", color=Color.gold())
+    leaderboard = ""
+    for rank, user in enumerate(users, start=1):
+        if rank == 1:
+            emoji = "🥇"
+        elif rank == 2:
+            emoji = "🥈"
+        elif rank == 3:
+            emoji = "🥉"
+        else:
+            emoji = f"{rank}."
+        leaderboard += f"{emoji} **{user.name}** - Score: {user.score} | Streak: {user.streak}\n"
+    embed.description = leaderboard
+
+    total_players = len(users)
+    avg_score = round(sum([user.score for user in users]) / total_players, 2)
+    sorted_streak_users = sorted(users, key=lambda user: (user.streak, user.score), reverse=True)
+    hot_messages = []
+    for rank, user in enumerate(sorted_streak_users[:3]):
+        hot_messages.append(f"\t{'🔥' * (3 - rank)} - {user.name} - ({user.streak})")
+    embed.add_field(
+        name="📊 Statistics",
+        value=f"```Total Players: {total_players}\nAverage Score: {avg_score}\nTop Streaked Players:\n"
+        + "\n".join(hot_messages)
+        + "```",
+        inline=False,
+    )
+    facts = [
+        "Wordle was created by Welsh software engineer Josh Wardle.",
+        "The game was originally made for Wardle's partner, who loves word games.",
+        "Wordle was sold to The New York Times in January 2022.",
+        "There are 2,315 possible solution words in Wordle.",
+        "The most common starting word is reportedly 'ADIEU'.",
+    ]
+    embed.add_field(name="💡 Did you know?", value=random.choice(facts), inline=False)
+    return embed
+
+
+def render_cost(render: Callable[[], object], renders: int, repeat: int = 5) -> Dict[str, float]:
+    """Best time per render in microseconds and peak bytes held by one render"""
+    best = min(timeit.repeat(render, number=renders, repeat=repeat))
+    tracemalloc.start()
+    peaks = []
+    for _ in range(100):
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        render()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - baseline)
+    tracemalloc.stop()
+    return {"us": best / renders * 1e6, "bytes": min(peaks)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--renders", type=int, default=20_000)
+    args = parser.parse_args()
+
+    author = SimpleNamespace(
+        display_name="player",
+        avatar=SimpleNamespace(url="https://cdn.discordapp.com/avatars/1/a.png"),
+        display_avatar=SimpleNamespace(url="https://cdn.discordapp.com/avatars/1/a.png"),
+    )
+    ctx = SimpleNamespace(author=author)
+    user = User(user_id=1, server_id=1, name="player", score=42, streak=3)
+    users = [User(user_id=i, server_id=1, name=f"player{i}", score=100 - i, streak=i % 7) for i in range(10)]
+    visual = "🟩🟨⬛⬛🟩"
+
+    def new_scoreboard():
+        # create_scoreboard is a coroutine that never awaits
+        coroutine = create_scoreboard(users)
+        try:
+            coroutine.send(None)
+        except StopIteration as stop:
+            return stop.value
+
+    cases = {
+        "guess_message": (
+            lambda: legacy_guess_message(ctx, user, visual, 3),
+            lambda: guess_message(ctx=ctx, user=user, visual=visual, attempts=3),
+        ),
+        "scoreboard": (lambda: legacy_scoreboard(users), new_scoreboard),
+    }
+    print(f"{'response':<16}{'before (us)':>13}{'after (us)':>12}{'before (B)':>12}{'after (B)':>11}")
+    for name, (before, after) in cases.items():
+        old = render_cost(before, args.renders)
+        new = render_cost(after, args.renders)
+        print(f"{name:<16}{old['us']:>13.2f}{new['us']:>12.2f}{old['bytes']:>12.0f}{new['bytes']:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
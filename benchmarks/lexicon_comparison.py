@@ -0,0 +1,99 @@
+"""Memory and latency of the compact Lexicon against the old TrieNode trie
+
+Run from the repository root:
+    python -m benchmarks.lexicon_comparison --words 100000
+"""
+
+import argparse
+import random
+import timeit
+import tracemalloc
+from typing import Callable, Dict, List
+
+from src.game.lexicon import Lexicon
+from src.game.trie import TrieNode
+
+SOMALI_LETTERS = "abcdefghijklmnoqrstuwxy"
+
+
+def synthetic_words(count: int, seed: int = 0, min_length: int = 3, max_length: int = 12) -> List[str]:
+    """Random unique words over the Somali alphabet"""
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < count:
+        length = rng.randint(min_length, max_length)
+        words.add("".join(rng.choice(SOMALI_LETTERS) for _ in range(length)))
+    return list(words)
+
+
+def build_node_trie(words: List[str]) -> Dict[str, TrieNode]:
+    """Dict-of-TrieNode layout the Trie used before the Lexicon"""
+    root: Dict[str, TrieNode] = {}
+    for word in words:
+        children = root
+        node = None
+        for letter in word:
+            node = children.get(letter)
+            if node is None:
+                node = TrieNode(letter)
+                children[letter] = node
+            children = node.children
+        node.is_final = True
+    return root
+
+
+def node_trie_is_valid(root: Dict[str, TrieNode], word: str) -> bool:
+    """Lookup over the dict-of-TrieNode layout"""
+    children = root
+    node = None
+    for letter in word:
+        node = children.get(letter)
+        if node is None:
+            return False
+        children = node.children
+    return node is not None and node.is_final
+
+
+def measure_build(build: Callable[[], object]):
+    """Returns built structure and the memory it retains in bytes"""
+    tracemalloc.start()
+    structure = build()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return structure, retained
+
+
+def lookup_latency(is_valid: Callable[[str], bool], queries: List[str], repeat: int = 5) -> float:
+    """Best per-lookup latency in nanoseconds"""
+    def run():
+        for query in queries:
+            is_valid(query)
+    best = min(timeit.repeat(run, number=1, repeat=repeat))
+    return best / len(queries) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=50_000)
+    args = parser.parse_args()
+
+    words = synthetic_words(args.words)
+    rng = random.Random(1)
+    queries = rng.sample(words, min(args.queries // 2, len(words)))
+    queries += synthetic_words(args.queries // 2, seed=2)
+
+    node_trie, node_bytes = measure_build(lambda: build_node_trie(words))
+    lexicon, lexicon_bytes = measure_build(lambda: Lexicon.from_words(words))
+
+    node_ns = lookup_latency(lambda word: node_trie_is_valid(node_trie, word), queries)
+    lexicon_ns = lookup_latency(lexicon.is_valid, queries)
+
+    print(f"words: {len(words):,}  lexicon nodes: {lexicon.node_count:,}")
+    print(f"{'layout':<10}{'memory (MB)':>14}{'is_valid (ns)':>16}")
+    print(f"{'TrieNode':<10}{node_bytes / 1e6:>14.2f}{node_ns:>16.0f}")
+    print(f"{'Lexicon':<10}{lexicon_bytes / 1e6:>14.2f}{lexicon_ns:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""Offline load simulator driving WordleCog with simulated interactions
+
+Builds the real bot and cog, then replays /wordle, autocomplete and
+/wordlescoreboard interactions from simulated guilds and players as Poisson
+arrivals. Contexts answer ``respond`` after a simulated Discord latency, so
+nothing leaves the machine. Needs py-cord and the corpus, run from the
+repository root:
+    python -m benchmarks.load_sim --rate 500 --duration 30
+    python -m benchmarks.load_sim --guilds 2000 --players 100000 --json load.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import itertools
+from types import SimpleNamespace
+from typing import Dict, Optional, Sequence
+
+# The cog opens its repositories on import paths relative to the environment
+os.environ.setdefault("ENVIRONMENT", "testing")
+# The bot imports game, bot and utils the way main.py does
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from loguru import logger  # noqa: E402
+
+from bot.cogs.wordle import WordleCog  # noqa: E402
+from utils.autocompletes import word_autocompletes  # noqa: E402
+from utils.metrics import PERCENTILES, Histogram, metrics  # noqa: E402
+from wordle_bot import WordleBot  # noqa: E402
+
+INTERACTIONS = ("wordle", "autocomplete", "scoreboard")
+DEFAULT_MIX = "wordle=0.6,autocomplete=0.35,scoreboard=0.05"
+# How often the lag probe wakes up, lateness beyond this is loop lag
+LAG_PROBE_INTERVAL = 0.01
+
+
+class SimulatedContext:
+    """Stands in for discord.ApplicationContext and AutocompleteContext"""
+
+    def __init__(self, guild, author, latency: float, options: Optional[Dict[str, str]] = None, cog=None):
+        self.guild = guild
+        self.author = author
+        self.interaction = SimpleNamespace(guild_id=guild.id)
+        self.cog = cog
+        self.options = options or {}
+        self.latency = latency
+        self.responses = 0
+
+    async def respond(self, *args, **kwargs):
+        """Answers after the simulated round trip to Discord"""
+        await asyncio.sleep(self.latency)
+        self.responses += 1
+
+
+def simulated_member(user_id: int):
+    """Author with the attributes the views read"""
+    return SimpleNamespace(
+        id=user_id,
+        name=f"player{user_id}",
+        display_name=f"Player {user_id}",
+        display_avatar=SimpleNamespace(url=f"https://cdn.example/avatars/{user_id}.png"),
+        mention=f"<@{user_id}>",
+    )
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Share of each interaction, e.g. wordle=0.6,autocomplete=0.4"""
+    mix = {}
+    for part in text.split(","):
+        name, _, share = part.partition("=")
+        if name not in INTERACTIONS:
+            raise argparse.ArgumentTypeError(f"unknown interaction {name!r}, expected one of {INTERACTIONS}")
+        mix[name] = float(share)
+    return mix
+
+
+class Population:
+    """Players spread over guilds, busy guilds and players Zipf weighted"""
+
+    def __init__(self, guilds: int, players: int, skew: float, seed: int):
+        self.rng = random.Random(seed)
+        self.guilds = [SimpleNamespace(id=10_000 + index, name=f"guild{index}") for index in range(guilds)]
+        guild_weights = [1 / (rank ** skew) for rank in range(1, guilds + 1)]
+        homes = self.rng.choices(range(guilds), weights=guild_weights, k=players)
+        self.members = [(self.guilds[home], simulated_member(1_000_000 + index)) for index, home in enumerate(homes)]
+        self.member_weights = list(itertools.accumulate(1 / (rank ** skew) for rank in range(1, players + 1)))
+
+    def pick(self):
+        """Guild and author of the next interaction"""
+        return self.rng.choices(self.members, cum_weights=self.member_weights)[0]
+
+
+class LoadSimulator:
+    """Replays interactions against a cog and records their latencies"""
+
+    def __init__(
+        self,
+        cog: WordleCog,
+        population: Population,
+        words: Dict[int, Sequence[str]],
+        mix: Dict[str, float],
+        respond_latency: float,
+        respond_sigma: float,
+        invalid_share: float,
+        seed: int,
+    ):
+        self.cog = cog
+        self.population = population
+        self.words = {length: list(words_of_length) for length, words_of_length in words.items()}
+        self.kinds = list(mix)
+        self.kind_weights = [mix[kind] for kind in self.kinds]
+        self.respond_latency = respond_latency
+        self.respond_sigma = respond_sigma
+        self.invalid_share = invalid_share
+        self.rng = random.Random(seed)
+        self.latencies = {kind: Histogram() for kind in INTERACTIONS}
+        self.loop_lag = Histogram()
+        self.errors: Dict[str, int] = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def latency(self) -> float:
+        """Discord round trip, log-normal around the median"""
+        return self.respond_latency * self.rng.lognormvariate(0, self.respond_sigma)
+
+    def word(self, guild) -> str:
+        """Valid word of the length guild plays"""
+        return self.rng.choice(self.words[self.cog.game.word_length(guild.id)])
+
+    def guess(self, guild) -> str:
+        if self.rng.random() < self.invalid_share:
+            length = self.cog.game.word_length(guild.id)
+            return "".join(self.rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(length))
+        return self.word(guild)
+
+    async def interaction(self, kind: str):
+        guild, author = self.population.pick()
+        started = time.perf_counter()
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            if kind == "wordle":
+                ctx = SimulatedContext(guild, author, self.latency())
+                await WordleCog.play_wordle.callback(self.cog, ctx, self.guess(guild))
+            elif kind == "autocomplete":
+                # Autocomplete fires per keystroke on a partial guess
+                prefix = self.word(guild)[: self.rng.randint(1, 4)]
+                ctx = SimulatedContext(guild, author, self.latency(), options={"guess": prefix}, cog=self.cog)
+                await word_autocompletes(ctx)
+                await ctx.respond()
+            else:
+                ctx = SimulatedContext(guild, author, self.latency())
+                await WordleCog.wordle_scoreboard.callback(self.cog, ctx)
+        except Exception as error:
+            name = f"{kind}: {type(error).__name__}"
+            self.errors[name] = self.errors.get(name, 0) + 1
+        finally:
+            self.in_flight -= 1
+            self.latencies[kind].record(time.perf_counter() - started)
+
+    async def probe_lag(self):
+        """Measures how late the loop wakes a sleeping task"""
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            self.loop_lag.record(max(0.0, time.perf_counter() - started - LAG_PROBE_INTERVAL))
+
+    async def run(self, rate: float, duration: float) -> float:
+        """Open loop arrivals at rate per second, returns the elapsed seconds"""
+        probe = asyncio.create_task(self.probe_lag())
+        pending = set()
+        started = time.perf_counter()
+        next_arrival = started
+        while next_arrival - started < duration:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            kind = self.rng.choices(self.kinds, weights=self.kind_weights)[0]
+            task = asyncio.create_task(self.interaction(kind))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            next_arrival += self.rng.expovariate(rate)
+        if pending:
+            await asyncio.gather(*pending)
+        elapsed = time.perf_counter() - started
+        probe.cancel()
+        return elapsed
+
+
+def report(simulator: LoadSimulator, elapsed: float, rate: float) -> dict:
+    """Throughput, latency percentiles per interaction and loop lag"""
+    def percentiles(histogram: Histogram) -> dict:
+        values = histogram.percentiles(PERCENTILES)
+        return {
+            "count": histogram.count,
+            **{f"p{int(q * 100)}_ms": round(value * 1e3, 3) for q, value in zip(PERCENTILES, values)},
+            "max_ms": round(histogram.max * 1e3, 3),
+        }
+
+    completed = sum(histogram.count for histogram in simulator.latencies.values())
+    return {
+        "offered_rate": rate,
+        "elapsed_s": round(elapsed, 3),
+        "completed": completed,
+        "throughput": round(completed / elapsed, 1) if elapsed else 0.0,
+        "peak_in_flight": simulator.peak_in_flight,
+        "errors": simulator.errors,
+        "interactions": {
+            kind: percentiles(histogram) for kind, histogram in simulator.latencies.items() if histogram.count
+        },
+        "loop_lag": percentiles(simulator.loop_lag),
+        "stages": {summary.name: percentiles(metrics.histogram(summary.name)) for summary in metrics.summaries()},
+    }
+
+
+def print_report(result: dict):
+    print(
+        f"{result['completed']} interactions in {result['elapsed_s']}s, "
+        f"{result['throughput']}/s offered {result['offered_rate']}/s, "
+        f"peak {result['peak_in_flight']} in flight"
+    )
+    print(f"{'':<22}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    rows = [(kind, row) for kind, row in result["interactions"].items()]
+    rows.append(("event loop lag", result["loop_lag"]))
+    rows += [(f"  {name}", row) for name, row in result["stages"].items()]
+    for name, row in rows:
+        print(
+            f"{name:<22}{row['count']:>8}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+            f"{row['p99_ms']:>10.2f}{row['max_ms']:>10.2f}"
+        )
+    for name, count in result["errors"].items():
+        print(f"errors {name}: {count}")
+
+
+async def wait_ready(cog: WordleCog, timeout: float):
+    """Waits for the cog to warm up, raising when it gave up or took too long"""
+    deadline = time.monotonic() + timeout
+    while not cog.ready.is_set():
+        if cog.warm_up_failed:
+            raise RuntimeError("Warm-up failed, see the log above")
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Warm-up did not finish within {timeout:.0f}s")
+        await asyncio.sleep(0.1)
+
+
+async def simulate(args) -> dict:
+    bot = WordleBot()
+    # Loaded here so the corpus is read from the repository, not the scratch directory
+    words = {length: bot.word_game.partition(length).answers.words for length in args.lengths}
+    # Guild modes are set directly below, so build what /wordlemode would preload
+    for length in args.lengths:
+        bot.word_game.partition(length).suggestions
+    # Journal, channel cache and databases of the run go to a scratch directory
+    scratch = tempfile.TemporaryDirectory()
+    os.chdir(scratch.name)
+    os.makedirs("src/data")
+    cog = WordleCog(bot)
+    try:
+        await wait_ready(cog, args.warm_up_timeout)
+        population = Population(args.guilds, args.players, args.skew, args.seed)
+        # Guilds take turns through the word lengths
+        for guild, length in zip(population.guilds, itertools.cycle(args.lengths)):
+            cog.modes.set(guild.id, length)
+        simulator = LoadSimulator(
+            cog,
+            population,
+            words,
+            args.mix,
+            respond_latency=args.respond_ms / 1e3,
+            respond_sigma=args.respond_sigma,
+            invalid_share=args.invalid_share,
+            seed=args.seed,
+        )
+        elapsed = await simulator.run(args.rate, args.duration)
+        return report(simulator, elapsed, args.rate)
+    finally:
+        cog.cog_unload()
+        scratch.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=200, help="interactions per second")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of arrivals")
+    parser.add_argument("--guilds", type=int, default=200)
+    parser.add_argument("--players", type=int, default=20_000)
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of guild and player activity")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument("--respond-ms", type=float, default=80, help="median simulated respond latency")
+    parser.add_argument("--respond-sigma", type=float, default=0.5, help="log-normal spread of respond latency")
+    parser.add_argument("--invalid-share", type=float, default=0.1, help="share of guesses not in the lexicon")
+    parser.add_argument(
+        "--lengths", type=lambda text: [int(length) for length in text.split(",")], default=[5],
+        help="word lengths guilds play with, e.g. 5,7",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warm-up-timeout", type=float, default=120, help="seconds to wait for the cog to warm up")
+    parser.add_argument("--json", help="also write the report to this JSON file")
+    args = parser.parse_args()
+    if args.json:
+        args.json = os.path.abspath(args.json)
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    result = asyncio.run(simulate(args))
+    print_report(result)
+    if args.json:
+        with open(args.json, mode="w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
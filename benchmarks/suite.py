@@ -0,0 +1,292 @@
+"""Benchmarks of the lexicon, game engine and user repository hot paths
+
+Runs on synthetic lexicons and user tables and writes JSON results, which
+can be compared against a baseline to fail on regressions. Run from the
+repository root:
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --quick --baseline bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+
+# The game reads ENVIRONMENT when it opens its own repository
+os.environ.setdefault("ENVIRONMENT", "testing")
+
+from benchmarks.lexicon_comparison import synthetic_words  # noqa: E402
+from src.game.fuzzy import DeletionIndex  # noqa: E402
+from src.game.feedback import pattern_visual, score_guess  # noqa: E402
+from src.game.lexicon import Lexicon  # noqa: E402
+from src.game.sessions import SessionManager  # noqa: E402
+from src.game.trie import Trie  # noqa: E402
+from src.game.users import UserRepository  # noqa: E402
+from src.game.word_manager import WordleManager  # noqa: E402
+from src.game.wordle_game import WordleGame  # noqa: E402
+
+LEXICON_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+USER_TABLE_SIZES = (1_000, 100_000, 1_000_000, 10_000_000)
+QUICK_LEXICON_SIZES = (1_000, 10_000)
+QUICK_USER_TABLE_SIZES = (1_000, 100_000)
+# Players per guild in the synthetic user tables
+PLAYERS_PER_GUILD = 1_000
+WORD_LENGTH = 5
+# Deletion indexes of larger lexicons take minutes and gigabytes to build
+SUGGEST_MAX_SIZE = 100_000
+
+
+class Result(dict):
+    """One measurement, a plain dict so it serializes as is"""
+
+    def __init__(self, name: str, size: int, value: float, unit: str, operations: int):
+        super().__init__(name=name, size=size, value=round(value, 3), unit=unit, operations=operations)
+
+    @property
+    def key(self) -> str:
+        return f"{self['name']}@{self['size']}"
+
+
+def per_operation(func: Callable[[], object], operations: int, repeat: int = 3) -> float:
+    """Best nanoseconds per operation of func, which runs operations operations"""
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    return best / operations * 1e9
+
+
+def zipf_counts(words: List[str], seed: int = 0) -> Dict[str, int]:
+    """Word frequencies falling off like natural language"""
+    rng = random.Random(seed)
+    ranks = list(range(1, len(words) + 1))
+    rng.shuffle(ranks)
+    return {word: 1_000_000 // rank for word, rank in zip(words, ranks)}
+
+
+def bench_lexicon(size: int) -> List[Result]:
+    """Trie build, lookups and prefix search"""
+    words = synthetic_words(size, min_length=WORD_LENGTH, max_length=WORD_LENGTH)
+    counts = zipf_counts(words)
+    started = time.perf_counter()
+    trie = Trie(lexicon=Lexicon.from_counts(counts))
+    build_ms = (time.perf_counter() - started) * 1e3
+
+    rng = random.Random(1)
+    hits = rng.sample(words, min(len(words), 20_000))
+    misses = synthetic_words(len(hits), seed=2, min_length=WORD_LENGTH, max_length=WORD_LENGTH)
+    queries = hits + misses
+    prefixes = [word[:2] for word in hits[:2_000]]
+
+    def lookups():
+        for query in queries:
+            trie.is_valid(query)
+
+    def searches():
+        for prefix in prefixes:
+            trie.search(prefix)
+
+    def top_k():
+        trie.lexicon.clear_cache()
+        for prefix in prefixes:
+            trie.top_k(prefix, 25)
+
+    results = [
+        Result("trie.build", size, build_ms, "ms", 1),
+        Result("trie.is_valid", size, per_operation(lookups, len(queries)), "ns/op", len(queries)),
+        Result("trie.search", size, per_operation(searches, len(prefixes)), "ns/op", len(prefixes)),
+        Result("trie.top_k", size, per_operation(top_k, len(prefixes)), "ns/op", len(prefixes)),
+    ]
+    if size > SUGGEST_MAX_SIZE:
+        return results
+
+    started = time.perf_counter()
+    index = DeletionIndex(counts.items())
+    index_ms = (time.perf_counter() - started) * 1e3
+    # One letter swapped for another, the typo an unknown guess usually has
+    typos = [word[:2] + rng.choice("xyz") + word[3:] for word in hits[:2_000]]
+
+    def suggestions():
+        for typo in typos:
+            index.lookup(typo)
+
+    return results + [
+        Result("suggest.build", size, index_ms, "ms", 1),
+        Result("suggest.lookup", size, per_operation(suggestions, len(typos)), "ns/op", len(typos)),
+    ]
+
+
+def bench_game(size: int) -> List[Result]:
+    """Answer draws, end to end guesses and guess visuals"""
+    words = synthetic_words(size, min_length=WORD_LENGTH, max_length=WORD_LENGTH)
+    manager = WordleManager(trie=Trie(lexicon=Lexicon.from_counts(zipf_counts(words))))
+    game = WordleGame(manager)
+    # Draws are a tree descent, enough of them to time at every size
+    rounds = 2_000
+    rng = random.Random(3)
+    guesses = [rng.choice(words) for _ in range(5_000)]
+
+    def draws():
+        for _ in range(rounds):
+            manager.get_random_word()
+
+    def play():
+        # Fresh players so every guess is scored rather than refused
+        game.guesses = SessionManager()
+        for user_id, word in enumerate(guesses):
+            game.guess(user_id=user_id, server_id=user_id % 50, name="player", word_guess=word)
+
+    answer = game.guess_word
+    visual_pairs = [(word, answer) for word in guesses[:2_000]]
+
+    def visuals():
+        for guess, correct in visual_pairs:
+            pattern_visual(score_guess(guess, correct), len(guess))
+
+    results = [
+        Result("game.get_random_word", size, per_operation(draws, rounds), "ns/op", rounds),
+        Result("game.guess", size, per_operation(play, len(guesses), repeat=1), "ns/op", len(guesses)),
+        Result("views.guess_visual", size, per_operation(visuals, len(visual_pairs)), "ns/op", len(visual_pairs)),
+    ]
+    game.user_repo.close()
+    return results
+
+
+def fill_users(path: str, rows: int):
+    """Synthetic users spread over guilds of PLAYERS_PER_GUILD players"""
+    repo = UserRepository(path)
+    repo.close()
+    conn = sqlite3.connect(path)
+    rng = random.Random(4)
+    batch = 100_000
+    with conn:
+        for start in range(0, rows, batch):
+            conn.executemany(
+                "INSERT INTO users (id, server_id, name, score, streak) VALUES (?, ?, ?, ?, ?)",
+                (
+                    (user_id, user_id // PLAYERS_PER_GUILD, f"player{user_id}", rng.randrange(5_000), rng.randrange(30))
+                    for user_id in range(start, min(start + batch, rows))
+                ),
+            )
+    conn.close()
+
+
+def bench_repository(size: int, directory: str) -> List[Result]:
+    """Point reads, leaderboard reads and batched writes of UserRepository"""
+    path = os.path.join(directory, f"users_{size}.db")
+    started = time.perf_counter()
+    fill_users(path, size)
+    fill_s = time.perf_counter() - started
+
+    repo = UserRepository(path)
+    rng = random.Random(5)
+    guilds = max(1, size // PLAYERS_PER_GUILD)
+    user_ids = [rng.randrange(size) for _ in range(5_000)]
+    leaderboard_guilds = [rng.randrange(guilds) for _ in range(500)]
+    rows = [
+        (user_id, user_id // PLAYERS_PER_GUILD, f"player{user_id}", rng.randrange(5_000), rng.randrange(30))
+        for user_id in user_ids[:1_000]
+    ]
+
+    def reads():
+        for user_id in user_ids:
+            repo.get(user_id=user_id, server_id=user_id // PLAYERS_PER_GUILD)
+
+    def leaderboards():
+        # The uncached path, the cache would make this a dict lookup
+        for server_id in leaderboard_guilds:
+            repo.leaderboard.clear()
+            repo.get_top_n_users_by_score(10, server_id)
+
+    def writes():
+        repo.save_many(rows)
+
+    results = [
+        Result("users.fill", size, fill_s, "s", size),
+        Result("users.get", size, per_operation(reads, len(user_ids)), "ns/op", len(user_ids)),
+        Result("users.top_10", size, per_operation(leaderboards, len(leaderboard_guilds)), "ns/op", len(leaderboard_guilds)),
+        Result("users.save_many", size, per_operation(writes, len(rows)), "ns/op", len(rows)),
+    ]
+    repo.close()
+    os.remove(path)
+    return results
+
+
+def git_commit() -> Optional[str]:
+    """Commit being measured, if run from a checkout"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def regressions(results: List[Result], baseline_path: str, tolerance: float) -> List[str]:
+    """Measurements slower than the baseline by more than tolerance"""
+    with open(baseline_path, mode="r", encoding="utf-8") as file:
+        baseline = {f"{result['name']}@{result['size']}": result for result in json.load(file)["results"]}
+    slower = []
+    for result in results:
+        before = baseline.get(result.key)
+        if before is not None and before["value"] > 0 and result["value"] > before["value"] * (1 + tolerance):
+            slower.append(f"{result.key}: {before['value']} -> {result['value']} {result['unit']}")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="small sizes only, for pre-deploy checks")
+    parser.add_argument("--lexicon-sizes", type=int, nargs="*")
+    parser.add_argument("--user-sizes", type=int, nargs="*")
+    parser.add_argument("--output", help="JSON file to write, stdout when omitted")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against the baseline")
+    args = parser.parse_args()
+    # Per guess debug logs would be measured along with the game
+    logger.remove()
+
+    lexicon_sizes = args.lexicon_sizes or (QUICK_LEXICON_SIZES if args.quick else LEXICON_SIZES)
+    user_sizes = args.user_sizes or (QUICK_USER_TABLE_SIZES if args.quick else USER_TABLE_SIZES)
+
+    results: List[Result] = []
+    for size in lexicon_sizes:
+        print(f"lexicon and game, {size:,} words", file=sys.stderr)
+        results += bench_lexicon(size)
+        results += bench_game(size)
+    with tempfile.TemporaryDirectory() as directory:
+        for size in user_sizes:
+            print(f"user repository, {size:,} rows", file=sys.stderr)
+            results += bench_repository(size, directory)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": time.time(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, mode="w", encoding="utf-8") as file:
+            file.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        slower = regressions(results, args.baseline, args.tolerance)
+        for line in slower:
+            print(f"regression {line}", file=sys.stderr)
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""Announcements and DMs sent in bulk"""
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set, TypeVar
+
+import discord
+from loguru import logger
+
+from utils.rate_limit import BucketMap, TokenBucket
+
+CHANNEL_CACHE_PATH = "./src/data/announcement_channels.json"
+# Sends in flight at once
+BROADCAST_CONCURRENCY = 16
+# Discord allows 50 requests per second per bot, leave room for commands
+GLOBAL_RATE = 40
+# Message sends are limited to 5 per 5 seconds per channel
+CHANNEL_RATE = 1
+CHANNEL_BURST = 5
+MAX_RETRIES = 3
+RETRY_BACKOFF = 1.0
+METRICS_HISTORY = 20
+# DMs in flight at once
+DM_CONCURRENCY = 32
+
+Target = TypeVar("Target")
+
+
+@dataclass
+class BroadcastMetrics:
+    """Outcome of one broadcast"""
+
+    kind: str = "announcement"
+    targets: int = 0
+    sent: int = 0
+    failed: int = 0
+    retries: int = 0
+    # Channels tried because none was cached, or users fetched over HTTP
+    probes: int = 0
+    duration: float = 0.0
+
+    def summary(self) -> str:
+        """One line description"""
+        return (
+            f"{self.kind} broadcast to {self.targets} targets in {self.duration:.1f}s: "
+            f"{self.sent} sent, {self.failed} failed, {self.retries} retries, {self.probes} probes"
+        )
+
+
+async def run_broadcast(
+    targets: Iterable[Target],
+    send: Callable[[Target, BroadcastMetrics], Awaitable[bool]],
+    metrics: BroadcastMetrics,
+    concurrency: int,
+    history: Deque[BroadcastMetrics],
+    done: Optional[Callable[[], None]] = None,
+) -> BroadcastMetrics:
+    """Runs send for every target on a fixed pool of workers"""
+    started = time.monotonic()
+    queue: "asyncio.Queue[Target]" = asyncio.Queue()
+    for target in targets:
+        queue.put_nowait(target)
+    metrics.targets = queue.qsize()
+
+    async def worker():
+        while not queue.empty():
+            target = queue.get_nowait()
+            if await send(target, metrics):
+                metrics.sent += 1
+            else:
+                metrics.failed += 1
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, metrics.targets))]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        if done is not None:
+            done()
+    metrics.duration = time.monotonic() - started
+    history.append(metrics)
+    logger.bind(broadcast=asdict(metrics)).info(metrics.summary())
+    return metrics
+
+
+async def send_with_retry(
+    send: Callable[[], Awaitable[object]], metrics: BroadcastMetrics, max_retries: int, acquire: Callable[[], Awaitable[None]]
+) -> bool:
+    """Sends, retrying transient failures with backoff"""
+    for attempt in range(max_retries + 1):
+        await acquire()
+        try:
+            await send()
+            return True
+        except (discord.Forbidden, discord.NotFound):
+            return False
+        except (discord.HTTPException, asyncio.TimeoutError) as error:
+            if attempt == max_retries:
+                logger.warning("Broadcast send failed after {} attempts: {}", attempt + 1, error)
+                return False
+            metrics.retries += 1
+            await asyncio.sleep(getattr(error, "retry_after", None) or RETRY_BACKOFF * 2**attempt)
+    return False
+
+
+class ChannelCache:
+    """Announcement channel per guild, persisted as JSON"""
+
+    def __init__(self, path: str = CHANNEL_CACHE_PATH):
+        self.path = path
+        self.channels: Dict[int, int] = {}
+        self.changed = False
+        try:
+            with open(path, mode="r", encoding="utf-8") as file:
+                self.channels = {int(guild_id): channel_id for guild_id, channel_id in json.load(file).items()}
+        except (OSError, ValueError):
+            pass
+
+    def get(self, guild_id: int) -> Optional[int]:
+        """Cached channel of guild"""
+        return self.channels.get(guild_id)
+
+    def set(self, guild_id: int, channel_id: int):
+        """Remembers the channel that accepted an announcement"""
+        if self.channels.get(guild_id) != channel_id:
+            self.channels[guild_id] = channel_id
+            self.changed = True
+
+    def discard(self, guild_id: int):
+        """Forgets the channel of guild"""
+        if self.channels.pop(guild_id, None) is not None:
+            self.changed = True
+
+    def save(self):
+        """Writes the cache if it changed"""
+        if not self.changed:
+            return
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, mode="w", encoding="utf-8") as file:
+            json.dump(self.channels, file)
+        os.replace(temp_path, self.path)
+        self.changed = False
+
+
+class Broadcaster:
+    """Sends one message to every guild.
+
+    A fixed number of workers drain the guild list, each send waits on a
+    per-channel and a global token bucket so a broadcast never bursts into
+    Discord's rate limits. The channel that accepted the last announcement is
+    cached per guild, so channels are only tried in turn when it is gone or
+    lost its permissions.
+    """
+
+    def __init__(
+        self,
+        channel_cache: Optional[ChannelCache] = None,
+        concurrency: int = BROADCAST_CONCURRENCY,
+        max_retries: int = MAX_RETRIES,
+    ):
+        self.channel_cache = channel_cache or ChannelCache()
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.buckets = BucketMap(
+            TokenBucket(rate=GLOBAL_RATE, capacity=GLOBAL_RATE),
+            route_rate=CHANNEL_RATE,
+            route_capacity=CHANNEL_BURST,
+        )
+        self.history: Deque[BroadcastMetrics] = deque(maxlen=METRICS_HISTORY)
+
+    async def broadcast(self, guilds: Iterable[discord.Guild], content: str) -> BroadcastMetrics:
+        """Sends content to one channel of every guild"""
+        # Channels this broadcast sent to, other broadcasts may still be pacing theirs
+        routes: Set[int] = set()
+        return await run_broadcast(
+            guilds,
+            lambda guild, metrics: self.send_to_guild(guild, content, metrics, routes),
+            BroadcastMetrics(kind="announcement"),
+            concurrency=self.concurrency,
+            history=self.history,
+            done=lambda: self._finish(routes),
+        )
+
+    def _finish(self, routes: Set[int]):
+        self.buckets.discard(routes)
+        self.channel_cache.save()
+
+    async def send_to_guild(self, guild: discord.Guild, content: str, metrics: BroadcastMetrics, routes: Set[int]) -> bool:
+        """Sends to the cached channel of guild, finding one if needed, and records the channels tried"""
+        cached_id = self.channel_cache.get(guild.id)
+        cached = guild.get_channel(cached_id) if cached_id is not None else None
+        if cached is not None and await self._send(cached, content, metrics, routes):
+            return True
+
+        self.channel_cache.discard(guild.id)
+        for channel in self.candidate_channels(guild):
+            if channel is cached:
+                continue
+            metrics.probes += 1
+            if await self._send(channel, content, metrics, routes):
+                self.channel_cache.set(guild.id, channel.id)
+                return True
+        return False
+
+    @staticmethod
+    def candidate_channels(guild: discord.Guild) -> List[discord.TextChannel]:
+        """Text channels the bot may post in, system channel first"""
+        channels = list(guild.text_channels)
+        if guild.system_channel in channels:
+            channels.remove(guild.system_channel)
+            channels.insert(0, guild.system_channel)
+        if guild.me is None:
+            return channels
+        return [channel for channel in channels if channel.permissions_for(guild.me).send_messages]
+
+    async def _send(
+        self, channel: discord.TextChannel, content: str, metrics: BroadcastMetrics, routes: Set[int]
+    ) -> bool:
+        """Sends to channel, retrying transient failures"""
+        routes.add(channel.id)
+        return await send_with_retry(
+            lambda: channel.send(content),
+            metrics,
+            self.max_retries,
+            acquire=lambda: self.buckets.acquire(channel.id),
+        )
+
+
+class DirectMessenger:
+    """Sends one DM to each of many users.
+
+    Users are resolved from the client cache and only fetched over HTTP
+    when missing. Fetches and the request opening a DM channel take a
+    token like every send. Sends share the global bucket of the announcement
+    broadcaster, so running both at once still stays under the bot's
+    request limit.
+    """
+
+    def __init__(
+        self,
+        bot: discord.Client,
+        global_bucket: TokenBucket,
+        concurrency: int = DM_CONCURRENCY,
+        max_retries: int = MAX_RETRIES,
+    ):
+        self.bot = bot
+        self.global_bucket = global_bucket
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.history: Deque[BroadcastMetrics] = deque(maxlen=METRICS_HISTORY)
+
+    async def send_all(self, user_ids: Iterable[int], content: str) -> BroadcastMetrics:
+        """Sends content to every user"""
+        return await run_broadcast(
+            user_ids,
+            lambda user_id, metrics: self.send_to_user(user_id, content, metrics),
+            BroadcastMetrics(kind="dm"),
+            concurrency=self.concurrency,
+            history=self.history,
+        )
+
+    async def send_to_user(self, user_id: int, content: str, metrics: BroadcastMetrics) -> bool:
+        """Sends content to user, resolving them first"""
+        user = self.bot.get_user(user_id)
+        if user is None:
+            metrics.probes += 1
+            try:
+                await self.global_bucket.acquire()
+                user = await self.bot.fetch_user(user_id)
+            except discord.HTTPException as error:
+                logger.warning("Failed to fetch user {}: {}", user_id, error)
+                return False
+        channel = user.dm_channel
+        if channel is None:
+            # user.send would open the DM channel with a request the bucket never saw
+            try:
+                await self.global_bucket.acquire()
+                channel = await user.create_dm()
+            except discord.HTTPException as error:
+                logger.warning("Failed to open a DM with user {}: {}", user_id, error)
+                return False
+        return await send_with_retry(
+            lambda: channel.send(content), metrics, self.max_retries, acquire=self.global_bucket.acquire
+        )
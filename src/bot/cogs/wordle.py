@@ -4,24 +4,49 @@ import asyncio
 from collections import defaultdict
 import datetime
 import random
-from typing import List
+import threading
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 
 import discord
 from discord.ext import commands, tasks
+from loguru import logger
 
-from game.wordle_game import GuessResult, WordleGame
+from bot.broadcast import DirectMessenger
+from game.events import GuessEventStore
+from game.feedback import pattern_visual
+from game.journal import RoundJournal
+from game.modes import GuildModes, max_attempts
+from game.snapshot import WORD_LENGTH, WORD_LENGTHS
+from game.wordle_game import GuessOutcome, GuessResult, WordleGame
 from bot.views.wordle_messages import (
     correct_guess_message,
-    create_guess_visual,
     create_scoreboard,
     guess_message,
+    hint_message,
     incorrect_guess_message,
     invalid_word_message,
     max_retries_message,
+    stats_message,
 )
-from game.users import UserRepository
+from game.users import AsyncUserRepository
 from game.user import User
 from utils.autocompletes import word_autocompletes
+from utils.logger import log_wordle_guess
+from utils.metrics import metrics, prometheus_path, write_textfile
+from utils.startup import StartupTimeline
+
+WARMING_UP_MESSAGE = "I'm still warming up, try again in a few seconds ⏳"
+WARM_UP_FAILED_MESSAGE = "Wordle is unavailable right now, the bot could not start it 🛠️"
+# Warm-up is retried with doubling delays before commands are turned away for good
+WARM_UP_ATTEMPTS = 4
+WARM_UP_BACKOFF_SECONDS = 5
+
+
+def log_failures(what: str, results: Sequence[object]):
+    """Logs the exceptions asyncio.gather returned in place of results"""
+    for result in results:
+        if isinstance(result, Exception):
+            logger.opt(exception=result).error("{} failed", what)
 
 
 class WordleCog(discord.Cog):
@@ -30,38 +55,192 @@ class WordleCog(discord.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.word_manager = bot.word_game
-        self.game = WordleGame(self.word_manager)
+        # Shares the global rate limit with the announcement broadcaster
+        self.messenger = DirectMessenger(bot, global_bucket=bot.broadcaster.buckets.global_bucket)
+        # Set by warm_up, commands answer WARMING_UP_MESSAGE until then
+        self.ready = threading.Event()
+        # Set once every warm-up attempt failed, the gate then stays shut
+        self.warm_up_failed = False
+        self.user_repo: Optional[AsyncUserRepository] = None
+        self.journal: Optional[RoundJournal] = None
+        self.events: Optional[GuessEventStore] = None
+        self.modes: Optional[GuildModes] = None
+        self.game: Optional[WordleGame] = None
         self.scores = defaultdict(int)
         self.streaks = {}
         self.guesses = {}
-        self.user_repo = UserRepository()
-        self.change_word.start()
+        self.prometheus_path = prometheus_path()
+        self.warm_up.start()
 
     def cog_unload(self):
+        self.warm_up.cancel()
         self.change_word.cancel()
+        self.flush_users.cancel()
+        self.evict_sessions.cancel()
+        self.write_metrics.cancel()
+        self._close_storage()
+
+    def _close_storage(self):
+        for resource in (self.user_repo, self.journal, self.events):
+            if resource is not None:
+                resource.close()
+        self.user_repo = self.journal = self.events = None
+
+    @tasks.loop(count=1)
+    async def warm_up(self):
+        """Loads the lexicon and opens storage off the loop, then opens the gate"""
+        startup = self.bot.startup
+        startup.begin("warm_up")
+        for attempt in range(1, WARM_UP_ATTEMPTS + 1):
+            try:
+                await asyncio.to_thread(self._warm_up, startup)
+                break
+            except Exception:
+                # Storage opened by the failed attempt is reopened by the next
+                self._close_storage()
+                if attempt == WARM_UP_ATTEMPTS:
+                    logger.exception("Warm-up failed {} times, commands stay unavailable", attempt)
+                    self.warm_up_failed = True
+                    return
+                delay = WARM_UP_BACKOFF_SECONDS * 2 ** (attempt - 1)
+                logger.exception("Warm-up failed, retrying in {}s", delay)
+                await asyncio.sleep(delay)
+        self.change_word.start()
+        self.flush_users.start()
+        self.evict_sessions.start()
+        if self.prometheus_path:
+            self.write_metrics.start()
+        self.ready.set()
+        startup.end("warm_up")
+
+    def _warm_up(self, startup: StartupTimeline):
+        with startup.phase("lexicon"):
+            self.word_manager.load()
+        with startup.phase("storage"):
+            self.user_repo = AsyncUserRepository(timer=metrics.timer)
+            self.journal = RoundJournal()
+            self.events = GuessEventStore()
+            self.modes = GuildModes()
+        with startup.phase("game"):
+            self.game = WordleGame(
+                self.word_manager,
+                async_repo=self.user_repo,
+                journal=self.journal,
+                events=self.events,
+                modes=self.modes,
+            )
+        with startup.phase("caches"):
+            # Only lengths some guild plays with are loaded, others wait for their first game
+            for length in sorted({WORD_LENGTH, *self.modes.lengths.values()}):
+                partition = self.word_manager.partition(length)
+                # First letters are what autocomplete sees most
+                for letter in sorted({word[0] for word in partition.answers.words}):
+                    self.word_manager.autocomplete(letter, length=length)
+                # Builds or maps the pattern matrix the first /wordlehint needs
+                partition.hints
+                # Deletion index the first unknown guess needs
+                partition.suggestions
+
+    async def warming_up(self, ctx: discord.ApplicationContext) -> bool:
+        """Answers commands that arrive before warm-up finished"""
+        if self.ready.is_set():
+            return False
+        await ctx.respond(WARM_UP_FAILED_MESSAGE if self.warm_up_failed else WARMING_UP_MESSAGE, ephemeral=True)
+        return True
+
+    @tasks.loop(seconds=2)
+    async def flush_users(self):
+        """Writes batched score and streak changes, journal and guess events"""
+        for name, flush in (
+            ("db.flush", self.user_repo.flush),
+            ("journal.sync", self.sync_journal),
+            ("events.flush", self.events.flush),
+        ):
+            try:
+                with metrics.timer(name):
+                    await flush()
+            except Exception:
+                # Raising would stop the loop for good, failed users are requeued for the next tick
+                logger.exception("{} failed, retrying on the next tick", name)
+
+    async def sync_journal(self):
+        """Forces the journal to disk, compacting it once it is long"""
+        await asyncio.to_thread(self.journal.sync)
+        if self.journal.needs_compaction:
+            with metrics.timer("journal.compact"):
+                await self.compact_journal()
+
+    async def compact_journal(self):
+        """Folds the journal into a snapshot, serialized and synced off the loop"""
+        # Captured together on the loop, guesses only change here
+        checkpoint = self.journal.checkpoint()
+        state = self.game.round_state()
+        temp_path = await asyncio.to_thread(self.journal.write_snapshot, state, checkpoint)
+        self.journal.commit(temp_path, checkpoint)
+
+    @tasks.loop(seconds=30)
+    async def write_metrics(self):
+        """Writes latency histograms as a Prometheus text file"""
+        # Rendered on the loop where the histograms change, written off it
+        await asyncio.to_thread(write_textfile, self.prometheus_path, metrics.prometheus())
+
+    @tasks.loop(minutes=5)
+    async def evict_sessions(self):
+        """Packs finished player sessions so memory follows active players"""
+        self.game.guesses.evict_idle()
 
     # @tasks.loop(time=datetime.time(hour=0, minute=0))  # Run daily at midnight
     @tasks.loop(hours=3)
     async def change_word(self):
         """Changes the word ever x time"""
-        old_word = self.game.guess_word
+        # The loop fires on start, the game already has a new or resumed round
+        if self.change_word.current_loop == 0:
+            return
+        with metrics.timer("task.change_word"):
+            await self.start_new_round()
+
+    async def start_new_round(self):
+        """Resets the word and tells everyone about the old one
+
+        Failures are logged rather than raised, change_word would stop for
+        good on any exception the loop does not retry.
+        """
+        try:
+            await self.user_repo.flush()
+        except Exception:
+            # Rows that failed to write are requeued for the next flush
+            logger.exception("Flushing users before the new round failed")
+        # Taken right before the reset clears the round
+        old_answers = dict(self.game.answers)
+        unsolved = self.game.guesses.unsolved_by_length()
         self.game.reset_game()
-        print(f"New word set: {self.game.guess_word}")
-        await self.send_new_word_message(old_word)
-        await self.handle_current_guesses()
-
-    async def handle_current_guesses(self):
-        """Removes all guesses from users not completed and autoset their scores"""
-        for user_id, guesses in self.game.guesses.items():
-            if len(guesses) > 0 and guesses[-1] != self.game.guess_word:
-                user = await self.bot.fetch_user(user_id)
-                await user.send(
-                    f"The word has changed. The correct word was {self.game.guess_word}."
-                )
+        logger.info("New word set for round {}", self.game.round_id)
+        results = await asyncio.gather(
+            self.send_new_word_message(old_answers),
+            self.handle_current_guesses(old_answers, unsolved),
+            return_exceptions=True,
+        )
+        log_failures("New round messages", results)
+
+    async def handle_current_guesses(self, old_answers: Dict[int, str], unsolved: Dict[int, Set[int]]):
+        """Tells players that missed the word what it was"""
+        results = await asyncio.gather(*(
+            self.messenger.send_all(user_ids, f"The word has changed. The correct word was {old_answers[length]}.")
+            for length, user_ids in unsolved.items()
+            if user_ids
+        ), return_exceptions=True)
+        log_failures("Direct messages of the old word", results)
 
-    async def send_new_word_message(self, old_word: str):
-        """Sends new word notification to all servers"""
-        await self.bot.new_word_notification(old_word=old_word)
+    async def send_new_word_message(self, old_answers: Dict[int, str]):
+        """Sends new word notification to all servers, with the word of their length"""
+        guilds_by_length: Dict[int, List[discord.Guild]] = {}
+        for guild in self.bot.guilds:
+            guilds_by_length.setdefault(self.modes.get(guild.id), []).append(guild)
+        results = await asyncio.gather(*(
+            self.bot.new_word_notification(old_word=old_answers.get(length, ""), guilds=guilds)
+            for length, guilds in guilds_by_length.items()
+        ), return_exceptions=True)
+        log_failures("New word announcement", results)
 
     @commands.slash_command(
         name="wordle", description="Make a guess in the Wordle game"
@@ -71,47 +250,63 @@ class WordleCog(discord.Cog):
         ctx: discord.ApplicationContext,
         guess: discord.Option(
             str,
-            "Your 5-letter word guess",
+            "Your word guess",
             autocomplete=word_autocompletes,
             required=True,
         ),  # type: ignore
     ):
         """Guess for current guess_word word"""
-        server_id = ctx.guild.id
-        guess_result = self.game.guess(
-            user_id=ctx.author.id, server_id=server_id, name=ctx.author.name, word_guess=guess
-        )
-        user = self.user_repo.get_or_create(
-            user_id=ctx.author.id, server_id=server_id, name=ctx.author.name
-        )
-        attempts = self.game.guesses[server_id][user.id].attempts()
-        if guess_result == GuessResult.CORRECT:
-            embed = correct_guess_message(ctx=ctx, user=user, attempts=attempts)
-            return await ctx.respond(embed=embed)
-        elif guess_result == GuessResult.FAILED:
+        if await self.warming_up(ctx):
+            return
+        with metrics.timer("command.wordle"):
+            with metrics.timer("wordle.guess"):
+                outcome = await self.game.guess_async(
+                    user_id=ctx.author.id, server_id=ctx.guild.id, name=ctx.author.name, word_guess=guess
+                )
+            log_wordle_guess(ctx.author.id, guess)
+            with metrics.timer("wordle.render"):
+                embed, ephemeral = self.guess_response(ctx, outcome)
+            with metrics.timer("wordle.respond"):
+                await ctx.respond(embed=embed, ephemeral=ephemeral)
+
+    def guess_response(self, ctx: discord.ApplicationContext, outcome: GuessOutcome) -> Tuple[discord.Embed, bool]:
+        """Embed answering a guess and whether only the player sees it"""
+        user = outcome.user
+        if outcome.result == GuessResult.CORRECT:
+            return correct_guess_message(ctx=ctx, user=user, attempts=outcome.attempts), False
+        elif outcome.result == GuessResult.FAILED:
             embed = incorrect_guess_message(
-                ctx=ctx, user=user, word=self.game.guess_word
+                ctx=ctx, user=user, word=outcome.answer
             )
-            return await ctx.respond(embed=embed, ephemeral=True)
-        elif guess_result == GuessResult.INCORRECT:
-            guessed_word = self.game.guesses[server_id][user.id].last_guess()
-            visual = create_guess_visual(
-                guess=guessed_word, correct_word=self.game.guess_word
+            return embed, True
+        elif outcome.result == GuessResult.INCORRECT:
+            visual = pattern_visual(outcome.pattern, outcome.word_length)
+            embed = guess_message(
+                ctx=ctx, user=user, visual=visual, attempts=outcome.attempts, max_attempts=outcome.max_attempts
             )
-            embed = guess_message(ctx=ctx, user=user, visual=visual, attempts=attempts)
-            return await ctx.respond(embed=embed, ephemeral=True)
-        elif guess_result == GuessResult.MAX_ATTEMPTS:
+            return embed, True
+        elif outcome.result == GuessResult.MAX_ATTEMPTS:
             embed = max_retries_message(
-                ctx=ctx, user=user, correct_word=self.game.guess_word
+                ctx=ctx, user=user, correct_word=outcome.answer
             )
-            return await ctx.respond(embed=embed, ephemeral=True)
+            return embed, True
 
         if (
-            guess_result == GuessResult.INVALID_WORD
-            or guess_result == GuessResult.UNKNOWN_WORD
+            outcome.result == GuessResult.INVALID_WORD
+            or outcome.result == GuessResult.UNKNOWN_WORD
         ):
-            embed = invalid_word_message(ctx=ctx, user=user, guess_word=guess)
-            return await ctx.respond(embed=embed, ephemeral=True)
+            suggestions = []
+            if outcome.result == GuessResult.UNKNOWN_WORD:
+                with metrics.timer("wordle.suggest"):
+                    suggestions = self.game.word_manager.suggest(outcome.guess)
+            embed = invalid_word_message(
+                ctx=ctx,
+                user=user,
+                guess_word=outcome.guess,
+                length=outcome.word_length,
+                suggestions=suggestions,
+            )
+            return embed, True
 
         raise Exception("Something went wrong 🫢")
 
@@ -129,18 +324,28 @@ class WordleCog(discord.Cog):
         name="wordlehint", description="Get a hint for the current word"
     )
     async def wordle_hint(self, ctx: discord.ApplicationContext):
-        hint = self.word_manager.get_hint(self.game.guess_word)
-        await ctx.respond(f"Hint: {hint}", ephemeral=True)
+        """Suggests the most informative next guess"""
+        if await self.warming_up(ctx):
+            return
+        # An uncached state scores the whole guess pool, too slow for the event loop
+        with metrics.timer("wordle.hint"):
+            hint = await asyncio.to_thread(self.game.get_hint, user_id=ctx.author.id, server_id=ctx.guild.id)
+        embed = hint_message(ctx=ctx, hint=hint)
+        await ctx.respond(embed=embed, ephemeral=True)
 
     @commands.slash_command(
         name="wordlerules", description="Display the rules of the Wordle game"
     )
     async def wordle_rules(self, ctx: discord.ApplicationContext):
         """Returns wordle rules"""
+        # The rules are readable during warm-up, the default length applies until then
+        length = self.game.word_length(ctx.guild.id) if self.ready.is_set() else WORD_LENGTH
         rules = (
             "Welcome to Discord Wordle!\n"
             "- A new word is chosen every day at midnight.\n"
-            "- You have 6 attempts to guess the 5-letter word.\n"
+            f"- You have {max_attempts(length)} attempts to guess this round's {length}-letter word.\n"
+            "- Admins can switch the server to 4 to 8 letter words with /wordlemode,\n"
+            "  longer words get one more attempt per letter.\n"
             "- After each guess, you'll get feedback:\n"
             "  🟩 = Correct letter, correct position\n"
             "  🟨 = Correct letter, wrong position\n"
@@ -156,9 +361,12 @@ class WordleCog(discord.Cog):
     )
     async def wordle_scoreboard(self, ctx: discord.ApplicationContext):
         """Displays scoreboard"""
-        users: List[User] = self.user_repo.get_top_n_users_by_score(
-            n=10, server_id=ctx.guild.id
-        )
+        if await self.warming_up(ctx):
+            return
+        with metrics.timer("db.top_n"):
+            users: List[User] = await self.user_repo.get_top_n_users_by_score(
+                n=10, server_id=ctx.guild.id
+            )
         embed = await create_scoreboard(users=users)
 
         await ctx.respond(embed=embed)
@@ -166,7 +374,9 @@ class WordleCog(discord.Cog):
     @commands.slash_command(name="revealword", description="revealing the word")
     async def reveal_word(self, ctx):
         """Reveal the word"""
-        word = self.game.guess_word
+        if await self.warming_up(ctx):
+            return
+        word = self.game.answer_for(ctx.guild.id)
         embed = discord.Embed(title="Revealing the Wordle", color=discord.Color.gold())
         message = await ctx.respond(embed=embed)
         for i in range(len(word)):
@@ -176,12 +386,53 @@ class WordleCog(discord.Cog):
         embed.description = f"The word is: {word}"
         await message.edit(embed=embed)
 
+    @commands.slash_command(name="wordlemode", description="Choose the word length for this server")
+    @commands.has_permissions(administrator=True)
+    async def wordle_mode(
+        self,
+        ctx: discord.ApplicationContext,
+        length: discord.Option(int, "Letters per word", choices=list(WORD_LENGTHS)),  # type: ignore
+    ):
+        """Sets the word length guilds play with"""
+        if await self.warming_up(ctx):
+            return
+        # Loads the words of that length now, not on the first guess
+        def load():
+            partition = self.word_manager.partition(length)
+            partition.answers
+            partition.suggestions
+
+        try:
+            await asyncio.to_thread(load)
+        except ValueError:
+            await ctx.respond(f"There are no {length} letter words to play with yet.", ephemeral=True)
+            return
+        await asyncio.to_thread(self.modes.set, ctx.guild.id, length)
+        logger.info("Guild {} switched to {} letter words", ctx.guild.id, length)
+        if self.game.word_length(ctx.guild.id) == length:
+            await ctx.respond(f"This server now plays with {length} letter words.")
+        else:
+            await ctx.respond(f"This server plays with {length} letter words from the next word on.")
+
+    @commands.slash_command(name="wordlestats", description="Latency report for admins")
+    @commands.has_permissions(administrator=True)
+    async def wordle_stats(self, ctx: discord.ApplicationContext):
+        """Shows latency percentiles and this round's numbers"""
+        if await self.warming_up(ctx):
+            return
+        round_stats = await self.events.round_stats(self.game.round_id, server_id=ctx.guild.id)
+        embed = stats_message(summaries=metrics.summaries(), round_stats=round_stats)
+        await ctx.respond(embed=embed, ephemeral=True)
+
     @commands.slash_command(name="wordlerestart", description="restart the word")
     @commands.has_permissions(administrator=True)
     async def restart(self, ctx: discord.ApplicationContext):
         """Resets the word (Only owner can for now)"""
-        self.game.new_word()
-        print("new word is", self.game.guess_word)
+        if await self.warming_up(ctx):
+            return
+        # Clears the guesses too, the journal snapshot of the new round has none
+        self.game.reset_game()
+        logger.info("Word restarted by {} for round {}", ctx.author.id, self.game.round_id)
         await ctx.respond("new word set")
 
     @play_wordle.error
@@ -0,0 +1,56 @@
+"""Precomputed embed templates"""
+
+from typing import Iterable, Optional, Tuple, Union
+
+from discord import Color, Embed, Member, User
+
+# (name, value, inline)
+EmbedField = Tuple[str, str, bool]
+
+
+def score_footer(user) -> str:
+    """Footer with score and streak of user"""
+    return f"Score: {user.score} | Streak: {user.streak}"
+
+
+class EmbedTemplate:
+    """Static parts of a message type, built once at import.
+
+    The title and color are serialized once, each render rebuilds an embed
+    from that dict and only fills the fields that change per response.
+    """
+
+    __slots__ = ("title", "color", "_static")
+
+    def __init__(self, title: str, color: Color):
+        self.title = title
+        self.color = color
+        self._static = Embed(title=title, color=color).to_dict()
+
+    def render(
+        self,
+        description: Optional[str] = None,
+        author: Optional[Union[Member, User]] = None,
+        footer: Optional[str] = None,
+        fields: Iterable[EmbedField] = (),
+    ) -> Embed:
+        """Embed with the static parts and the given dynamic ones"""
+        embed = Embed.from_dict(self._static)
+        embed.description = description
+        if author is not None:
+            embed.set_author(name=author.display_name, icon_url=author.display_avatar.url)
+        for name, value, inline in fields:
+            embed.add_field(name=name, value=value, inline=inline)
+        if footer is not None:
+            embed.set_footer(text=footer)
+        return embed
+
+
+GUESS_CORRECT = EmbedTemplate("Wordle Guess", Color.green())
+GUESS_FAILED = EmbedTemplate("Wordle Guess", Color.red())
+GUESS_INCORRECT = EmbedTemplate("Wordle Guess", Color.blue())
+MAX_RETRIES = EmbedTemplate("Wordle Guess", Color.red())
+INVALID_WORD = EmbedTemplate("Wordle Guess", Color.red())
+HINT = EmbedTemplate("Wordle Hint", Color.blurple())
+STATS = EmbedTemplate("📈 Wordle Stats", Color.dark_teal())
+SCOREBOARD = EmbedTemplate("🏆 Wordle Leaderboard", Color.gold())
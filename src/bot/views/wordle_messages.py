@@ -3,10 +3,40 @@
 from dataclasses import dataclass
 import os
 import random
-from typing import Dict, List
-from discord import ApplicationContext, Bot, User, Embed, EmbedAuthor, EmbedFooter, Color
+from typing import Dict, List, Sequence
+from discord import ApplicationContext, User, Embed, EmbedAuthor, EmbedFooter
 import game.user as wordle_user
+from game.feedback import pattern_visual, score_guess
+from game.events import GuessStats
+from game.hints import Hint
 from bot.models.model import UserGuess
+from bot.views import templates
+from bot.views.templates import score_footer
+from utils.metrics import Summary
+
+RANK_EMOJIS = {1: "🥇", 2: "🥈", 3: "🥉"}
+
+WORDLE_FACTS = (
+    "Wordle was created by Welsh software engineer Josh Wardle.",
+    "The game was originally made for Wardle's partner, who loves word games.",
+    "Wordle was sold to The New York Times in January 2022.",
+    "There are 2,315 possible solution words in Wordle.",
+    "The most common starting word is reportedly 'ADIEU'.",
+)
+
+DATA_FACTS = (
+    "The most common word length in Somali Wordle is 9, with 99,153 n-grams of this length.",
+    "The most frequent n-gram in Somali Wordle is 'oo', which appears 2,124,975 times.",
+    "The most common starting letter in Somali Wordle is 'd', which appears in 79,790 n-grams.",
+    "The most common word ending in Somali Wordle is 'da', which appears in 48,970 n-grams.",
+)
+
+SOMALI_FACTS = (
+    "The Somali language is part of the Afro-Asiatic family and is spoken by over 15 million people.",
+    "Somali uses the Latin alphabet, but it was standardized as the official script in 1972.",
+    "Somali is known for its rich use of vowels and emphasis on vowel harmony.",
+    "Many Somali words are derived from Arabic, reflecting the close cultural and linguistic ties.",
+)
 
 
 @dataclass
@@ -37,166 +67,156 @@ def create_score_board(
 
 async def create_scoreboard(users: List[wordle_user.User]):
     """Scoreboard message"""
-    embed = Embed(title="🏆 Wordle Leaderboard", color=Color.gold())
-
-    leaderboard = ""
-    for rank, user in enumerate(users, start=1):
-        emoji = get_rank_emoji(rank)
-        leaderboard += (
-            f"{emoji} **{user.name}** - Score: {user.score} | Streak: {user.streak}\n"
-        )
-
-    embed.description = leaderboard
+    leaderboard = "\n".join([
+        f"{RANK_EMOJIS.get(rank) or f'{rank}.'} **{user.name}** - Score: {user.score} | Streak: {user.streak}"
+        for rank, user in enumerate(users, start=1)
+    ])
 
     # Add some statistics
     total_players = len(users)
-    avg_score = round(sum([user.score for user in users]) / total_players, 2)
+    avg_score = round(sum(user.score for user in users) / total_players, 2) if total_players else 0
     most_streaked_users = top_in_hot_mode_players(users=users)
-    embed.add_field(
-        name="📊 Statistics",
-        value=f"```Total Players: {total_players}\nAverage Score: {avg_score}\nTop Streaked Players:\n{most_streaked_users}```",
-        inline=False,
+    statistics = (
+        f"```Total Players: {total_players}\nAverage Score: {avg_score}\n"
+        f"Top Streaked Players:\n{most_streaked_users}```"
     )
 
-    # Add a random Wordle fact
-    embed.add_field(
-        name="💡 Did you know?", value=get_random_wordle_fact(), inline=False
+    return templates.SCOREBOARD.render(
+        description=leaderboard,
+        fields=(
+            ("📊 Statistics", statistics, False),
+            # Add a random Wordle fact
+            ("💡 Did you know?", get_random_wordle_fact(), False),
+        ),
     )
 
-    return embed
-
 def get_rank_emoji(rank: int):
     """Emoji trophy by current rank (index)"""
-    if rank == 1:
-        return "🥇"
-    elif rank == 2:
-        return "🥈"
-    elif rank == 3:
-        return "🥉"
-    else:
-        return f"{rank}."
+    return RANK_EMOJIS.get(rank) or f"{rank}."
 
 def top_in_hot_mode_players(users: List[User], limit: int = 3) -> str:
     """Returns top players on a hot streak, breaking ties by score!"""
     sorted_streak_users = sorted(users, key=lambda user: (user.streak, user.score), reverse=True)
-    hot_messages = []
-    for rank, user in enumerate(sorted_streak_users[:limit]):
-        lit = '🔥' * (limit - rank)
-        hot_messages.append(f"\t{lit} - {user.name} - ({user.streak})")
-    return "\n".join(hot_messages)
+    return "\n".join([
+        f"\t{'🔥' * (limit - rank)} - {user.name} - ({user.streak})"
+        for rank, user in enumerate(sorted_streak_users[:limit])
+    ])
 
 def get_random_wordle_fact():
-    facts = [
-        "Wordle was created by Welsh software engineer Josh Wardle.",
-        "The game was originally made for Wardle's partner, who loves word games.",
-        "Wordle was sold to The New York Times in January 2022.",
-        "There are 2,315 possible solution words in Wordle.",
-        "The most common starting word is reportedly 'ADIEU'.",
-    ]
-    return random.choice(facts)
+    return random.choice(WORDLE_FACTS)
 
 def correct_guess_message(
     ctx: ApplicationContext, user: wordle_user.User, attempts: int
 ) -> Embed:
     """Returns Embed of correct guess message"""
-    embed = Embed(title="Wordle Guess", color=Color.green())
-    embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.avatar.url)
-    embed.description = (
-        f"🎉 Congratulations! You've guessed the word in {attempts} attempts!"
+    return templates.GUESS_CORRECT.render(
+        description=f"🎉 Congratulations! You've guessed the word in {attempts} attempts!",
+        author=ctx.author,
+        footer=score_footer(user),
     )
-    embed.set_footer(text=f"Score: {user.score} | Streak: {user.streak}")
-    return embed
 
 
 def incorrect_guess_message(
     ctx: ApplicationContext, user: wordle_user.User, word: str
 ) -> Embed:
     """Incorrect message"""
-    embed = Embed(title="Wordle Guess", color=Color.red())
-    embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.avatar.url)
-
-    embed.description = f"\nGame over! The word was **{word}**."
-
-    embed.set_footer(text=f"Score: {user.score} | Streak: {user.streak}")
-    return embed
+    return templates.GUESS_FAILED.render(
+        description=f"\nGame over! The word was **{word}**.",
+        author=ctx.author,
+        footer=score_footer(user),
+    )
 
 
 def guess_message(
-    ctx: ApplicationContext, user: wordle_user.User, visual: str, attempts: int
+    ctx: ApplicationContext, user: wordle_user.User, visual: str, attempts: int, max_attempts: int = 6
 ) -> Embed:
     """Creates ephermal embed for current guess"""
-    embed = Embed(title="Wordle Guess", color=Color.blue())
-    embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.avatar.url)
-
-    embed.add_field(name="Your Guess", value=visual, inline=False)
-    embed.description = f"Not quite! You have {6 - attempts} attempts remaining."
-
     if attempts == 1:
-        embed.set_footer(text=f"Score: {user.score} | Streak: {user.streak}")
+        footer = score_footer(user)
     else:
-        random_fact = get_somali_language_fact()
-        embed.set_footer(text=random_fact)
+        footer = get_somali_language_fact()
 
-    return embed
+    return templates.GUESS_INCORRECT.render(
+        description=f"Not quite! You have {max_attempts - attempts} attempts remaining.",
+        author=ctx.author,
+        footer=footer,
+        fields=(("Your Guess", visual, False),),
+    )
 
 def data_facts_for_the_nerds():
     """Return random data fact for the nerds"""
-    facts = [
-        "The most common word length in Somali Wordle is 9, with 99,153 n-grams of this length.",
-        "The most frequent n-gram in Somali Wordle is 'oo', which appears 2,124,975 times.",
-        "The most common starting letter in Somali Wordle is 'd', which appears in 79,790 n-grams.",
-        "The most common word ending in Somali Wordle is 'da', which appears in 48,970 n-grams.",
-    ]
-    
-    return random.choice(facts)
+    return random.choice(DATA_FACTS)
 
 def get_somali_language_fact():
     """Returns basic facts from GPT ngl"""
-    facts = [
-        "The Somali language is part of the Afro-Asiatic family and is spoken by over 15 million people.",
-        "Somali uses the Latin alphabet, but it was standardized as the official script in 1972.",
-        "Somali is known for its rich use of vowels and emphasis on vowel harmony.",
-        "Many Somali words are derived from Arabic, reflecting the close cultural and linguistic ties.",
-    ]
-    return random.choice(facts)
+    return random.choice(SOMALI_FACTS)
 
 def create_guess_visual(guess: str, correct_word: str) -> str:
     """Creates simple color cells for guess vs correct"""
-    visual = ""
-    for i, letter in enumerate(guess):
-        if letter == correct_word[i]:
-            visual += "🟩"  # Green for correct position
-        elif letter in correct_word:
-            visual += "🟨"  # Yellow for correct letter, wrong position
-        else:
-            visual += "⬛"  # Black for incorrect letter
-    return visual
+    return pattern_visual(score_guess(guess, correct_word), len(guess))
 
 
 def max_retries_message(
     ctx: ApplicationContext, user: wordle_user.User, correct_word: str
 ) -> Embed:
     """Max retries reached message"""
-    embed = Embed(title="Wordle Guess", color=Color.red())
-    embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.avatar.url)
-
-    embed.description = (
-        f"🚫 You've reached the maximum number of attempts!"
-        f"\nThe correct word was **{correct_word}**."
+    return templates.MAX_RETRIES.render(
+        description=(
+            f"🚫 You've reached the maximum number of attempts!"
+            f"\nThe correct word was **{correct_word}**."
+        ),
+        author=ctx.author,
+        footer=score_footer(user),
     )
 
-    embed.set_footer(text=f"Score: {user.score} | Streak: {user.streak}")
-    return embed
-
 
 def invalid_word_message(
-    ctx: ApplicationContext, user: wordle_user.User, guess_word: str
+    ctx: ApplicationContext,
+    user: wordle_user.User,
+    guess_word: str,
+    length: int = 5,
+    suggestions: Sequence[str] = (),
 ) -> Embed:
-    """Invalid word message"""
-    embed = Embed(title="Wordle Guess", color=Color.red())
-    embed.set_author(name=ctx.author.display_name, icon_url=ctx.author.avatar.url)
+    """Invalid word message, with close valid words when there are any"""
+    description = f"✖️ The word you guessed '{guess_word}' is not valid. Make sure it's a real {length}-letter word."
+    if suggestions:
+        description += "\nDid you mean " + ", ".join(f"**{word}**" for word in suggestions) + "?"
+    return templates.INVALID_WORD.render(
+        description=description,
+        author=ctx.author,
+        footer=score_footer(user),
+    )
 
-    embed.description = f"✖️ The word you guessed '{guess_word}' is not valid. Make sure it's the correct length and a real word."
 
-    embed.set_footer(text=f"Score: {user.score} | Streak: {user.streak}")
-    return embed
+def hint_message(ctx: ApplicationContext, hint: Hint) -> Embed:
+    """Hint for next guess message"""
+    if hint is None:
+        return templates.HINT.render(
+            description="No hints left for you this round, wait for the next word!", author=ctx.author
+        )
+
+    return templates.HINT.render(
+        description=f"💡 Try **{hint.word}**",
+        author=ctx.author,
+        footer=f"{hint.remaining} possible words left | {hint.bits:.2f} bits of information expected",
+    )
+
+
+def stats_message(summaries: List[Summary], round_stats: GuessStats) -> Embed:
+    """Latency percentiles per stage and current round numbers"""
+    rows = [f"{'stage':<18}{'count':>7}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}"]
+    rows.extend(
+        f"{summary.name:<18}{summary.count:>7}{summary.p50 * 1e3:>8.2f}{summary.p95 * 1e3:>8.2f}"
+        f"{summary.p99 * 1e3:>8.2f}{summary.max * 1e3:>8.2f}"
+        for summary in summaries
+    )
+    table = "\n".join(rows)
+    round_line = (
+        f"{round_stats.players} players, {round_stats.guesses} guesses, "
+        f"{round_stats.solve_rate:.0%} solved, {round_stats.average_attempts:.1f} attempts to solve"
+    )
+    return templates.STATS.render(
+        description=f"```{table}```",
+        fields=(("This round here", round_line, False),),
+        footer="Latencies in milliseconds since the bot started",
+    )
@@ -0,0 +1,102 @@
+"""Weighted answer sampling"""
+
+import random
+from array import array
+from collections import deque
+from typing import Deque, Iterable, List, Optional, Tuple
+
+
+class AnswerPool:
+    """Frequency weighted answer picker that skips recently used words.
+
+    Weights sit in a Fenwick tree, so a draw walks down the tree to the word
+    whose cumulative weight covers a uniform point, O(log n) with no
+    rejection. Words used in the last ``exclusion_window`` rounds have their
+    slot set to zero and get their weight back once they leave the window,
+    so nothing is rebuilt between draws. Counts are integers, which keeps the
+    float sums exact however many updates they see.
+    """
+
+    def __init__(
+        self,
+        word_counts: Iterable[Tuple[str, int]],
+        exclusion_window: int = 30,
+        rng: Optional[random.Random] = None,
+    ):
+        self.words: List[str] = []
+        weights = array("d")
+        for word, count in word_counts:
+            self.words.append(word)
+            weights.append(max(count, 1))
+        if not self.words:
+            raise ValueError("AnswerPool needs at least one word")
+
+        self.weights = weights
+        self.times_used = array("I", [0]) * len(self.words)
+        self.exclusion_window = max(0, min(exclusion_window, len(self.words) - 1))
+        self.recent: Deque[int] = deque()
+        self._rng = rng or random.Random()
+        self._tree = self._build_tree(weights)
+        self._total = sum(weights)
+        self._top_step = 1 << (len(weights).bit_length() - 1)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @property
+    def total(self) -> float:
+        """Weight of the words that can be drawn"""
+        return self._total
+
+    def sample(self) -> str:
+        """Draws a word and records it as used"""
+        index = self._find(self._rng.random() * self._total)
+        self.mark_used(index)
+        return self.words[index]
+
+    def mark_used(self, index: int):
+        """Counts word usage and moves the exclusion window"""
+        self.times_used[index] += 1
+        if self.exclusion_window == 0:
+            return
+        if index in self.recent:
+            self.recent.remove(index)
+        else:
+            self._add(index, -self.weights[index])
+        self.recent.append(index)
+        while len(self.recent) > self.exclusion_window:
+            released = self.recent.popleft()
+            self._add(released, self.weights[released])
+
+    @staticmethod
+    def _build_tree(weights: array) -> array:
+        """Fenwick tree of weights in O(n), one based"""
+        tree = array("d", [0.0]) + weights
+        for node in range(1, len(tree)):
+            parent = node + (node & -node)
+            if parent < len(tree):
+                tree[parent] += tree[node]
+        return tree
+
+    def _add(self, index: int, delta: float):
+        self._total += delta
+        tree = self._tree
+        node = index + 1
+        while node < len(tree):
+            tree[node] += delta
+            node += node & -node
+
+    def _find(self, target: float) -> int:
+        """Index of the word whose cumulative weight range holds target"""
+        tree = self._tree
+        size = len(tree) - 1
+        position = 0
+        step = self._top_step
+        while step:
+            node = position + step
+            if node <= size and tree[node] <= target:
+                position = node
+                target -= tree[node]
+            step >>= 1
+        # Only float rounding of target itself can walk past the last word
+        return min(position, size - 1)
@@ -0,0 +1,211 @@
+"""Guess event store for analytics"""
+
+import asyncio
+import functools
+import os
+import sqlite3
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, NamedTuple, Optional, TypeVar
+
+from loguru import logger
+
+EVENTS_DB_PATH = "./src/data/guess_events.db"
+MEMORY_DB = ":memory:"
+# Buffered events handed to the writer thread in one insert
+EVENT_BATCH_SIZE = 500
+
+T = TypeVar("T")
+
+
+def events_database_path() -> str:
+    """Database for current environment"""
+    if os.getenv("ENVIRONMENT") == "testing":
+        return MEMORY_DB
+    return EVENTS_DB_PATH
+
+
+class GuessEvent(NamedTuple):
+    """One accepted guess, stored as a row as is"""
+
+    round_id: int
+    server_id: int
+    user_id: int
+    guess: str
+    pattern: int
+    attempt: int
+    solved: bool
+    created_at: float
+
+
+@dataclass(frozen=True)
+class GuessStats:
+    """Aggregates over the guesses of a round or word"""
+
+    rounds: int
+    players: int
+    guesses: int
+    solved: int
+    # Average attempt of the solving guess, 0 when nobody solved
+    average_attempts: float
+
+    @property
+    def solve_rate(self) -> float:
+        """Share of players that found the word"""
+        return self.solved / self.players if self.players else 0.0
+
+
+class GuessEventStore:
+    """Append-only table of guess events, written in batches.
+
+    ``record`` only appends to an in-memory list, so it costs next to nothing
+    on the event loop. Full batches are handed to a dedicated writer thread
+    that owns the SQLite connection and inserts them in one transaction;
+    ``flush`` hands over the rest. Queries run on the same thread after the
+    buffer is flushed, so they see every recorded event.
+    """
+
+    def __init__(self, path: Optional[str] = None, batch_size: int = EVENT_BATCH_SIZE):
+        self.path = path or events_database_path()
+        self.batch_size = batch_size
+        self._buffer: List[GuessEvent] = []
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="guess-events")
+        self._conn: sqlite3.Connection = self._writer.submit(self._connect).result()
+        self.recorded = 0
+        self.batches = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        if self.path != MEMORY_DB:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(
+            """CREATE TABLE IF NOT EXISTS rounds
+                 (round_id INTEGER PRIMARY KEY, word TEXT NOT NULL, started_at REAL NOT NULL);
+               CREATE INDEX IF NOT EXISTS rounds_word ON rounds (word);
+               CREATE TABLE IF NOT EXISTS round_answers
+                 (round_id INTEGER NOT NULL, word_length INTEGER NOT NULL, word TEXT NOT NULL,
+                  PRIMARY KEY (round_id, word_length));
+               CREATE INDEX IF NOT EXISTS round_answers_word ON round_answers (word);
+               INSERT OR IGNORE INTO round_answers SELECT round_id, length(word), word FROM rounds;
+               CREATE TABLE IF NOT EXISTS guess_events
+                 (round_id INTEGER NOT NULL, server_id INTEGER NOT NULL, user_id INTEGER NOT NULL,
+                  guess TEXT NOT NULL, pattern INTEGER NOT NULL, attempt INTEGER NOT NULL,
+                  solved INTEGER NOT NULL, created_at REAL NOT NULL);
+               CREATE INDEX IF NOT EXISTS guess_events_round ON guess_events (round_id, server_id);"""
+        )
+        conn.commit()
+        return conn
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, functools.partial(func, *args))
+
+    def start_round(self, round_id: int, word: str):
+        """Records the word of a round, kept if the round resumes"""
+        self._writer.submit(self._insert_round, round_id, word, time.time()).add_done_callback(self._log_failure)
+
+    def record_answer(self, round_id: int, word: str):
+        """Records the answer of another word length played in a round"""
+        self._writer.submit(self._insert_answer, round_id, word).add_done_callback(self._log_failure)
+
+    def record(
+        self, round_id: int, server_id: int, user_id: int, guess: str, pattern: int, attempt: int, solved: bool
+    ):
+        """Buffers an event, handing a full batch to the writer"""
+        self._buffer.append(
+            GuessEvent(round_id, server_id, user_id, guess, pattern, attempt, solved, time.time())
+        )
+        self.recorded += 1
+        if len(self._buffer) >= self.batch_size:
+            self._submit_batch()
+
+    def _submit_batch(self) -> Optional[Future]:
+        if not self._buffer:
+            return None
+        batch, self._buffer = self._buffer, []
+        future = self._writer.submit(self._insert_events, batch)
+        future.add_done_callback(self._log_failure)
+        return future
+
+    @staticmethod
+    def _log_failure(future: Future):
+        if future.exception() is not None:
+            logger.error("Could not store guess events: {}", future.exception())
+
+    def _insert_round(self, round_id: int, word: str, started_at: float):
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO rounds (round_id, word, started_at) VALUES (?, ?, ?)",
+                (round_id, word, started_at),
+            )
+            self._insert_answer(round_id, word)
+
+    def _insert_answer(self, round_id: int, word: str):
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO round_answers (round_id, word_length, word) VALUES (?, ?, ?)",
+                (round_id, len(word), word),
+            )
+
+    def _insert_events(self, batch: List[GuessEvent]):
+        with self._conn:
+            self._conn.executemany("INSERT INTO guess_events VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+        self.batches += 1
+
+    async def flush(self):
+        """Writes every buffered event"""
+        future = self._submit_batch()
+        if future is not None:
+            await asyncio.wrap_future(future)
+
+    async def round_stats(self, round_id: int, server_id: Optional[int] = None) -> GuessStats:
+        """Aggregates of one round, optionally limited to a guild"""
+        await self.flush()
+        if server_id is None:
+            return await self._run(self._stats, "round_id = ?", (round_id,))
+        return await self._run(self._stats, "round_id = ? AND server_id = ?", (round_id, server_id))
+
+    async def word_stats(self, word: str) -> GuessStats:
+        """Aggregates of every round that had word as answer, over guesses of its length"""
+        await self.flush()
+        # Guilds playing other lengths guess under the same round ids
+        return await self._run(
+            self._stats,
+            "round_id IN (SELECT round_id FROM round_answers WHERE word = ?) AND length(guess) = ?",
+            (word, len(word)),
+        )
+
+    async def attempt_distribution(self, round_id: int) -> Dict[int, int]:
+        """Players that solved a round per attempt number"""
+        await self.flush()
+        rows = await self._run(
+            self._query,
+            "SELECT attempt, COUNT(*) FROM guess_events WHERE round_id = ? AND solved GROUP BY attempt",
+            (round_id,),
+        )
+        return dict(rows)
+
+    def _query(self, sql: str, params: tuple) -> list:
+        return self._conn.execute(sql, params).fetchall()
+
+    def _stats(self, where: str, params: tuple) -> GuessStats:
+        rounds, players, guesses, solved, average_attempts = self._conn.execute(
+            f"""SELECT COUNT(DISTINCT round_id),
+                       (SELECT COUNT(*) FROM (SELECT DISTINCT round_id, server_id, user_id
+                                              FROM guess_events WHERE {where})),
+                       COUNT(*), COALESCE(SUM(solved), 0),
+                       COALESCE(AVG(CASE WHEN solved THEN attempt END), 0)
+                FROM guess_events WHERE {where}""",
+            params + params,
+        ).fetchone()
+        return GuessStats(rounds, players, guesses, solved, average_attempts)
+
+    def close(self):
+        """Writes buffered events, closes the connection and stops the writer"""
+        future = self._submit_batch()
+        if future is not None:
+            future.result()
+        self._writer.submit(self._conn.close).result()
+        self._writer.shutdown()
@@ -0,0 +1,215 @@
+"""Wordle feedback scoring
+
+Feedback for a guess is encoded as one integer: each position holds a base 3
+digit (position 0 is the least significant) of MISS, PRESENT or CORRECT.
+Duplicate letters follow the usual Wordle rules: greens are matched first and
+a repeated letter is only yellow while unmatched copies remain in the answer.
+"""
+
+import hashlib
+import os
+import threading
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+from loguru import logger
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, matrices fall back to pure Python rows
+    np = None
+
+MISS = 0
+PRESENT = 1
+CORRECT = 2
+
+CELLS = {MISS: "⬛", PRESENT: "🟨", CORRECT: "🟩"}
+
+
+def score_guess(guess: str, answer: str) -> int:
+    """Feedback pattern of guess against answer"""
+    states = [MISS] * len(guess)
+    remaining: Dict[str, int] = {}
+    for i, letter in enumerate(answer):
+        if i < len(guess) and guess[i] == letter:
+            states[i] = CORRECT
+        else:
+            remaining[letter] = remaining.get(letter, 0) + 1
+
+    for i, letter in enumerate(guess):
+        if states[i] != CORRECT and remaining.get(letter, 0) > 0:
+            states[i] = PRESENT
+            remaining[letter] -= 1
+
+    return encode_states(states)
+
+
+def encode_states(states: Sequence[int]) -> int:
+    """Packs per position states into a pattern"""
+    pattern = 0
+    for state in reversed(states):
+        pattern = pattern * 3 + state
+    return pattern
+
+
+def decode_pattern(pattern: int, length: int) -> List[int]:
+    """Unpacks pattern into per position states"""
+    states = []
+    for _ in range(length):
+        pattern, state = divmod(pattern, 3)
+        states.append(state)
+    return states
+
+
+def solved_pattern(length: int) -> int:
+    """Pattern of an all green guess"""
+    return 3 ** length - 1
+
+
+def pattern_visual(pattern: int, length: int) -> str:
+    """Colored cells for pattern"""
+    return "".join(CELLS[state] for state in decode_pattern(pattern, length))
+
+
+class PatternMatrix:
+    """Feedback patterns of every guess against every answer.
+
+    Rows are computed with NumPy vector operations over all answers at once
+    and the most recent ``max_rows`` are kept, so repeated lookups are plain
+    indexing. ``build``
+    fills the whole guess x answer matrix up front, which can be cached on
+    disk with ``save``/``load``.
+    """
+
+    def __init__(self, guesses: Sequence[str], answers: Sequence[str], max_rows: int = 1024):
+        # Every guess and answer must share one length
+        self.guesses = list(guesses)
+        self.answers = list(answers)
+        self.guess_index = {word: i for i, word in enumerate(self.guesses)}
+        self.answer_index = {word: i for i, word in enumerate(self.answers)}
+        self.length = len(self.answers[0]) if self.answers else 0
+        self.max_rows = max_rows
+        self._rows: Dict[int, Sequence[int]] = {}
+        self._lock = threading.Lock()
+        self._matrix = None
+
+        if np is not None and self.answers:
+            self.dtype = np.uint8 if 3 ** self.length <= 256 else np.uint16
+            self._powers = 3 ** np.arange(self.length, dtype=np.int32)
+            self._answer_codes = self._encode(self.answers)
+
+    @staticmethod
+    def _encode(words: Sequence[str]):
+        """Words as an (n, length) array of code points"""
+        joined = "".join(words)
+        codes = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32)
+        return codes.reshape(len(words), -1)
+
+    @property
+    def checksum(self) -> str:
+        """Identifies the word lists a matrix was built for"""
+        digest = hashlib.sha256("\n".join(self.guesses).encode())
+        digest.update(b"\0" + "\n".join(self.answers).encode())
+        return digest.hexdigest()
+
+    def lookup(self, guess: str, answer: str, compute: bool = True) -> int:
+        """Pattern of guess against answer, without computing a missing row unless compute"""
+        guess_id = self.guess_index.get(guess)
+        answer_id = self.answer_index.get(answer)
+        if guess_id is None or answer_id is None:
+            return score_guess(guess, answer)
+        if self._matrix is not None:
+            return int(self._matrix[guess_id, answer_id])
+        row = self._rows.get(guess_id)
+        if row is None:
+            # A whole row costs more than scoring the one pair
+            if not compute:
+                return score_guess(guess, answer)
+            row = self.row(guess_id)
+        return int(row[answer_id])
+
+    def row(self, guess_id: int):
+        """Patterns of one guess against every answer"""
+        if self._matrix is not None:
+            return self._matrix[guess_id]
+        row = self._rows.get(guess_id)
+        if row is None:
+            row = self._compute_row(self.guesses[guess_id])
+            # Hints on worker threads and guesses on the event loop share the rows
+            with self._lock:
+                if len(self._rows) >= self.max_rows:
+                    del self._rows[next(iter(self._rows))]
+                self._rows[guess_id] = row
+        return row
+
+    def _compute_row(self, guess: str):
+        if np is None:
+            return array("H", (score_guess(guess, answer) for answer in self.answers))
+
+        answers = self._answer_codes
+        codes = [ord(letter) for letter in guess]
+        green = answers == np.asarray(codes, dtype=np.uint32)
+        pattern = (green * (2 * self._powers)).sum(axis=1, dtype=np.int32)
+
+        # Copies of each guessed letter in the answer that are not already green
+        remaining = {
+            code: ((answers == code) & ~green).sum(axis=1, dtype=np.int32)
+            for code in set(codes)
+        }
+        for i, code in enumerate(codes):
+            yellow = ~green[:, i] & (remaining[code] > 0)
+            pattern += yellow * self._powers[i]
+            remaining[code] -= yellow
+        return pattern.astype(self.dtype)
+
+    def build(self):
+        """Computes the full guess x answer matrix"""
+        if np is None:
+            raise RuntimeError("Building a full pattern matrix needs NumPy")
+        matrix = np.empty((len(self.guesses), len(self.answers)), dtype=self.dtype)
+        for guess_id, guess in enumerate(self.guesses):
+            row = self._rows.get(guess_id)
+            matrix[guess_id] = row if row is not None else self._compute_row(guess)
+        self._matrix = matrix
+        self._rows = {}
+        return matrix
+
+    def save(self, path: str):
+        """Writes full matrix to disk"""
+        matrix = self._matrix if self._matrix is not None else self.build()
+        temp_path = f"{path}.{os.getpid()}.tmp.npy"
+        np.save(temp_path, matrix)
+        os.replace(temp_path, path)
+        with open(f"{path}.sha256", mode="w", encoding="utf-8") as file:
+            file.write(self.checksum)
+
+    def load(self, path: str) -> bool:
+        """Memory maps a saved matrix if it matches these word lists"""
+        if np is None:
+            return False
+        try:
+            with open(f"{path}.sha256", mode="r", encoding="utf-8") as file:
+                if file.read().strip() != self.checksum:
+                    return False
+            matrix = np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            return False
+        if matrix.shape != (len(self.guesses), len(self.answers)):
+            return False
+        self._matrix = matrix
+        return True
+
+    @classmethod
+    def cached(
+        cls, guesses: Sequence[str], answers: Sequence[str], path: Optional[str], max_rows: int = 1024
+    ) -> "PatternMatrix":
+        """Matrix loaded from path, or built and saved there"""
+        matrix = cls(guesses, answers, max_rows=max_rows)
+        if path is None or np is None:
+            return matrix
+        if not matrix.load(path):
+            try:
+                matrix.save(path)
+            except OSError as error:
+                logger.warning("Could not cache pattern matrix: {}", error)
+        return matrix
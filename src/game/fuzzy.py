@@ -0,0 +1,97 @@
+"""Fuzzy word lookup with a deletion index"""
+
+from typing import Dict, Iterable, List, Set, Tuple
+
+MAX_DISTANCE = 2
+SUGGESTION_LIMIT = 3
+
+
+def deletes(word: str, max_distance: int = MAX_DISTANCE) -> Set[str]:
+    """Every string left after deleting up to max_distance letters of word"""
+    variants = {word}
+    frontier = variants
+    for _ in range(max_distance):
+        frontier = {variant[:index] + variant[index + 1:] for variant in frontier for index in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+def edit_distance(source: str, target: str, max_distance: int = MAX_DISTANCE) -> int:
+    """Edits with adjacent swaps between source and target, max_distance + 1 once beyond it"""
+    if abs(len(source) - len(target)) > max_distance:
+        return max_distance + 1
+    if len(source) == len(target):
+        # Guesses have the length of their partition, most pairs need no table
+        mismatches = [index for index, (letter, other) in enumerate(zip(source, target)) if letter != other]
+        if len(mismatches) < 2:
+            return len(mismatches)
+        if len(mismatches) == 2:
+            first, second = mismatches
+            swapped = second == first + 1 and source[first] == target[second] and source[second] == target[first]
+            return 1 if swapped else min(2, max_distance + 1)
+        # Two edits trade at most one letter of the mismatched ones for another
+        if max_distance <= 2:
+            source_letters = {source[index] for index in mismatches}
+            target_letters = {target[index] for index in mismatches}
+            if len(source_letters ^ target_letters) > 2:
+                return max_distance + 1
+    # Rows of the optimal string alignment table, two behind for swaps
+    before, previous = None, list(range(len(target) + 1))
+    for row, source_letter in enumerate(source, start=1):
+        current = [row]
+        for column, target_letter in enumerate(target, start=1):
+            cost = source_letter != target_letter
+            distance = min(previous[column] + 1, current[column - 1] + 1, previous[column - 1] + cost)
+            if (
+                before is not None
+                and column > 1
+                and source_letter == target[column - 2]
+                and source[row - 2] == target_letter
+            ):
+                distance = min(distance, before[column - 2] + 1)
+            current.append(distance)
+        if min(current) > max_distance:
+            return max_distance + 1
+        before, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+
+class DeletionIndex:
+    """SymSpell style index of the words left after deleting letters.
+
+    Two words within ``max_distance`` edits share at least one of their
+    deletions, so a lookup only checks the words filed under the deletions
+    of the query instead of the whole lexicon.
+    """
+
+    def __init__(self, word_counts: Iterable[Tuple[str, int]], max_distance: int = MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.words: List[str] = []
+        self.counts: List[int] = []
+        self.index: Dict[str, List[int]] = {}
+        for word, count in word_counts:
+            word_id = len(self.words)
+            self.words.append(word)
+            self.counts.append(count)
+            for variant in deletes(word, max_distance):
+                self.index.setdefault(variant, []).append(word_id)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def lookup(self, word: str, limit: int = SUGGESTION_LIMIT) -> List[str]:
+        """Closest words within max_distance edits, most frequent first among equals"""
+        candidates: Set[int] = set()
+        for variant in deletes(word, self.max_distance):
+            candidates.update(self.index.get(variant, ()))
+
+        matches = []
+        for word_id in candidates:
+            candidate = self.words[word_id]
+            if candidate == word:
+                continue
+            distance = edit_distance(word, candidate, self.max_distance)
+            if distance <= self.max_distance:
+                matches.append((distance, -self.counts[word_id], candidate))
+        matches.sort()
+        return [candidate for _, _, candidate in matches[:limit]]
@@ -0,0 +1,112 @@
+"""Entropy based hints"""
+
+import math
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from .feedback import PatternMatrix, np
+
+HINT_CACHE_SIZE = 10_000
+# Guess candidates scored per hint when many answers are still possible
+GUESS_POOL_SIZE = 2000
+
+
+@dataclass(frozen=True)
+class Hint:
+    """Suggested guess for a feedback state"""
+
+    word: str
+    remaining: int
+    bits: float
+
+
+class HintEngine:
+    """Suggests the guess with the highest expected information.
+
+    A state is the set of (guess, pattern) pairs a player has seen. Answers
+    consistent with every pair are the remaining candidates, and each guess is
+    scored by the entropy of the patterns it would split them into. Players
+    share states (everyone starts from the empty one), so results are memoized
+    by state.
+    """
+
+    def __init__(self, patterns: PatternMatrix, pool: Optional[Sequence[int]] = None):
+        self.patterns = patterns
+        # Guess ids considered while the candidate set is larger than the pool
+        self.pool = list(pool) if pool is not None else list(range(len(patterns.guesses)))
+        self._cache: "OrderedDict[Tuple[Tuple[int, int], ...], Optional[Hint]]" = OrderedDict()
+        # Hints run on worker threads, the cache and the matrix rows are shared
+        self._lock = threading.Lock()
+
+    def suggest(self, guesses: Sequence[str], patterns: Sequence[int]) -> Optional[Hint]:
+        """Best next guess after guesses and their feedback patterns"""
+        state = self._state_key(guesses, patterns)
+        with self._lock:
+            if state in self._cache:
+                self._cache.move_to_end(state)
+                return self._cache[state]
+
+            hint = self._best_guess(self.candidates(state))
+            self._cache[state] = hint
+            if len(self._cache) > HINT_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return hint
+
+    def _state_key(self, guesses: Sequence[str], patterns: Sequence[int]) -> Tuple[Tuple[int, int], ...]:
+        """Order independent key of known (guess id, pattern) pairs"""
+        index = self.patterns.guess_index
+        return tuple(sorted(
+            (index[guess], pattern) for guess, pattern in zip(guesses, patterns) if guess in index
+        ))
+
+    def candidates(self, state: Tuple[Tuple[int, int], ...]):
+        """Answer ids consistent with every pair in state"""
+        if np is not None:
+            candidates = np.arange(len(self.patterns.answers))
+            for guess_id, pattern in state:
+                row = np.asarray(self.patterns.row(guess_id))
+                candidates = candidates[row[candidates] == pattern]
+            return candidates
+
+        candidates = range(len(self.patterns.answers))
+        for guess_id, pattern in state:
+            row = self.patterns.row(guess_id)
+            candidates = [answer for answer in candidates if row[answer] == pattern]
+        return list(candidates)
+
+    def _best_guess(self, candidates) -> Optional[Hint]:
+        remaining = len(candidates)
+        if remaining == 0:
+            return None
+        if remaining <= 2:
+            return Hint(word=self.patterns.answers[int(candidates[0])], remaining=remaining, bits=float(remaining - 1))
+
+        # Remaining answers are worth guessing themselves, the pool covers the rest
+        candidate_words = {self.patterns.answers[int(answer)] for answer in candidates}
+        guess_ids = [
+            self.patterns.guess_index[word] for word in candidate_words if word in self.patterns.guess_index
+        ]
+        if remaining > GUESS_POOL_SIZE or not guess_ids:
+            guess_ids = self.pool
+
+        best_id, best_bits = guess_ids[0], -1.0
+        for guess_id in guess_ids:
+            bits = self._entropy(self.patterns.row(guess_id), candidates)
+            is_candidate = self.patterns.guesses[guess_id] in candidate_words
+            if bits > best_bits or (bits == best_bits and is_candidate):
+                best_id, best_bits = guess_id, bits
+        return Hint(word=self.patterns.guesses[best_id], remaining=remaining, bits=best_bits)
+
+    @staticmethod
+    def _entropy(row, candidates) -> float:
+        """Entropy in bits of the patterns row splits candidates into"""
+        if np is not None:
+            counts = np.bincount(np.asarray(row)[candidates])
+            counts = counts[counts > 0] / len(candidates)
+            return float(-(counts * np.log2(counts)).sum())
+
+        total = len(candidates)
+        counts: List[int] = list(Counter(row[answer] for answer in candidates).values())
+        return -sum(count / total * math.log2(count / total) for count in counts)
@@ -0,0 +1,135 @@
+"""Parallel streaming ingestion of word list dumps
+
+Files are split into byte ranges that worker processes read, normalize and
+count independently; the parent only merges the per chunk counts. Memory is
+bounded by the chunks in flight and the vocabulary, not the file size.
+
+Two formats are read: n-gram CSVs of ``word,count`` rows, where rows are
+filtered on their count like :func:`snapshot.read_word_counts` does, and
+plain text, where every whitespace separated word counts once and words are
+only kept when their total over all text files passes ``text_min_count``, so
+one-off typos never become answers. Quoted CSV fields spanning lines are not
+supported, the n-gram dumps never have them.
+"""
+
+import os
+import re
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from loguru import logger
+
+CHUNK_SIZE = 16 << 20
+CSV_SUFFIX = ".csv"
+# Words of plain text sources must occur more often than this
+TEXT_MIN_COUNT = 1
+
+
+class Chunk(NamedTuple):
+    """Byte range of a file, owning the lines that start inside it"""
+
+    path: str
+    start: int
+    end: int
+
+
+def split_file(path: str, chunk_size: int = CHUNK_SIZE) -> List[Chunk]:
+    """Byte ranges covering the file"""
+    size = os.path.getsize(path)
+    return [Chunk(path, start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+
+
+def read_chunk(chunk: Chunk) -> bytes:
+    """Whole lines starting inside the chunk"""
+    with open(chunk.path, mode="rb") as file:
+        starts_line = True
+        if chunk.start:
+            file.seek(chunk.start - 1)
+            starts_line = file.read(1) == b"\n"
+        data = file.read(chunk.end - chunk.start)
+        if not starts_line:
+            # The partial first line belongs to the previous chunk
+            newline = data.find(b"\n")
+            if newline == -1:
+                return b""
+            data = data[newline + 1:]
+        if data and not data.endswith(b"\n"):
+            data += file.readline()
+    return data
+
+
+def word_patterns(lengths: Sequence[int]) -> Tuple["re.Pattern", "re.Pattern"]:
+    """Regexes of CSV rows and whitespace separated words within the length range
+
+    Scanning a whole chunk with a regex keeps the per line work in C and
+    only hands the lines that can match to Python.
+    """
+    letters = f"[^\\W\\d_]{{{min(lengths)},{max(lengths)}}}"
+    csv_row = re.compile(f'^"?({letters})"?,\\s*(\\d+)\\s*$', re.MULTILINE)
+    text_word = re.compile(f"(?<!\\S){letters}(?!\\S)")
+    return csv_row, text_word
+
+
+def count_chunk(chunk: Chunk, lengths: Sequence[int], min_count: int) -> Dict[str, int]:
+    """Counts of the words of lengths in one chunk"""
+    allowed = frozenset(lengths)
+    csv_row, text_word = word_patterns(lengths)
+    text = read_chunk(chunk).decode("utf-8", errors="replace").lower()
+    if not chunk.path.endswith(CSV_SUFFIX):
+        counts = Counter(text_word.findall(text))
+        return {word: count for word, count in counts.items() if len(word) in allowed}
+
+    # The header never matches, its count column is not a number
+    counts: Dict[str, int] = {}
+    for word, count in csv_row.findall(text):
+        count = int(count)
+        if count > min_count and len(word) in allowed:
+            counts[word] = counts.get(word, 0) + count
+    return counts
+
+
+def count_words(
+    paths: Sequence[str],
+    lengths: Sequence[int],
+    min_count: int,
+    workers: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+    text_min_count: int = TEXT_MIN_COUNT,
+) -> Dict[int, Dict[str, int]]:
+    """Word counts of every file by word length, counted across processes"""
+    chunks = [chunk for path in paths for chunk in split_file(path, chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    # CSV rows are filtered one by one, text words only once their total is known
+    csv_totals: Dict[str, int] = {}
+    text_totals: Dict[str, int] = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        chunks_left = iter(chunks)
+        while True:
+            # A couple of chunks per worker in flight keeps them busy with bounded memory
+            for chunk in chunks_left:
+                pending[pool.submit(count_chunk, chunk, lengths, min_count)] = chunk
+                if len(pending) >= 2 * workers:
+                    break
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = pending.pop(future)
+                totals = csv_totals if chunk.path.endswith(CSV_SUFFIX) else text_totals
+                for word, count in future.result().items():
+                    totals[word] = totals.get(word, 0) + count
+
+    totals = csv_totals
+    for word, count in text_totals.items():
+        if count > text_min_count:
+            totals[word] = totals.get(word, 0) + count
+    logger.info("Counted {} distinct words in {} chunks of {} files", len(totals), len(chunks), len(paths))
+
+    by_length: Dict[int, Dict[str, int]] = {length: {} for length in lengths}
+    for word, count in totals.items():
+        # Lowercasing can change the length of a few letters
+        if len(word) in by_length:
+            by_length[len(word)][word] = count
+    return by_length
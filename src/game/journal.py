@@ -0,0 +1,193 @@
+"""Round journal for crash recovery"""
+
+import json
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+JOURNAL_PATH = "./src/data/round_journal.jsonl"
+SNAPSHOT_PATH = "./src/data/round_snapshot.json"
+# Records appended before the journal is folded into a snapshot
+COMPACT_AFTER = 50_000
+
+# (server_id, user_id, guess)
+GuessRecord = Tuple[int, int, str]
+
+
+@dataclass
+class RoundState:
+    """Everything needed to resume a round"""
+
+    round_id: int
+    word: str
+    guesses: List[GuessRecord] = field(default_factory=list)
+    # Answers of the other word lengths played this round, by length
+    answers: Dict[int, str] = field(default_factory=dict)
+
+
+class Checkpoint(NamedTuple):
+    """Journal position a snapshot taken now covers"""
+
+    sequence: int
+    # Journal bytes holding the covered records
+    offset: int
+    # Snapshots committed so far, a later one makes this checkpoint stale
+    generation: int
+
+
+class RoundJournal:
+    """Append-only JSONL log of round starts and guesses.
+
+    A round starts with a snapshot holding just its word, guesses and the
+    answers drawn for other word lengths are then appended as records. Each
+    record is one ``os.write`` to a file opened with O_APPEND, which
+    lands in the page cache without waiting on the disk, so it survives a
+    process crash or restart; ``sync`` is called periodically to also
+    survive the host going down. Records carry a sequence number and the
+    snapshot stores the last one it covers, so replay never applies a record
+    twice even if a crash happens between writing a snapshot and truncating
+    the journal. A torn last line is ignored.
+
+    Compacting a busy round is split so the slow part can run on a thread:
+    ``write_snapshot`` serializes and fsyncs a state captured at a
+    ``checkpoint``, then ``commit`` swaps it in and keeps only the records
+    appended since, unless another snapshot was committed in between.
+    """
+
+    def __init__(self, path: str = JOURNAL_PATH, snapshot_path: str = SNAPSHOT_PATH, compact_after: int = COMPACT_AFTER):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.compact_after = compact_after
+        self.sequence = 0
+        self.records = 0
+        self.generation = 0
+        self._fd = self._open()
+        # Replaying also restores the sequence new records continue from
+        self.recovered = self.replay()
+
+    def replay(self) -> Optional[RoundState]:
+        """Rebuilds the last round from snapshot and journal"""
+        state: Optional[RoundState] = None
+        covered = 0
+        try:
+            with open(self.snapshot_path, mode="r", encoding="utf-8") as file:
+                snapshot = json.load(file)
+            covered = snapshot["sequence"]
+            state = RoundState(
+                round_id=snapshot["round"],
+                word=snapshot["word"],
+                guesses=[tuple(record) for record in snapshot["guesses"]],
+                answers={int(length): word for length, word in snapshot.get("answers", {}).items()},
+            )
+        except (OSError, ValueError, KeyError):
+            pass
+        self.sequence = covered
+        self.records = 0
+
+        valid_bytes = 0
+        with open(self.path, mode="rb") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # torn write at the end of the journal
+                valid_bytes += len(line)
+                self.sequence = max(self.sequence, record["n"])
+                self.records += 1
+                if record["n"] <= covered or state is None:
+                    continue
+                if record["t"] == "answer":
+                    state.answers[record["l"]] = record["w"]
+                else:
+                    state.guesses.append((record["s"], record["u"], record["w"]))
+        # Drop a torn tail so new records start on a fresh line
+        if valid_bytes != os.fstat(self._fd).st_size:
+            os.ftruncate(self._fd, valid_bytes)
+        return state
+
+    def _append(self, record: dict):
+        self.sequence += 1
+        record["n"] = self.sequence
+        os.write(self._fd, (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8"))
+        self.records += 1
+
+    def start_round(self, round_id: int, word: str):
+        """Records new round, older records stop mattering so they are dropped"""
+        self.compact(RoundState(round_id=round_id, word=word))
+
+    def record_guess(self, server_id: int, user_id: int, guess: str):
+        """Records an accepted guess"""
+        self._append({"t": "guess", "s": server_id, "u": user_id, "w": guess})
+
+    def record_answer(self, length: int, word: str):
+        """Records the answer drawn for another word length"""
+        self._append({"t": "answer", "l": length, "w": word})
+
+    @property
+    def needs_compaction(self) -> bool:
+        """Whether the journal has grown enough to fold into a snapshot"""
+        return self.records >= self.compact_after
+
+    def compact(self, state: RoundState):
+        """Writes state as the snapshot and empties the journal"""
+        checkpoint = self.checkpoint()
+        self.commit(self.write_snapshot(state, checkpoint), checkpoint)
+
+    def checkpoint(self) -> Checkpoint:
+        """Position of the records a state captured now includes"""
+        return Checkpoint(self.sequence, os.fstat(self._fd).st_size, self.generation)
+
+    def write_snapshot(self, state: RoundState, checkpoint: Checkpoint) -> str:
+        """Serializes state to a temporary snapshot on disk, returns its path"""
+        snapshot = {
+            "sequence": checkpoint.sequence,
+            "round": state.round_id,
+            "word": state.word,
+            "guesses": state.guesses,
+            "answers": state.answers,
+        }
+        # Unique, a new round may write its snapshot while this one is written
+        directory, name = os.path.split(self.snapshot_path)
+        fd, temp_path = tempfile.mkstemp(prefix=f"{name}.", suffix=".tmp", dir=directory or ".")
+        with open(fd, mode="w", encoding="utf-8") as file:
+            json.dump(snapshot, file, separators=(",", ":"))
+            file.flush()
+            os.fsync(file.fileno())
+        return temp_path
+
+    def commit(self, temp_path: str, checkpoint: Checkpoint) -> bool:
+        """Makes a written snapshot current and drops the records it covers"""
+        if checkpoint.generation != self.generation:
+            # A new round was snapshotted meanwhile, this state is older
+            os.remove(temp_path)
+            return False
+        os.replace(temp_path, self.snapshot_path)
+        self.generation += 1
+        with open(self.path, mode="rb") as file:
+            file.seek(checkpoint.offset)
+            tail = file.read()
+        if not tail:
+            os.ftruncate(self._fd, 0)
+        else:
+            # Records appended while the snapshot was written move to a fresh journal
+            journal_temp = f"{self.path}.tmp"
+            with open(journal_temp, mode="wb") as file:
+                file.write(tail)
+            os.replace(journal_temp, self.path)
+            os.close(self._fd)
+            self._fd = self._open()
+        self.records = tail.count(b"\n")
+        return True
+
+    def _open(self) -> int:
+        return os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def sync(self):
+        """Forces appended records to disk"""
+        os.fsync(self._fd)
+
+    def close(self):
+        """Syncs and closes the journal"""
+        self.sync()
+        os.close(self._fd)
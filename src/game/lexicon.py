@@ -0,0 +1,211 @@
+"""Compact array-encoded trie"""
+
+import heapq
+from array import array
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, Iterator, List, Mapping, Tuple
+
+TOP_CACHE_SIZE = 4096
+
+
+class Lexicon:
+    """Immutable trie stored in flat arrays instead of one object per node.
+
+    Nodes are numbered in breadth-first order, so the children of a node are
+    a contiguous run of node ids: ``first_child[node]`` up to
+    ``first_child[node + 1]``. Each node keeps a one byte label (an index into
+    ``alphabet``) which lets a child lookup be a single ``find`` over that run.
+    Final nodes also carry the corpus count of their word in ``counts``, and
+    ``best`` holds the highest count anywhere in a node's subtree so ranked
+    completions can be found best first without visiting the whole subtree.
+
+    The arrays only need indexing (and ``find`` for labels), so they can be
+    views over a memory mapped snapshot as well as in-memory buffers.
+    """
+
+    def __init__(
+        self,
+        alphabet: str,
+        labels: bytes,
+        first_child: array,
+        final: bytes,
+        counts: array,
+        best: array,
+        size: int,
+    ):
+        if len(alphabet) > 256:
+            raise ValueError("Lexicon alphabet can hold at most 256 letters")
+        self.alphabet = alphabet
+        self.labels = labels
+        self.first_child = first_child
+        self.final = final
+        self.counts = counts
+        self.best = best
+        self.size = size
+        self._codes: Dict[str, bytes] = {
+            letter: bytes((code,)) for code, letter in enumerate(alphabet)
+        }
+        self._top_cache: "OrderedDict[Tuple[int, int], Tuple[str, ...]]" = OrderedDict()
+
+    @classmethod
+    def from_words(cls, words: Iterable[str]) -> "Lexicon":
+        """Builds lexicon from any iterable of words"""
+        return cls.from_counts(dict.fromkeys(words, 0))
+
+    @classmethod
+    def from_counts(cls, word_counts: Mapping[str, int]) -> "Lexicon":
+        """Builds lexicon from word to corpus count mapping"""
+        words = sorted(word_counts)
+        alphabet = "".join(sorted({letter for word in words for letter in word}))
+        codes = {letter: code for code, letter in enumerate(alphabet)}
+
+        labels = bytearray([0])  # root has no label
+        final = bytearray([0])
+        counts = array("I", [0])
+        first_child = array("I")
+
+        # Each queued entry is the range of sorted words sharing the node prefix
+        queue = deque([(0, len(words), 0)])
+        while queue:
+            low, high, depth = queue.popleft()
+            first_child.append(len(labels))
+
+            # Words ending at this node sort before their extensions
+            while low < high and len(words[low]) == depth:
+                low += 1
+
+            start = low
+            while start < high:
+                letter = words[start][depth]
+                end = start + 1
+                while end < high and words[end][depth] == letter:
+                    end += 1
+                is_final = len(words[start]) == depth + 1
+                labels.append(codes[letter])
+                final.append(is_final)
+                counts.append(word_counts[words[start]] if is_final else 0)
+                queue.append((start, end, depth + 1))
+                start = end
+        first_child.append(len(labels))
+
+        # Children always have higher ids than their parent
+        best = array("I", counts)
+        for node in range(len(labels) - 1, -1, -1):
+            start, end = first_child[node], first_child[node + 1]
+            if start < end:
+                best[node] = max(best[node], max(best[start:end]))
+
+        return cls(alphabet, bytes(labels), first_child, bytes(final), counts, best, len(words))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, word: str) -> bool:
+        return self.is_valid(word)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.search(""))
+
+    @property
+    def node_count(self) -> int:
+        """Number of nodes including the root"""
+        return len(self.first_child) - 1
+
+    def child_range(self, node: int) -> Tuple[int, int]:
+        """Node ids of the children of given node"""
+        return self.first_child[node], self.first_child[node + 1]
+
+    def label(self, node: int) -> str:
+        """Letter stored on node"""
+        return self.alphabet[self.labels[node]]
+
+    def find(self, prefix: str, node: int = 0) -> int:
+        """Walks prefix from node, returns node id or -1 if missing"""
+        # Local names keep the per letter loop down to a few bytecodes
+        codes = self._codes
+        find = self.labels.find
+        first_child = self.first_child
+        for letter in prefix:
+            code = codes.get(letter)
+            if code is None:
+                return -1
+            node = find(code, first_child[node], first_child[node + 1])
+            if node < 0:
+                return -1
+        return node
+
+    def is_valid(self, word: str) -> bool:
+        """Checks if full word is in lexicon"""
+        if not word:
+            return False
+        node = self.find(word)
+        return node > 0 and self.final[node] == 1
+
+    def count(self, word: str) -> int:
+        """Corpus count of word, 0 if missing"""
+        node = self.find(word) if word else -1
+        if node > 0 and self.final[node]:
+            return self.counts[node]
+        return 0
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        """All (word, count) pairs in alphabetical order"""
+        for word, node in self._completions(0, ""):
+            yield word, self.counts[node]
+
+    def search(self, prefix: str) -> List[str]:
+        """All words starting with prefix"""
+        node = self.find(prefix)
+        if node < 0:
+            return []
+        return [word for word, _ in self._completions(node, prefix)]
+
+    def top_k(self, prefix: str, k: int) -> List[str]:
+        """Up to k completions of prefix, most frequent first"""
+        node = self.find(prefix)
+        if node < 0 or k <= 0:
+            return []
+
+        key = (node, k)
+        cached = self._top_cache.get(key)
+        if cached is None:
+            cached = self._top_k(node, prefix, k)
+            self._top_cache[key] = cached
+            if len(self._top_cache) > TOP_CACHE_SIZE:
+                self._top_cache.popitem(last=False)
+        else:
+            self._top_cache.move_to_end(key)
+        return list(cached)
+
+    def clear_cache(self):
+        """Drops cached top_k results, benchmarks use it to time the uncached search"""
+        self._top_cache.clear()
+
+    def _top_k(self, node: int, prefix: str, k: int) -> Tuple[str, ...]:
+        """Best first search ordered by subtree best count"""
+        results: List[str] = []
+        # (negated count, node, word, is a finished word)
+        heap = [(-self.best[node], node, prefix, False)]
+        while heap and len(results) < k:
+            _, node, word, is_word = heapq.heappop(heap)
+            if is_word:
+                results.append(word)
+                continue
+            if self.final[node]:
+                heapq.heappush(heap, (-self.counts[node], node, word, True))
+            for child in range(self.first_child[node], self.first_child[node + 1]):
+                letter = self.alphabet[self.labels[child]]
+                heapq.heappush(heap, (-self.best[child], child, word + letter, False))
+        return tuple(results)
+
+    def _completions(self, node: int, prefix: str) -> Iterator[Tuple[str, int]]:
+        """Depth first (word, node) pairs of final nodes below node"""
+        stack = [(node, prefix)]
+        while stack:
+            node, word = stack.pop()
+            if self.final[node]:
+                yield word, node
+            start, end = self.first_child[node], self.first_child[node + 1]
+            # Push in reverse so output stays alphabetical
+            for child in range(end - 1, start - 1, -1):
+                stack.append((child, word + self.alphabet[self.labels[child]]))
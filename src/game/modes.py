@@ -0,0 +1,60 @@
+"""Word length modes per guild"""
+
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from .snapshot import WORD_LENGTH, WORD_LENGTHS
+
+MODES_PATH = "./src/data/guild_modes.json"
+
+
+def max_attempts(length: int) -> int:
+    """Attempts allowed for words of length, six for the classic five"""
+    return length + 1
+
+
+class GuildModes:
+    """Word length chosen by each guild, persisted as JSON.
+
+    Without a path the modes only live in memory, which is what offline games
+    and tests use.
+    """
+
+    def __init__(self, path: Optional[str] = MODES_PATH):
+        self.path = path
+        self.lengths: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        if path is None:
+            return
+        try:
+            with open(path, mode="r", encoding="utf-8") as file:
+                self.lengths = {
+                    int(guild_id): length for guild_id, length in json.load(file).items() if length in WORD_LENGTHS
+                }
+        except (OSError, ValueError):
+            pass
+
+    def get(self, guild_id: Optional[int]) -> int:
+        """Word length of guild"""
+        return self.lengths.get(guild_id, WORD_LENGTH)
+
+    def set(self, guild_id: int, length: int):
+        """Changes the word length of guild and saves every mode"""
+        if length not in WORD_LENGTHS:
+            raise ValueError(f"Word length must be one of {WORD_LENGTHS}, got {length}")
+        with self._lock:
+            if length == WORD_LENGTH:
+                self.lengths.pop(guild_id, None)
+            else:
+                self.lengths[guild_id] = length
+            self._save()
+
+    def _save(self):
+        if self.path is None:
+            return
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, mode="w", encoding="utf-8") as file:
+            json.dump(self.lengths, file)
+        os.replace(temp_path, self.path)
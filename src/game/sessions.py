@@ -0,0 +1,244 @@
+"""Per guild game sessions"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from .modes import max_attempts
+from .snapshot import WORD_LENGTH
+
+# Finished players kept as full records per guild before older ones are packed
+MAX_FINISHED_PER_GUILD = 64
+# Seconds without a guess before a finished player is packed
+FINISHED_IDLE_SECONDS = 300
+
+
+class UserGuess:
+    """Holds data for guesses of wordle for current word"""
+
+    __slots__ = ("user_id", "max_attempts", "guesses", "patterns", "completed", "last_active")
+
+    def __init__(self, user_id: int, max_attempts: int = max_attempts(WORD_LENGTH)):
+        self.user_id = user_id
+        self.max_attempts = max_attempts
+        self.guesses = []
+        self.patterns = []
+        self.completed = False
+        self.last_active = time.monotonic()
+
+    def remaining_attempts(self) -> int:
+        """Remaining attempts for user guesses"""
+        if self.completed:
+            return 0
+
+        return self.max_attempts - len(self.guesses)
+
+    def finished(self) -> bool:
+        """Returns if user guesses are done"""
+        return self.completed or self.remaining_attempts() == 0
+
+    def attempts(self) -> int:
+        """Gets current attempt count"""
+        return len(self.guesses)
+
+    def last_guess(self) -> str:
+        """Returns last guessed word"""
+        return self.guesses[-1]
+
+    def last_pattern(self) -> int:
+        """Returns feedback pattern of last guess"""
+        return self.patterns[-1]
+
+
+# (completed, guesses, patterns) of a finished player
+PackedGuess = Tuple[bool, Tuple[str, ...], Tuple[int, ...]]
+
+
+class GuildSession:
+    """Player guesses of one guild for the current word.
+
+    Behaves like a ``Dict[int, UserGuess]``. Players still playing stay as
+    ``UserGuess`` objects in least recently active order; finished players
+    past the limit or idle too long are packed into tuples, which is all that
+    is needed to refuse them further guesses this round.
+    """
+
+    __slots__ = ("server_id", "word_length", "max_attempts", "players", "packed", "last_active", "_lock")
+
+    def __init__(self, server_id: int, word_length: int = WORD_LENGTH):
+        self.server_id = server_id
+        # Fixed for the round, a guild changing modes plays it from the next one
+        self.word_length = word_length
+        self.max_attempts = max_attempts(word_length)
+        self.players: "OrderedDict[int, UserGuess]" = OrderedDict()
+        self.packed: Dict[int, PackedGuess] = {}
+        self.last_active = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        """Serializes commands within this guild only"""
+        # Created lazily so it binds to the running loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def player(self, user_id: int) -> UserGuess:
+        """Session of user, created on first guess"""
+        self.last_active = time.monotonic()
+        user_guess = self.get(user_id)
+        if user_guess is None:
+            user_guess = UserGuess(user_id=user_id, max_attempts=self.max_attempts)
+            self.players[user_id] = user_guess
+        elif user_id in self.players:
+            user_guess.last_active = self.last_active
+            self.players.move_to_end(user_id)
+        return user_guess
+
+    def get(self, user_id: int, default: Optional[UserGuess] = None) -> Optional[UserGuess]:
+        """Session of user if they guessed this round"""
+        user_guess = self.players.get(user_id)
+        if user_guess is not None:
+            return user_guess
+        packed = self.packed.get(user_id)
+        if packed is None:
+            return default
+        return self._unpack(user_id, packed)
+
+    def __getitem__(self, user_id: int) -> UserGuess:
+        user_guess = self.get(user_id)
+        if user_guess is None:
+            raise KeyError(user_id)
+        return user_guess
+
+    def __setitem__(self, user_id: int, user_guess: UserGuess):
+        self.packed.pop(user_id, None)
+        self.players[user_id] = user_guess
+
+    def __contains__(self, user_id: object) -> bool:
+        return user_id in self.players or user_id in self.packed
+
+    def __len__(self) -> int:
+        return len(self.players) + len(self.packed)
+
+    def __iter__(self) -> Iterator[int]:
+        yield from self.players
+        yield from self.packed
+
+    def items(self) -> Iterator[Tuple[int, UserGuess]]:
+        """All (user_id, UserGuess) pairs"""
+        for user_id in self:
+            yield user_id, self[user_id]
+
+    def values(self) -> Iterator[UserGuess]:
+        """All player sessions"""
+        for _, user_guess in self.items():
+            yield user_guess
+
+    def unsolved(self) -> Iterator[int]:
+        """Players that guessed but did not find the word"""
+        for user_id, user_guess in self.players.items():
+            if user_guess.guesses and not user_guess.completed:
+                yield user_id
+        for user_id, (completed, _, _) in self.packed.items():
+            if not completed:
+                yield user_id
+
+    def active(self) -> List[UserGuess]:
+        """Players that have not finished"""
+        return [user_guess for user_guess in self.players.values() if not user_guess.finished()]
+
+    def pack_finished(self, now: float, max_finished: int, idle_seconds: float) -> int:
+        """Packs finished players that are idle or over the limit"""
+        finished = [user_guess for user_guess in self.players.values() if user_guess.finished()]
+        overflow = len(finished) - max_finished
+        packed = 0
+        # Players are in least recently active order
+        for user_guess in finished:
+            if packed < overflow or now - user_guess.last_active > idle_seconds:
+                del self.players[user_guess.user_id]
+                self.packed[user_guess.user_id] = (
+                    user_guess.completed, tuple(user_guess.guesses), tuple(user_guess.patterns)
+                )
+                packed += 1
+        return packed
+
+    def _unpack(self, user_id: int, packed: PackedGuess) -> UserGuess:
+        completed, guesses, patterns = packed
+        user_guess = UserGuess(user_id=user_id, max_attempts=self.max_attempts)
+        user_guess.completed = completed
+        user_guess.guesses = list(guesses)
+        user_guess.patterns = list(patterns)
+        return user_guess
+
+
+class SessionManager:
+    """Game sessions sharded by guild.
+
+    Behaves like a ``Dict[int, GuildSession]``; each guild has its own lock,
+    so concurrent commands only wait on players of the same guild.
+    """
+
+    def __init__(
+        self,
+        max_finished: int = MAX_FINISHED_PER_GUILD,
+        idle_seconds: float = FINISHED_IDLE_SECONDS,
+        word_length: Optional[Callable[[int], int]] = None,
+    ):
+        self.max_finished = max_finished
+        self.idle_seconds = idle_seconds
+        # Word length a guild starting a session plays with
+        self.word_length = word_length or (lambda server_id: WORD_LENGTH)
+        self._shards: Dict[int, GuildSession] = {}
+
+    def shard(self, server_id: int, word_length: Optional[int] = None) -> GuildSession:
+        """Session of guild, created on first use with the guild's word length"""
+        session = self._shards.get(server_id)
+        if session is None:
+            session = GuildSession(server_id, word_length or self.word_length(server_id))
+            self._shards[server_id] = session
+        return session
+
+    def get(self, server_id: int, default=None) -> Optional[GuildSession]:
+        """Session of guild if anyone played there this round"""
+        return self._shards.get(server_id, default)
+
+    def __getitem__(self, server_id: int) -> GuildSession:
+        return self._shards[server_id]
+
+    def __contains__(self, server_id: object) -> bool:
+        return server_id in self._shards
+
+    def __len__(self) -> int:
+        return len(self._shards)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._shards)
+
+    def items(self):
+        """All (server_id, GuildSession) pairs"""
+        return self._shards.items()
+
+    def unsolved_players(self) -> Set[int]:
+        """Users that missed the word in some guild, each listed once"""
+        return {user_id for session in self._shards.values() for user_id in session.unsolved()}
+
+    def unsolved_by_length(self) -> Dict[int, Set[int]]:
+        """Users that missed the word, grouped by the word length they played"""
+        unsolved: Dict[int, Set[int]] = {}
+        for session in self._shards.values():
+            unsolved.setdefault(session.word_length, set()).update(session.unsolved())
+        return unsolved
+
+    def clear(self):
+        """Drops every session, references to old shards stay intact"""
+        self._shards = {}
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Packs finished players of every guild, returns number packed"""
+        now = time.monotonic() if now is None else now
+        return sum(
+            session.pack_finished(now, self.max_finished, self.idle_seconds)
+            for session in list(self._shards.values())
+        )
@@ -0,0 +1,280 @@
+"""Binary lexicon snapshots
+
+Parsing the n-gram CSV on every start is slow, so the filtered word list is
+compiled once into a snapshot that later processes memory map. Pages of a
+mapped snapshot are shared by every bot process on the host.
+
+Each word length has its own snapshot, so a mode only maps the words it
+plays with. Build them offline from the repository root with:
+    python -m src.game.snapshot
+or from other or larger dumps, counted in parallel:
+    python -m src.game.snapshot dump.csv words.txt --workers 8
+"""
+
+import argparse
+import csv
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, NamedTuple, Optional, Sequence
+
+from loguru import logger
+
+from .ingest import CHUNK_SIZE, CSV_SUFFIX, TEXT_MIN_COUNT, count_words
+from .lexicon import Lexicon
+
+WORDLIST_PATH = "./src/data/somali_ngrams.csv"
+SNAPSHOT_PATH = "./src/data/somali_lexicon.bin"
+WORD_LENGTH = 5
+# Word lengths guilds can play with, each with its own lexicon partition
+WORD_LENGTHS = (4, 5, 6, 7, 8)
+MIN_COUNT = 500
+
+SNAPSHOT_MAGIC = b"SOMLEXI\0"
+SNAPSHOT_VERSION = 3
+
+# Layout (arrays in host byte order, snapshots are rejected on big endian hosts):
+#   labels       node_count bytes
+#   final        node_count bytes
+#   padding      to a multiple of 4
+#   first_child  (node_count + 1) uint32
+#   counts       node_count uint32
+#   best         node_count uint32, highest count in each subtree
+#   alphabet     utf-8
+#   trailer      magic, version, source checksum, node_count, size, alphabet bytes,
+#                source size, source mtime in ns, min_count
+# Labels come first so the mapped file itself can serve label lookups with
+# node ids as offsets. The trailer sits at the end so it can be read last.
+TRAILER = struct.Struct("<8sH32sIIIQqI")
+
+
+class SourceStat(NamedTuple):
+    """Size and modification time of a word list, zero for combined sources"""
+
+    size: int
+    mtime_ns: int
+
+
+def source_stat(path: str = WORDLIST_PATH) -> SourceStat:
+    """Stat of a word list, compared before its checksum is computed"""
+    stat = os.stat(path)
+    return SourceStat(stat.st_size, stat.st_mtime_ns)
+
+
+def snapshot_path(length: int = WORD_LENGTH) -> str:
+    """Snapshot of the words of one length, the default keeps its old name"""
+    if length == WORD_LENGTH:
+        return SNAPSHOT_PATH
+    return f"./src/data/somali_lexicon_{length}.bin"
+
+
+def read_word_counts(path: str = WORDLIST_PATH, length: int = WORD_LENGTH, min_count: int = MIN_COUNT) -> Dict[str, int]:
+    """Reads filtered word counts from n-gram CSV"""
+    word_counts: Dict[str, int] = {}
+    with open(path, mode="r", encoding="utf-8") as file:
+        csv_reader = csv.reader(file)
+        next(csv_reader)  # Skip the header
+        for row in csv_reader:
+            word, count = row
+            count = int(count)
+            if not word.isalpha():
+                continue
+            if len(word) == length and count > min_count:
+                word = word.lower()
+                word_counts[word] = word_counts.get(word, 0) + count
+    return word_counts
+
+
+def source_checksum(path: str = WORDLIST_PATH, length: int = WORD_LENGTH, min_count: int = MIN_COUNT) -> bytes:
+    """Checksum of the CSV contents and the filter applied to it"""
+    return source_checksums(path, lengths=(length,), min_count=min_count)[length]
+
+
+def source_checksums(
+    path: str = WORDLIST_PATH, lengths: Sequence[int] = WORD_LENGTHS, min_count: int = MIN_COUNT
+) -> Dict[int, bytes]:
+    """Checksums of several word lengths in one read of the CSV"""
+    digests = {length: hashlib.sha256(f"{SNAPSHOT_VERSION}:{length}:{min_count}:".encode()) for length in lengths}
+    with open(path, mode="rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            for digest in digests.values():
+                digest.update(block)
+    return {length: digest.digest() for length, digest in digests.items()}
+
+
+def write_snapshot(
+    lexicon: Lexicon,
+    checksum: bytes,
+    path: str = SNAPSHOT_PATH,
+    source: SourceStat = SourceStat(0, 0),
+    min_count: int = MIN_COUNT,
+):
+    """Writes lexicon snapshot atomically"""
+    node_count = lexicon.node_count
+    alphabet = lexicon.alphabet.encode("utf-8")
+    first_child = array("I", lexicon.first_child)
+    counts = array("I", lexicon.counts)
+    best = array("I", lexicon.best)
+    if first_child.itemsize != 4 or sys.byteorder != "little":
+        raise RuntimeError("Snapshots need little endian 4 byte unsigned ints")
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, mode="wb") as file:
+        file.write(bytes(lexicon.labels[:node_count]))
+        file.write(bytes(lexicon.final[:node_count]))
+        file.write(b"\0" * (-2 * node_count % 4))
+        file.write(first_child.tobytes())
+        file.write(counts.tobytes())
+        file.write(best.tobytes())
+        file.write(alphabet)
+        file.write(TRAILER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, checksum, node_count, lexicon.size, len(alphabet),
+            source.size, source.mtime_ns, min_count,
+        ))
+    os.replace(temp_path, path)
+
+
+def load_snapshot(
+    path: str = SNAPSHOT_PATH, checksum: Optional[bytes] = None, source: Optional[SourceStat] = None
+) -> Optional[Lexicon]:
+    """Memory maps snapshot, None if missing, stale or from another version
+
+    With checksum the snapshot must be built from a source with that checksum.
+    With source it must have recorded that stat of the word list, filtered
+    with the default MIN_COUNT.
+    """
+    if sys.byteorder != "little":
+        return None
+    try:
+        with open(path, mode="rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(buffer) < TRAILER.size:
+        buffer.close()
+        return None
+    (
+        magic, version, source_digest, node_count, size, alphabet_length, source_size, source_mtime_ns, min_count
+    ) = TRAILER.unpack_from(buffer, len(buffer) - TRAILER.size)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        buffer.close()
+        return None
+    if checksum is not None and source_digest != checksum:
+        buffer.close()
+        return None
+    recorded = SourceStat(source_size, source_mtime_ns)
+    if source is not None and (recorded.size == 0 or recorded != source or min_count != MIN_COUNT):
+        buffer.close()
+        return None
+    # A truncated or corrupt file would otherwise fail the casts below
+    arrays_size = 2 * node_count + (-2 * node_count % 4) + 4 * (node_count + 1) + 8 * node_count
+    if len(buffer) != arrays_size + alphabet_length + TRAILER.size or size > node_count:
+        buffer.close()
+        return None
+
+    view = memoryview(buffer)
+    offset = 2 * node_count + (-2 * node_count % 4)
+    first_child = view[offset:offset + 4 * (node_count + 1)].cast("I")
+    offset += 4 * (node_count + 1)
+    counts = view[offset:offset + 4 * node_count].cast("I")
+    offset += 4 * node_count
+    best = view[offset:offset + 4 * node_count].cast("I")
+    offset += 4 * node_count
+    alphabet = bytes(view[offset:offset + alphabet_length]).decode("utf-8")
+
+    # The mmap itself is the label array: node ids are its first offsets
+    return Lexicon(alphabet, buffer, first_child, view[node_count:2 * node_count], counts, best, size)
+
+
+def load_lexicon(source: str = WORDLIST_PATH, path: str = SNAPSHOT_PATH, length: int = WORD_LENGTH) -> Lexicon:
+    """Loads snapshot for source, rebuilding it from the CSV when stale"""
+    if not os.path.exists(source):
+        lexicon = load_snapshot(path)
+        if lexicon is None:
+            raise FileNotFoundError(f"Neither {source} nor a snapshot at {path} exist")
+        return lexicon
+
+    # Hashing reads the whole CSV, an unchanged stat makes that unnecessary
+    stat = source_stat(source)
+    lexicon = load_snapshot(path, source=stat)
+    if lexicon is not None:
+        return lexicon
+
+    checksum = source_checksum(source, length=length)
+    lexicon = load_snapshot(path, checksum=checksum)
+    if lexicon is not None:
+        # Same contents with a new stat, e.g. after a fresh checkout, recorded for the next start
+        logger.info("Lexicon snapshot {} matches {}, recording its stat", path, source)
+    else:
+        logger.info("Lexicon snapshot {} missing or stale, parsing {}", path, source)
+        lexicon = Lexicon.from_counts(read_word_counts(source, length=length))
+    try:
+        write_snapshot(lexicon, checksum, path, source=stat)
+    except (OSError, RuntimeError) as error:
+        logger.warning("Could not write lexicon snapshot: {}", error)
+    return lexicon
+
+
+def combined_checksums(
+    paths: Sequence[str], min_count: int = MIN_COUNT, text_min_count: int = TEXT_MIN_COUNT
+) -> Dict[int, bytes]:
+    """Checksums of the sources, the CSV's own when it is the only one"""
+    per_source = [
+        source_checksums(path, min_count=min_count if path.endswith(CSV_SUFFIX) else text_min_count)
+        for path in paths
+    ]
+    if len(per_source) == 1:
+        return per_source[0]
+    return {
+        length: hashlib.sha256(b"".join(checksums[length] for checksums in per_source)).digest()
+        for length in WORD_LENGTHS
+    }
+
+
+def main():
+    """Builds a snapshot per word length from word list dumps"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        "sources", nargs="*", default=[WORDLIST_PATH],
+        help="n-gram CSVs and plain text files; the bot only keeps snapshots of other sources "
+        "when the default CSV is not deployed",
+    )
+    parser.add_argument("--workers", type=int, help="processes counting words, all cores by default")
+    parser.add_argument("--chunk-mb", type=int, default=CHUNK_SIZE >> 20, help="bytes each worker reads at once")
+    parser.add_argument("--min-count", type=int, default=MIN_COUNT, help="n-gram count a CSV row must exceed")
+    parser.add_argument(
+        "--text-min-count", type=int, default=TEXT_MIN_COUNT, help="occurrences a text word must exceed"
+    )
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=1) as hasher:
+        # Hashing reads the files once more, alongside the counting
+        checksums = hasher.submit(combined_checksums, args.sources, args.min_count, args.text_min_count)
+        counts = count_words(
+            args.sources,
+            WORD_LENGTHS,
+            args.min_count,
+            workers=args.workers,
+            chunk_size=args.chunk_mb << 20,
+            text_min_count=args.text_min_count,
+        )
+        checksums = checksums.result()
+    # Only a snapshot of the default CSV alone can be matched by its stat
+    stat = source_stat(WORDLIST_PATH) if args.sources == [WORDLIST_PATH] else SourceStat(0, 0)
+    for length in WORD_LENGTHS:
+        lexicon = Lexicon.from_counts(counts[length])
+        path = snapshot_path(length)
+        write_snapshot(lexicon, checksums[length], path, source=stat, min_count=args.min_count)
+        print(f"Wrote {lexicon.size} words ({lexicon.node_count} nodes) to {path}")
+    print(f"Built in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 """Easier Trie Structure"""
 
-import csv
-import os
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from .lexicon import Lexicon
+from .snapshot import WORD_LENGTH, WORDLIST_PATH, load_lexicon, snapshot_path
 
 
 class TrieNode:
@@ -21,109 +24,61 @@ class TrieNode:
 
 
 class Trie:
-    """Trie Data structure for querying and search"""
-
-    def __init__(self):
-        self.root = {}
-        self.size = 0
-        self._setup()
-
-    def add_word(self, word: str):
+    """Trie Data structure for querying and search
+
+    Words live in a compact :class:`Lexicon`, memory mapped from a snapshot
+    when one matches the word list. Words added one at a time are buffered and
+    merged into the lexicon on the next lookup.
+    """
+
+    def __init__(self, lexicon: Optional[Lexicon] = None, length: int = WORD_LENGTH):
+        self.length = length
+        self._lexicon = Lexicon.from_words([])
+        self._pending: Dict[str, int] = {}
+        if lexicon is None:
+            self._setup()
+        else:
+            self._lexicon = lexicon
+
+    @property
+    def lexicon(self) -> Lexicon:
+        """Compact lexicon with all added words"""
+        if self._pending:
+            word_counts = dict(self._lexicon.items())
+            for word, count in self._pending.items():
+                word_counts[word] = word_counts.get(word, 0) + count
+            self._lexicon = Lexicon.from_counts(word_counts)
+            self._pending = {}
+        return self._lexicon
+
+    @property
+    def size(self) -> int:
+        """Number of words in trie"""
+        return len(self.lexicon)
+
+    def add_word(self, word: str, count: int = 0):
         """adds full word"""
         word = word.lower()
-        if word[0] not in self.root:
-            new_node = TrieNode(word[0])
-            self.root[word[0]] = new_node
-            return self._add_word(word[1:], node=new_node)
-
-        return self._add_word(word[1:], node=self.root[word[0]])
-
-    def _add_word(self, word: str, node: TrieNode):
-        """private add word"""
-        if not word:
-            return None
-
-        if word[0] not in node.children:
-            new_node = TrieNode(word[0])
-            if not word[1:]:
-                new_node.is_final = True
-            node.children[word[0]] = new_node
-            self.size += 1
-            return self._add_word(word[1:], node=new_node)
-        else:
-            return self._add_word(word[1:], node=node.children[word[0]])
+        self._pending[word] = self._pending.get(word, 0) + count
+
+    def add_words(self, words: Iterable[str]):
+        """adds many words at once"""
+        for word in words:
+            self.add_word(word)
 
     def is_valid(self, word: str) -> bool:
         """Searches Trie if word exists"""
-        for letter in word:
-            if letter in self.root:
-                return self._is_valid(word=word[1:], node=self.root[letter])
-        return False
-
-    def _is_valid(self, word: str, node: Optional[TrieNode]):
-        if not word and node.is_final == True:
-            return True
-        elif not node:
-            return False
-
-        if word[0] in node.children:
-            return self._is_valid(word=word[1:], node=node.children[word[0]])
-        return False
-
-    def find_from(self, prefix: str, node: TrieNode) -> List[str]:
-        """Returns all valid words from given prefix"""
-        def dfs(current_node: TrieNode, current_word: str, results: List[str]):
-            if current_node.is_final:
-                results.append(current_word)
-
-            for char, child_node in current_node.children.items():
-                dfs(child_node, current_word + char, results)
-
-        # Find the node corresponding to the last character of the word
-        current_node = node
-        for char in prefix:
-            if char not in current_node.children:
-                return []  # No words with this prefix
-            current_node = current_node.children[char]
-
-        # Perform DFS from this node to find all completions
-        completions = []
-        dfs(current_node, prefix, completions)
-        return completions
+        return self.lexicon.is_valid(word)
 
     def search(self, prefix: str) -> List[str]:
         """Searches all valid words from current prefix"""
-        head_letters = TrieNode(current_value="")
-        head_letters.children = self.root
-        return self.find_from(prefix, head_letters)
+        return self.lexicon.search(prefix)
+
+    def top_k(self, prefix: str, k: int) -> List[str]:
+        """Most frequent k words from current prefix"""
+        return self.lexicon.top_k(prefix, k)
 
     def _setup(self):
-        """Set up Trie using wordlist"""
-        with open("./src/data/somali_ngrams.csv", mode="r", encoding='utf-8') as file:
-            csv_reader = csv.reader(file)
-            next(csv_reader)  # Skip the header
-            for row in csv_reader:
-                word, count = row
-                count = int(count)
-                if not word.isalpha():
-                    continue
-                if len(word) == 5 and count > 500:
-                    self.add_word(word=word)
-                if self.size > 500:
-                    break
-            file.close()
-        print(f"Total size: {self.size}")
-
-    def _setup2(self):
-        """setup words from txt"""
-        with open("./src/data/somali.txt", mode="r", encoding="utf-8") as file:
-            lines = file.readlines()
-            for word in lines:
-                word = word.strip().lower()
-                if word.isalpha() and len(word) == 5:
-                    self.add_word(word=word)
-
-                if self.size > 200:
-                    break
-            file.close()
-        print(f"Total size is: {self.size}")
+        """Set up Trie using snapshot, or the wordlist when it is stale"""
+        self._lexicon = load_lexicon(source=WORDLIST_PATH, path=snapshot_path(self.length), length=self.length)
+        logger.info("Loaded {} words of length {}", self.size, self.length)
@@ -0,0 +1,69 @@
+"""Bounded user cache"""
+
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from .user import User
+
+UserKey = Tuple[int, int]
+
+
+class UserCache:
+    """Size bounded LRU identity map of users keyed by (server_id, user_id).
+
+    Every lookup of a cached player returns the same ``User`` object, so all
+    commands in a round mutate one record. Eviction skips users ``is_dirty``
+    reports as having unsaved changes; those stay until they are written.
+    """
+
+    def __init__(self, max_size: int = 10_000, is_dirty: Optional[Callable[[UserKey], bool]] = None):
+        self.max_size = max_size
+        self.is_dirty = is_dirty or (lambda key: False)
+        self._users: "OrderedDict[UserKey, User]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def get(self, user_id: int, server_id: int) -> Optional[User]:
+        """Cached user, marking it most recently used"""
+        key = (server_id, user_id)
+        user = self._users.get(key)
+        if user is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._users.move_to_end(key)
+        return user
+
+    def put(self, user: User) -> User:
+        """Caches user, returning the already cached object if there is one"""
+        key = (user.server_id, user.id)
+        cached = self._users.get(key)
+        if cached is not None:
+            self._users.move_to_end(key)
+            return cached
+        self._users[key] = user
+        self._evict()
+        return user
+
+    def _evict(self):
+        """Drops least recently used clean users until back under max_size"""
+        # Each user is looked at once, dirty ones are rotated to the back
+        for _ in range(len(self._users)):
+            if len(self._users) <= self.max_size:
+                return
+            key = next(iter(self._users))
+            if self.is_dirty(key):
+                self._users.move_to_end(key)
+                continue
+            del self._users[key]
+            self.evictions += 1
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups served from memory"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
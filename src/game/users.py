@@ -1,70 +1,363 @@
 """User Repository"""
 
+import asyncio
+import functools
 import os
 import sqlite3
-from typing import List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, List, Optional, Sequence, Tuple, TypeVar
 from .user import User
+from .user_cache import UserCache
+from .write_behind import UserRow, WriteBehindBuffer
+
+DB_PATH = "./src/data/wordle.db"
+MEMORY_DB = ":memory:"
+# Dirty users held before a save forces an early flush
+MAX_PENDING_WRITES = 1000
+# Users kept in memory by AsyncUserRepository
+USER_CACHE_SIZE = 10_000
+# 1: users keyed by (server_id, id) with a leaderboard index
+SCHEMA_VERSION = 1
+
+T = TypeVar("T")
+
+
+def database_path() -> str:
+    """Database for current environment"""
+    if os.getenv("ENVIRONMENT") == "testing":
+        return MEMORY_DB
+    return DB_PATH
+
+
+class LeaderboardCache:
+    """Per guild top users, dropped only when a change could reorder them.
+
+    Shared between the connections of one database, so it is guarded by a
+    lock. Each guild has a generation that every invalidation bumps; a read
+    only caches its result if the generation did not move while it ran.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[int, Tuple[int, List[User]]] = {}
+        self._generations: Dict[int, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self, server_id: int) -> int:
+        """Current generation of guild"""
+        with self._lock:
+            return self._generations.get(server_id, 0)
+
+    def get(self, server_id: int, n: int) -> Optional[List[User]]:
+        """Top n users if a large enough list is cached"""
+        with self._lock:
+            entry = self._entries.get(server_id)
+            if entry is None or entry[0] < n:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1][:n]
+
+    def put(self, server_id: int, n: int, users: List[User], generation: int):
+        """Caches top n users read at generation"""
+        with self._lock:
+            if self._generations.get(server_id, 0) == generation:
+                self._entries[server_id] = (n, users)
+
+    def changed(self, rows: Sequence[UserRow]):
+        """Invalidates guilds whose cached top list rows could alter"""
+        with self._lock:
+            for user_id, server_id, name, score, streak in rows:
+                entry = self._entries.get(server_id)
+                if entry is not None and self._affects(entry, user_id, name, score, streak):
+                    del self._entries[server_id]
+                    self._generations[server_id] = self._generations.get(server_id, 0) + 1
+                elif entry is None:
+                    # A read may be in flight for this guild
+                    self._generations[server_id] = self._generations.get(server_id, 0) + 1
+
+    def clear(self):
+        """Drops every cached top list, benchmarks use it to time the database read"""
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def _affects(entry: Tuple[int, List[User]], user_id: int, name: str, score: int, streak: int) -> bool:
+        n, users = entry
+        for user in users:
+            if user.id == user_id:
+                return (user.name, user.score, user.streak) != (name, score, streak)
+        # Not listed yet, it only matters if it would make the cut
+        if len(users) < n:
+            return True
+        lowest = users[-1]
+        return (score, streak) >= (lowest.score, lowest.streak)
 
 
 class UserRepository:
     """Repository for handling user database operations."""
 
-    def __init__(self):
-        env = os.getenv("ENVIRONMENT")
-        if env == "testing":
-            self.conn = sqlite3.connect(":memory:")
-        else:
-            self.conn = sqlite3.connect("./src/data/wordle.db")
+    def __init__(self, path: Optional[str] = None, leaderboard: Optional[LeaderboardCache] = None):
+        self.path = path or database_path()
+        self.leaderboard = leaderboard or LeaderboardCache()
+        self.conn = sqlite3.connect(self.path)
+        if self.path != MEMORY_DB:
+            # WAL lets leaderboard readers run while a guess is being written,
+            # and NORMAL only syncs on checkpoints instead of every commit
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("PRAGMA busy_timeout=5000")
         self.create_table_if_nonexistent()
 
     def get_all_users_sorted(self, server_id: int) -> List[User]:
         """Get all users ordered by score"""
         c = self.conn.cursor()
-        c.execute(f"SELECT * FROM users WHERE server_id = {server_id} ORDER BY score")
-        users = c.fetchall()
-        return users
+        c.execute("SELECT * FROM users WHERE server_id = ? ORDER BY score", (server_id,))
+        return [User(*u) for u in c.fetchall()]
 
     def get_top_n_users_by_score(self, n: int, server_id: int) -> List[User]:
         """Returns top N users by their scores, breaking ties by streak."""
+        cached = self.leaderboard.get(server_id, n)
+        if cached is not None:
+            return cached
+        return self._read_top_n(n, server_id)
+
+    def _read_top_n(self, n: int, server_id: int) -> List[User]:
+        """Reads top N users and caches them"""
+        generation = self.leaderboard.generation(server_id)
         c = self.conn.cursor()
 
-        # Order by score descending, and break ties with streak descending
-        c.execute(f"SELECT * FROM users WHERE server_id = {server_id} ORDER BY score DESC, streak DESC LIMIT {n}")
+        # Order by score descending, and break ties with streak descending.
+        # This is a range read of the users_leaderboard index.
+        c.execute(
+            "SELECT * FROM users WHERE server_id = ? ORDER BY score DESC, streak DESC LIMIT ?",
+            (server_id, n),
+        )
 
         users = [User(*u) for u in c.fetchall()]
+        self.leaderboard.put(server_id, n, users, generation)
         return users
 
     def create_table_if_nonexistent(self):
-        """Creates table if not existent"""
+        """Creates table if not existent, migrating older schemas"""
         c = self.conn.cursor()
+        version = c.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            self._migrate(version)
+
         c.execute(
             """CREATE TABLE IF NOT EXISTS users
-                 (id INTEGER PRIMARY KEY, server_id INTEGER NOT NULL, name TEXT NOT NULL, score INTEGER NOT NULL, streak INTEGER NOT NULL)"""
+                 (id INTEGER NOT NULL, server_id INTEGER NOT NULL, name TEXT NOT NULL, score INTEGER NOT NULL, streak INTEGER NOT NULL,
+                  PRIMARY KEY (server_id, id))"""
         )
+        c.execute(
+            "CREATE INDEX IF NOT EXISTS users_leaderboard ON users (server_id, score DESC, streak DESC)"
+        )
+        c.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
         self.conn.commit()
 
+    def _migrate(self, version: int):
+        """Moves users keyed by id alone to the per guild (server_id, id) key
+
+        The steps and the version bump share one explicit transaction, the
+        sqlite3 module would otherwise commit each schema change on its own.
+        """
+        isolation_level = self.conn.isolation_level
+        self.conn.isolation_level = None
+        c = self.conn.cursor()
+        try:
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                tables = {name for (name,) in c.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+                if version == 0 and "users_v0" in tables:
+                    # Left by an older migration that stopped half way, users is a partial copy
+                    c.execute("DROP TABLE IF EXISTS users")
+                elif version == 0 and "users" in tables:
+                    c.execute("ALTER TABLE users RENAME TO users_v0")
+                if version == 0 and tables & {"users", "users_v0"}:
+                    c.execute(
+                        """CREATE TABLE users
+                             (id INTEGER NOT NULL, server_id INTEGER NOT NULL, name TEXT NOT NULL, score INTEGER NOT NULL, streak INTEGER NOT NULL,
+                              PRIMARY KEY (server_id, id))"""
+                    )
+                    c.execute(
+                        "INSERT INTO users (id, server_id, name, score, streak) SELECT id, server_id, name, score, streak FROM users_v0"
+                    )
+                    c.execute("DROP TABLE users_v0")
+                c.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                c.execute("COMMIT")
+            except BaseException:
+                c.execute("ROLLBACK")
+                raise
+        finally:
+            self.conn.isolation_level = isolation_level
+
     def get_or_create(self, user_id: int, server_id: int, name: str = "unknown") -> User:
         """Get or create a new user in the database."""
         c = self.conn.cursor()
-        c.execute("SELECT * FROM users WHERE id=?", (user_id,))
+        c.execute("SELECT * FROM users WHERE server_id=? AND id=?", (server_id, user_id))
         user_data = c.fetchone()
 
         if user_data:
             return User(*user_data)
         else:
             new_user = User(user_id, server_id, name)
-            c.execute(
-                "INSERT INTO users (id, server_id, name, score, streak) VALUES (?, ?, ?, ?, ?)",
-                (new_user.id, new_user.server_id, new_user.name, new_user.score, new_user.streak),
-            )
+            row = (new_user.id, new_user.server_id, new_user.name, new_user.score, new_user.streak)
+            c.execute("INSERT INTO users (id, server_id, name, score, streak) VALUES (?, ?, ?, ?, ?)", row)
             self.conn.commit()
+            self.leaderboard.changed([row])
             return new_user
 
+    def get(self, user_id: int, server_id: int) -> Optional[User]:
+        """Get user from the database without creating it."""
+        c = self.conn.cursor()
+        c.execute("SELECT * FROM users WHERE server_id=? AND id=?", (server_id, user_id))
+        user_data = c.fetchone()
+        return User(*user_data) if user_data else None
+
     def save(self, user: User):
         """Save user data to the database."""
         c = self.conn.cursor()
         c.execute(
-            "UPDATE users SET server_id=?, name=?, score=?, streak=? WHERE id=?",
-            (user.server_id, user.name, user.score, user.streak, user.id),
+            "UPDATE users SET name=?, score=?, streak=? WHERE server_id=? AND id=?",
+            (user.name, user.score, user.streak, user.server_id, user.id),
         )
         self.conn.commit()
+        self.leaderboard.changed([(user.id, user.server_id, user.name, user.score, user.streak)])
+
+    def save_many(self, rows: Sequence[UserRow]):
+        """Insert or update many (id, server_id, name, score, streak) rows in one transaction."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO users (id, server_id, name, score, streak) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        self.leaderboard.changed(rows)
+
+    def close(self):
+        """Closes database connection"""
+        self.conn.close()
+
+
+class AsyncUserRepository:
+    """Awaitable UserRepository that keeps SQLite off the event loop.
+
+    Writes run on one dedicated thread with its own connection, so they stay
+    ordered. Leaderboard reads use a second thread and connection, which WAL
+    lets proceed while a write is in flight. An in-memory database cannot be
+    shared between connections, so there both sides use the writer.
+
+    With ``write_behind`` saves only mark users dirty; ``flush`` writes them
+    all in one transaction and should be called periodically, on round change
+    and on shutdown (``close`` flushes too).
+
+    Users are served from a bounded LRU identity map, so active players do
+    not cost a query per command and all commands share one ``User`` object.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        write_behind: bool = True,
+        cache_size: int = USER_CACHE_SIZE,
+        timer: Optional[Callable[[str], ContextManager]] = None,
+    ):
+        self.path = path or database_path()
+        # Records the per command calls, like metrics.timer
+        self.timer = timer or (lambda name: nullcontext())
+        self.pending: Optional[WriteBehindBuffer] = WriteBehindBuffer() if write_behind else None
+        self.cache = UserCache(
+            max_size=cache_size, is_dirty=self.pending.is_dirty if self.pending is not None else None
+        )
+        # Both connections share one cache so writes invalidate what reads cached
+        self.leaderboard = LeaderboardCache()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="users-writer")
+        self._write_repo: UserRepository = self._writer.submit(UserRepository, self.path, self.leaderboard).result()
+        if self.path == MEMORY_DB:
+            self._reader, self._read_repo = self._writer, self._write_repo
+        else:
+            self._reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="users-reader")
+            self._read_repo = self._reader.submit(UserRepository, self.path, self.leaderboard).result()
+
+    async def _run(self, executor: ThreadPoolExecutor, func: Callable[..., T], *args, **kwargs) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+    async def get_or_create(self, user_id: int, server_id: int, name: str = "unknown") -> User:
+        """Get or create a new user in the database."""
+        with self.timer("db.get_or_create"):
+            return await self._get_or_create(user_id, server_id, name)
+
+    async def _get_or_create(self, user_id: int, server_id: int, name: str) -> User:
+        user = self.cache.get(user_id, server_id)
+        if user is not None:
+            return user
+
+        if self.pending is None:
+            user = await self._run(self._writer, self._write_repo.get_or_create, user_id, server_id, name)
+            return self.cache.put(user)
+
+        user = self.pending.get(user_id, server_id)
+        if user is None:
+            user = await self._run(self._reader, self._read_repo.get, user_id, server_id)
+            # Another command may have created the user while we were reading
+            user = self.pending.get(user_id, server_id) or user
+        if user is None:
+            user = User(user_id, server_id, name)
+            self.pending.mark_dirty(user)
+        return self.cache.put(user)
+
+    async def save(self, user: User):
+        """Save user data to the database."""
+        with self.timer("db.save"):
+            await self._save(user)
+
+    async def _save(self, user: User):
+        if self.pending is None:
+            await self._run(self._writer, self._write_repo.save, user)
+            return
+        self.pending.mark_dirty(user)
+        if len(self.pending) >= MAX_PENDING_WRITES:
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Writes all dirty users in one transaction, returns rows written"""
+        if self.pending is None:
+            return 0
+        users, rows = self.pending.drain()
+        if not rows:
+            return 0
+        try:
+            await self._run(self._writer, self._write_repo.save_many, rows)
+        except Exception:
+            self.pending.restore(users)
+            raise
+        self.pending.written(users, rows)
+        return len(rows)
+
+    async def get_top_n_users_by_score(self, n: int, server_id: int) -> List[User]:
+        """Returns top N users by their scores, breaking ties by streak."""
+        cached = self.leaderboard.get(server_id, n)
+        if cached is not None:
+            return cached
+        return await self._run(self._reader, self._read_repo._read_top_n, n, server_id)
+
+    async def get_all_users_sorted(self, server_id: int) -> List[User]:
+        """Get all users ordered by score"""
+        return await self._run(self._reader, self._read_repo.get_all_users_sorted, server_id)
+
+    def close(self):
+        """Flushes dirty users, closes connections and stops the workers"""
+        if self.pending is not None:
+            users, rows = self.pending.drain()
+            if rows:
+                self._writer.submit(self._write_repo.save_many, rows).result()
+                self.pending.written(users, rows)
+        if self._reader is not self._writer:
+            self._reader.submit(self._read_repo.close).result()
+            self._reader.shutdown()
+        self._writer.submit(self._write_repo.close).result()
+        self._writer.shutdown()
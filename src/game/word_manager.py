@@ -1,35 +1,183 @@
 """Word manager using Trie structure"""
-import random
-from typing import List
+import threading
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, List, Optional, Sequence
+
+from .answer_pool import AnswerPool
+from .feedback import PatternMatrix, score_guess
+from .fuzzy import SUGGESTION_LIMIT, DeletionIndex
+from .hints import GUESS_POOL_SIZE, HintEngine
+from .lexicon import Lexicon
+from .snapshot import WORD_LENGTH, WORD_LENGTHS
 from .trie import Trie
 
+# Discord accepts at most 25 autocomplete choices
+AUTOCOMPLETE_LIMIT = 25
+
+PATTERNS_PATH = "./src/data/patterns.npy"
+# Larger vocabularies compute pattern rows on demand instead of a full matrix
+FULL_MATRIX_WORDS = 6000
+# Rows kept for them, the hint pool plus room for the guesses players make
+PATTERN_ROWS = GUESS_POOL_SIZE + 256
+
+
+def patterns_path(length: int) -> str:
+    """Pattern matrix cache of one word length, the default keeps its old name"""
+    if length == WORD_LENGTH:
+        return PATTERNS_PATH
+    return f"./src/data/patterns_{length}.npy"
+
+
+class WordPartition:
+    """Lexicon of one word length with its answer pool, patterns and hints"""
+
+    def __init__(self, trie: Trie, length: int, exclusion_window: int = 30):
+        self.trie = trie
+        self.length = length
+        self.exclusion_window = exclusion_window
+        self._answers: AnswerPool = None
+        self._answers_lexicon: Lexicon = None
+        self._patterns: PatternMatrix = None
+        self._patterns_lexicon: Lexicon = None
+        self._hints: HintEngine = None
+        self._suggestions: DeletionIndex = None
+        self._suggestions_lexicon: Lexicon = None
+
+    @property
+    def answers(self) -> AnswerPool:
+        """Answer pool over the current lexicon"""
+        lexicon = self.trie.lexicon
+        if self._answers_lexicon is not lexicon:
+            self._answers = AnswerPool(lexicon.items(), exclusion_window=self.exclusion_window)
+            self._answers_lexicon = lexicon
+        return self._answers
+
+    @property
+    def patterns(self) -> PatternMatrix:
+        """Guess x answer feedback patterns over the current lexicon"""
+        lexicon = self.trie.lexicon
+        if self._patterns_lexicon is not lexicon:
+            words = self.answers.words
+            path = patterns_path(self.length) if len(words) <= FULL_MATRIX_WORDS else None
+            self._patterns = PatternMatrix.cached(words, words, path, max_rows=PATTERN_ROWS)
+            self._patterns_lexicon = lexicon
+            self._hints = None
+        return self._patterns
+
+    @property
+    def hints(self) -> HintEngine:
+        """Hint engine over the current patterns"""
+        patterns = self.patterns
+        if self._hints is None:
+            weights = self.answers.weights
+            pool = sorted(range(len(weights)), key=weights.__getitem__, reverse=True)
+            self._hints = HintEngine(patterns, pool=pool[:GUESS_POOL_SIZE])
+        return self._hints
+
+    def pattern(self, guess: str, answer: str) -> int:
+        """Feedback pattern from the pattern matrix once it is built, scored otherwise"""
+        patterns = self._patterns
+        if patterns is None or self._patterns_lexicon is not self.trie.lexicon:
+            # Building the matrix is warm-up work, never done for one guess
+            return score_guess(guess, answer)
+        return patterns.lookup(guess, answer, compute=False)
+
+    @property
+    def suggestions(self) -> DeletionIndex:
+        """Deletion index of the current lexicon for close matches"""
+        lexicon = self.trie.lexicon
+        if self._suggestions_lexicon is not lexicon:
+            self._suggestions = DeletionIndex(lexicon.items())
+            self._suggestions_lexicon = lexicon
+        return self._suggestions
+
 
 class WordleManager:
-    """Wordle Manager"""
+    """Wordle Manager
+
+    Words are partitioned by length. A partition is only loaded the first
+    time its length is played, and every lookup touches only the partition
+    of its word's length.
+    """
 
-    def __init__(self):
-        self.trie = Trie()
+    def __init__(
+        self,
+        exclusion_window: int = 30,
+        trie: Optional[Trie] = None,
+        load: bool = True,
+        lengths: Sequence[int] = WORD_LENGTHS,
+        timer: Optional[Callable[[str], ContextManager]] = None,
+    ):
+        self.exclusion_window = exclusion_window
+        # Records lookups the game makes deep inside a guess, like metrics.timer
+        self.timer = timer or (lambda name: nullcontext())
+        self.lengths = tuple(lengths)
+        self.partitions: Dict[int, WordPartition] = {}
+        self._lock = threading.Lock()
+        if trie is not None:
+            self.partitions[trie.length] = WordPartition(trie, trie.length, exclusion_window)
+        elif load:
+            self.load()
 
-    def get_random_word(self):
-        """Gets random word from Trie structure"""
-        nodes = list(self.trie.root.values())
-        count = 5
-        output = ""
-        while count > 0:
-            val = random.sample(population=nodes, k=1)[0]
-            output += val.value
-            nodes = list(val.children.values())
+    @property
+    def trie(self) -> Optional[Trie]:
+        """Trie of the default word length, None until loaded"""
+        partition = self.partitions.get(WORD_LENGTH)
+        return partition.trie if partition is not None else None
 
-            count -= 1
-        return output
+    @property
+    def loaded(self) -> bool:
+        """Whether the default word length is loaded"""
+        return WORD_LENGTH in self.partitions
 
+    def load(self):
+        """Loads the default word length, once"""
+        self.partition(WORD_LENGTH)
+
+    def partition(self, length: int) -> WordPartition:
+        """Words of length, loaded on first use"""
+        partition = self.partitions.get(length)
+        if partition is not None:
+            return partition
+        if length not in self.lengths:
+            raise ValueError(f"Word length must be one of {self.lengths}, got {length}")
+        # Loading is slow, the lock keeps two callers from loading one length twice
+        with self._lock:
+            partition = self.partitions.get(length)
+            if partition is None:
+                partition = WordPartition(Trie(length=length), length, self.exclusion_window)
+                self.partitions[length] = partition
+        return partition
+
+    def get_random_word(self, length: int = WORD_LENGTH) -> str:
+        """Gets frequency weighted word not used in recent rounds"""
+        return self.partition(length).answers.sample()
 
     def is_valid_word(self, word: str) -> bool:
         """Checks if word in true"""
-        return self.trie.is_valid(word=word)
-    
-    def autocomplete(self, prefix: str) -> List[str]:
-        """Autocomplete from given prefix through trie"""
-        return self.trie.search(prefix)
+        if len(word) not in self.lengths:
+            return False
+        with self.timer("trie.validate"):
+            return self.partition(len(word)).trie.is_valid(word=word)
+
+    def hints(self, length: int = WORD_LENGTH) -> HintEngine:
+        """Hint engine for words of length"""
+        return self.partition(length).hints
+
+    def pattern(self, guess: str, answer: str) -> int:
+        """Feedback pattern of guess against an answer of the same length"""
+        partition = self.partitions.get(len(answer))
+        if partition is None:
+            return score_guess(guess, answer)
+        return partition.pattern(guess, answer)
 
+    def suggest(self, word: str, limit: int = SUGGESTION_LIMIT) -> List[str]:
+        """Valid words closest to an unknown word of a played length"""
+        word = word.lower().strip()
+        if len(word) not in self.lengths:
+            return []
+        return self.partition(len(word)).suggestions.lookup(word, limit=limit)
 
+    def autocomplete(self, prefix: str, limit: int = AUTOCOMPLETE_LIMIT, length: int = WORD_LENGTH) -> List[str]:
+        """Most frequent completions from given prefix through trie"""
+        return self.partition(length).trie.top_k(prefix.lower().strip(), k=limit)
@@ -1,8 +1,18 @@
 """WordleGame"""
+import time
+from dataclasses import dataclass
 from enum import Enum, auto
-from typing import Dict, List
+from typing import Dict, Optional
 
-from .users import UserRepository
+from loguru import logger
+
+from .events import GuessEventStore
+from .hints import Hint
+from .journal import RoundJournal, RoundState
+from .modes import GuildModes
+from .sessions import GuildSession, SessionManager, UserGuess
+from .snapshot import WORD_LENGTH
+from .users import AsyncUserRepository, UserRepository
 from .word_manager import WordleManager
 from .user import User
 
@@ -18,50 +28,134 @@ class GuessResult(Enum):
     INVALID_WORD = auto()
 
 
-class UserGuess:
-    """Holds data for guesses of wordle for current word"""
-    def __init__(self, user_id: int):
-        self.user_id = user_id
-        self.guesses = []
-        self.completed = False
-
-    def remaining_attempts(self) -> int:
-        """Remaining attempts for user guesses"""
-        if self.completed:
-            return 0
+# Results of a guess that was recorded and needs the user saved
+SCORED_RESULTS = (GuessResult.CORRECT, GuessResult.FAILED, GuessResult.INCORRECT)
 
-        return 6 - len(self.guesses)
 
-    def finished(self) -> bool:
-        """Returns if user guesses are done"""
-        return self.completed or self.remaining_attempts() == 0
+@dataclass(frozen=True)
+class GuessOutcome:
+    """Everything needed to answer a guess, gathered while applying it"""
 
-    def attempts(self) -> int:
-        """Gets current attempt count"""
-        return len(self.guesses)
-    
-    def last_guess(self) -> str:
-        """Returns last guessed word"""
-        return self.guesses[-1]
+    result: GuessResult
+    # Normalized guess
+    guess: str
+    answer: str
+    word_length: int
+    attempts: int
+    max_attempts: int
+    # Feedback pattern of the guess, None when it was not recorded
+    pattern: Optional[int]
+    # Copy of the user right after the guess
+    user: User
 
+    @property
+    def recorded(self) -> bool:
+        """Whether the guess counted as an attempt and changed the user"""
+        return self.result in SCORED_RESULTS
 
 
 class WordleGame:
     """Base Wordle Game (unassociated to discord)"""
 
-    def __init__(self, word_manager: WordleManager):
+    def __init__(
+        self,
+        word_manager: WordleManager,
+        async_repo: Optional[AsyncUserRepository] = None,
+        journal: Optional[RoundJournal] = None,
+        events: Optional[GuessEventStore] = None,
+        modes: Optional[GuildModes] = None,
+    ):
         self.word_manager = word_manager
-        self.user_repo = UserRepository()
-        self.guess_word = ""
-        self.guesses: Dict[int, Dict[int, UserGuess]] = {}
-        self.max_attempts = 6
-        self.new_word()
+        # The bot awaits async_repo, the synchronous repo is for offline use
+        self.async_repo = async_repo
+        self.user_repo = UserRepository() if async_repo is None else None
+        self.modes = modes or GuildModes(path=None)
+        # Answer of every word length played this round
+        self.answers: Dict[int, str] = {}
+        self.round_id = 0
+        # Behaves like Dict[int, Dict[int, UserGuess]], sharded per guild
+        self.guesses = SessionManager(word_length=self.modes.get)
+        self.journal = journal
+        self.events = events
+        if journal is not None and journal.recovered is not None:
+            self.restore_round(journal.recovered)
+        else:
+            self.new_word()
         self.attempt_weight = {1: 10, 2: 7, 3: 5, 4: 3, 5: 2, 6: 1}
 
+    @property
+    def guess_word(self) -> str:
+        """Answer of the default word length"""
+        return self.answers.get(WORD_LENGTH, "")
+
+    @guess_word.setter
+    def guess_word(self, word: str):
+        self.answers[WORD_LENGTH] = word
+
+    def answer(self, length: int) -> str:
+        """Answer for words of length this round, drawn on first use"""
+        word = self.answers.get(length)
+        if word is None:
+            word = self.word_manager.get_random_word(length)
+            self.answers[length] = word
+            if self.journal is not None:
+                self.journal.record_answer(length=length, word=word)
+            if self.events is not None:
+                self.events.record_answer(round_id=self.round_id, word=word)
+        return word
+
+    def word_length(self, server_id: Optional[int]) -> int:
+        """Word length guild plays this round"""
+        session = self.guesses.get(server_id)
+        return session.word_length if session is not None else self.modes.get(server_id)
+
+    def answer_for(self, server_id: int) -> str:
+        """Answer guild is guessing this round"""
+        return self.answer(self.word_length(server_id))
+
     def new_word(self):
         """Gets new word from word manager"""
-        self.guess_word = self.word_manager.get_random_word()
-        print("word is", self.guess_word)
+        self.answers = {WORD_LENGTH: self.word_manager.get_random_word()}
+        # Monotonic, two rounds started within a second must not share an id. The
+        # journal persists the last id, so it also holds across restarts
+        self.round_id = max(int(time.time()), self.round_id + 1)
+        if self.journal is not None:
+            self.journal.start_round(round_id=self.round_id, word=self.guess_word)
+        if self.events is not None:
+            self.events.start_round(round_id=self.round_id, word=self.guess_word)
+        logger.info("New word for round {}", self.round_id)
+
+    def restore_round(self, state: RoundState):
+        """Resumes a journaled round after a restart"""
+        self.answers = {**state.answers, WORD_LENGTH: state.word}
+        self.round_id = state.round_id
+        for server_id, user_id, guess in state.guesses:
+            # Guesses have the length the guild played, whatever its mode is now
+            user_guess = self.guesses.shard(server_id, word_length=len(guess)).player(user_id)
+            answer = self.answer(len(guess))
+            user_guess.guesses.append(guess)
+            user_guess.patterns.append(self.word_manager.pattern(guess, answer))
+            if guess == answer:
+                user_guess.completed = True
+        if self.events is not None:
+            self.events.start_round(round_id=self.round_id, word=self.guess_word)
+            for word in state.answers.values():
+                self.events.record_answer(round_id=self.round_id, word=word)
+        logger.info("Resumed round {} with {} guesses", self.round_id, len(state.guesses))
+
+    def round_state(self) -> RoundState:
+        """Current round as a journal snapshot"""
+        return RoundState(
+            round_id=self.round_id,
+            word=self.guess_word,
+            answers={length: word for length, word in self.answers.items() if length != WORD_LENGTH},
+            guesses=[
+                (server_id, user_id, guess)
+                for server_id, session in self.guesses.items()
+                for user_id, user_guess in session.items()
+                for guess in user_guess.guesses
+            ],
+        )
 
     def is_valid(self, word):
         """Is word valid"""
@@ -72,93 +166,126 @@ class WordleGame:
 
     def reset_game(self):
         """Resets the game"""
-        self.guess_word = ""
-        self.guesses = {}
+        self.answers = {}
+        self.guesses.clear()
         self.new_word()
 
-    def add_user_guess(self, user_id: int, server_id: int, guess: str):
-        """Adds new guess to user guess"""
-        self.guesses[server_id][user_id].guesses.append(guess)
-
-    def guess(self, user_id: int, server_id: int, name: str, word_guess: str) -> GuessResult:
+    def add_user_guess(self, user_guess: UserGuess, server_id: int, guess: str, answer: str) -> int:
+        """Adds new guess and its feedback pattern to user guess, returns the pattern"""
+        pattern = self.word_manager.pattern(guess, answer)
+        user_guess.guesses.append(guess)
+        user_guess.patterns.append(pattern)
+        if self.events is not None:
+            self.events.record(
+                round_id=self.round_id,
+                server_id=server_id,
+                user_id=user_guess.user_id,
+                guess=guess,
+                pattern=pattern,
+                attempt=len(user_guess.guesses),
+                solved=guess == answer,
+            )
+        if self.journal is not None:
+            # Compacted by the cog's flush tick, never on the guess path
+            self.journal.record_guess(server_id=server_id, user_id=user_guess.user_id, guess=guess)
+        return pattern
+
+    def guess(self, user_id: int, server_id: int, name: str, word_guess: str) -> GuessOutcome:
         """Sets new guess"""
         user = self.user_repo.get_or_create(user_id=user_id, server_id=server_id, name=name)
-
+        outcome = self.apply_guess(user=user, server_id=server_id, word_guess=word_guess)
+        if outcome.recorded:
+            self.user_repo.save(user)
+        return outcome
+
+    async def guess_async(self, user_id: int, server_id: int, name: str, word_guess: str) -> GuessOutcome:
+        """Sets new guess, awaiting the database instead of blocking on it"""
+        if self.async_repo is None:
+            return self.guess(user_id=user_id, server_id=server_id, name=name, word_guess=word_guess)
+
+        # Commands of one guild are applied in order, other guilds never wait
+        async with self.guesses.shard(server_id).lock:
+            user = await self.async_repo.get_or_create(user_id=user_id, server_id=server_id, name=name)
+            outcome = self.apply_guess(user=user, server_id=server_id, word_guess=word_guess)
+            if outcome.recorded:
+                await self.async_repo.save(user)
+        return outcome
+
+    def apply_guess(self, user: User, server_id: int, word_guess: str) -> GuessOutcome:
+        """Checks guess and updates game state and user score in memory, in one pass"""
         # process user input
         word_guess = word_guess.lower().strip()
-
-        # Validate user action for guess is valid
-        is_invalid = self.validate_action(guess_word=word_guess, user_id=user_id, server_id=server_id)
-        if is_invalid:
-            return is_invalid
-
-        # Add user if not already existing in guess table
-        if server_id not in self.guesses:
-            self.guesses[server_id] = {}
-        
-        if user_id not in self.guesses[server_id]:
-            self.guesses[server_id][user_id] = UserGuess(user_id=user_id)
-
-        if not self.word_manager.is_valid_word(word_guess):
-            return GuessResult.UNKNOWN_WORD
-
-        if len(word_guess) != 5:
-            return GuessResult.INVALID_WORD
-
-        self.add_user_guess(user_id=user_id,server_id=server_id, guess=word_guess)
-
-        result: GuessResult = None
-
-        if word_guess == self.guess_word:
-            self.guesses[server_id][user_id].completed = True
-            self.gain_score(user=user)
-            user.streak += 1
-            result = GuessResult.CORRECT
-        elif self.guesses[server_id][user_id].finished():
-            user.streak = 0
-            self.lose_score(user=user)
-            result = GuessResult.FAILED
+        session = self.guesses.shard(server_id)
+        answer = self.answer(session.word_length)
+
+        result = self.validate_action(guess_word=word_guess, user_id=user.id, session=session)
+        pattern = None
+        if result is None:
+            user_guess = session.player(user.id)
+            pattern = self.add_user_guess(user_guess=user_guess, server_id=server_id, guess=word_guess, answer=answer)
+            attempts = user_guess.attempts()
+            if word_guess == answer:
+                user_guess.completed = True
+                self.gain_score(user=user, attempts=attempts)
+                user.streak += 1
+                result = GuessResult.CORRECT
+            elif user_guess.finished():
+                user.streak = 0
+                self.lose_score(user=user, attempts=attempts)
+                result = GuessResult.FAILED
+            else:
+                result = GuessResult.INCORRECT
         else:
-            result = GuessResult.INCORRECT
-
-        self.user_repo.save(user)
-        return result
-
-    def gain_score(self, user: User):
+            user_guess = session.get(user.id)
+            attempts = user_guess.attempts() if user_guess is not None else 0
+
+        return GuessOutcome(
+            result=result,
+            guess=word_guess,
+            answer=answer,
+            word_length=session.word_length,
+            attempts=attempts,
+            max_attempts=session.max_attempts,
+            pattern=pattern,
+            user=User(user.id, user.server_id, user.name, score=user.score, streak=user.streak),
+        )
+
+    def get_hint(self, user_id: int, server_id: int) -> Optional[Hint]:
+        """Most informative next guess for the user's current guesses"""
+        hints = self.word_manager.hints(self.word_length(server_id))
+        user_guess = self.guesses.get(server_id, {}).get(user_id)
+        if user_guess is None:
+            return hints.suggest(guesses=[], patterns=[])
+        if user_guess.finished():
+            return None
+        # Copies, the event loop keeps appending guesses while this runs on a thread
+        return hints.suggest(guesses=tuple(user_guess.guesses), patterns=tuple(user_guess.patterns))
+
+    def gain_score(self, user: User, attempts: int):
         """Calculates the gain from correct guess"""
-        attempt_number = self.guesses[user.server_id][user.id].attempts()
-
-        if attempt_number > len(self.attempt_weight):
-            attempt_number = len(self.attempt_weight)
-
+        attempt_number = min(attempts, len(self.attempt_weight))
         gained_score = self.attempt_weight[attempt_number]
 
         streak_bonus = user.streak * 2
         total_score = gained_score + streak_bonus
-        print('gained score', total_score)
+        logger.debug("User {} gained {} points", user.id, total_score)
         user.score += total_score
 
-    def lose_score(self, user: User):
+    def lose_score(self, user: User, attempts: int):
         """Penalise the user for incorrect guesses"""
-        attempt_number = self.guesses[user.server_id][user.id].attempts()
-
-        penalty = min(attempt_number, 5)
+        penalty = min(attempts, 5)
         user.score = max(user.score - penalty, 0)
 
-    def validate_action(self, guess_word: str, user_id: int, server_id: int) -> GuessResult:
-        """Validates the guess word"""
-
-        if server_id not in self.guesses:
-            self.guesses[server_id] = {}
-        if user_id not in self.guesses[server_id]:
-            self.guesses[server_id][user_id] = UserGuess(user_id=user_id)
+    def validate_action(self, guess_word: str, user_id: int, session: GuildSession) -> Optional[GuessResult]:
+        """Why the guess cannot be played, None when it can"""
+        # Checked first so a wrong length never loads another partition
+        if len(guess_word) != session.word_length:
+            return GuessResult.INVALID_WORD
 
         if not self.word_manager.is_valid_word(guess_word):
             return GuessResult.UNKNOWN_WORD
 
-        if len(guess_word) != 5:
-            return GuessResult.INVALID_WORD
-
-        if self.guesses[server_id][user_id].finished():
+        user_guess = session.get(user_id)
+        if user_guess is not None and user_guess.finished():
             return GuessResult.MAX_ATTEMPTS
         return None
@@ -0,0 +1,69 @@
+"""Write-behind buffer for user records"""
+
+from typing import Dict, List, Optional, Tuple
+
+from .user import User
+
+UserKey = Tuple[int, int]
+UserRow = Tuple[int, int, str, int, int]
+
+
+class WriteBehindBuffer:
+    """Dirty users waiting to be written.
+
+    Saving a user only records it here, keyed by (server_id, user_id), so
+    several updates to one user between flushes become a single row write.
+    ``drain`` hands back the users and rows to persist and ``restore`` puts
+    the users back if the write failed.
+    """
+
+    def __init__(self):
+        self._dirty: Dict[UserKey, User] = {}
+        # Drained users stay readable until their write lands
+        self._flushing: Dict[UserKey, User] = {}
+        self.updates = 0
+        self.rows_written = 0
+        self.flushes = 0
+
+    def __len__(self) -> int:
+        return len(self._dirty)
+
+    def mark_dirty(self, user: User):
+        """Queues user to be written on next flush"""
+        self._dirty[(user.server_id, user.id)] = user
+        self.updates += 1
+
+    def get(self, user_id: int, server_id: int) -> Optional[User]:
+        """Unflushed user, so reads see their own writes"""
+        key = (server_id, user_id)
+        return self._dirty.get(key) or self._flushing.get(key)
+
+    def is_dirty(self, key: UserKey) -> bool:
+        """Whether user has changes not yet written"""
+        return key in self._dirty or key in self._flushing
+
+    def drain(self) -> Tuple[Dict[UserKey, User], List[UserRow]]:
+        """Takes all dirty users and the rows to write for them"""
+        dirty, self._dirty = self._dirty, {}
+        self._flushing.update(dirty)
+        # Copy values now, the User objects keep changing on the event loop
+        rows = [(user.id, user.server_id, user.name, user.score, user.streak) for user in dirty.values()]
+        return dirty, rows
+
+    def restore(self, users: Dict[UserKey, User]):
+        """Requeues users of a failed flush unless marked dirty again since"""
+        for key, user in users.items():
+            self._flushing.pop(key, None)
+            self._dirty.setdefault(key, user)
+
+    def written(self, users: Dict[UserKey, User], rows: List[UserRow]):
+        """Records a successful flush"""
+        for key in users:
+            self._flushing.pop(key, None)
+        self.flushes += 1
+        self.rows_written += len(rows)
+
+    @property
+    def coalesced(self) -> int:
+        """Updates absorbed without their own row write"""
+        return self.updates - self.rows_written - len(self._dirty) - len(self._flushing)
@@ -3,13 +3,18 @@
 
 
 import discord
+from utils.metrics import metrics
 from utils.word_manager_instance import word_manager
 
 async def word_autocompletes(ctx: discord.AutocompleteContext):
     """Gets autocomplete words"""
     search = ctx.options['guess']
-    if not search:
+    cog = ctx.cog
+    # Nothing to complete from until the cog has warmed up
+    if not search or cog is None or not cog.ready.is_set():
         return []
-    words = word_manager.autocomplete(ctx.options['guess'])
+    length = cog.game.word_length(ctx.interaction.guild_id)
+    with metrics.timer("autocomplete"):
+        words = word_manager.autocomplete(search, length=length)
 
     return words
\ No newline at end of file
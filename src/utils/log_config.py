@@ -1,40 +1,100 @@
 """Loguru configurations"""
 
-from loguru import logger
 import os
+import random
+import sys
+import time
+from typing import Dict, Optional
+
+from loguru import logger
+
+LOG_DIRECTORY = "data/logs"
+# Event types with their own JSON log file, records without a type go to app.log
+EVENT_LOGS = {"general": "general.log", "join": "join_info.log", "wordle_guess": "wordle_guesses.log"}
+# Share of records kept for high volume event types
+SAMPLE_RATES: Dict[str, float] = {"wordle_guess": 0.1}
+ROTATION_BYTES = 20 * 1024 * 1024
+ROTATION_SECONDS = 24 * 60 * 60
+RETENTION = "14 days"
+
+_configured = False
+_sample_rates: Dict[str, float] = dict(SAMPLE_RATES)
+
+
+class SizeOrTimeRotation:
+    """Rotates a log file once it is too large or too old"""
+
+    def __init__(self, max_bytes: int = ROTATION_BYTES, max_seconds: float = ROTATION_SECONDS):
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.opened = time.time()
+
+    def __call__(self, message, file) -> bool:
+        now = time.time()
+        if file.tell() + len(message) > self.max_bytes or now - self.opened > self.max_seconds:
+            self.opened = now
+            return True
+        return False
+
+
+class EventFilter:
+    """Passes records of the given event types"""
+
+    def __init__(self, *event_types: Optional[str]):
+        self.event_types = frozenset(event_types)
+
+    def __call__(self, record) -> bool:
+        return record["extra"].get("type") in self.event_types
+
+
+def sampled(event_type: str) -> bool:
+    """Whether to log this event, checked before a record is built"""
+    rate = _sample_rates.get(event_type)
+    return rate is None or random.random() < rate
+
+
+def add_file_sink(path: str, record_filter: EventFilter, level: str = "INFO"):
+    """JSON lines sink written from a background thread"""
+    logger.add(
+        path,
+        filter=record_filter,
+        level=level,
+        # Records are handed to a queue, the writing thread does the file I/O
+        enqueue=True,
+        serialize=True,
+        rotation=SizeOrTimeRotation(),
+        retention=RETENTION,
+        compression="gz",
+    )
 
 
 # Centralized logging configuration
-def configure_logging():
-    """Centralized logging configuration"""
+def configure_logging(log_directory: str = LOG_DIRECTORY, sample_rates: Optional[Dict[str, float]] = None):
+    """Centralized logging configuration, later calls are no-ops"""
+    global _configured, _sample_rates
+    if _configured:
+        return
+    _configured = True
+    _sample_rates = dict(SAMPLE_RATES if sample_rates is None else sample_rates)
+
     # Ensure the log directory exists
-    log_directory = "data/logs"
     os.makedirs(log_directory, exist_ok=True)
 
     # Remove the default logger to avoid duplicating logs
     logger.remove()
 
-    # Logger for general events
-    logger.add(
-        f"{log_directory}/general.log",
-        filter=lambda record: record["extra"].get("type") == "general",
-        level="INFO",
-    )
-
-    # Logger for join events
-    logger.add(
-        f"{log_directory}/join_info.log",
-        filter=lambda record: record["extra"].get("type") == "join",
-        level="INFO",
-    )
-
-    # Logger for wordle game guesses
-    logger.add(
-        f"{log_directory}/wordle_guesses.log",
-        filter=lambda record: record["extra"].get("type") == "wordle_guess",
-        level="INFO",
-    )
+    # Console shows application records and general events, not per guess ones
+    logger.add(sys.stderr, filter=EventFilter(None, "general"), level="INFO", enqueue=True)
+    add_file_sink(f"{log_directory}/app.log", EventFilter(None))
+    for event_type, file_name in EVENT_LOGS.items():
+        add_file_sink(
+            f"{log_directory}/{file_name}",
+            EventFilter(event_type),
+        )
 
 
-# Call this to set up loggers when the bot starts
-configure_logging()
+def shutdown_logging():
+    """Writes out queued records and stops the sink threads"""
+    global _configured
+    logger.remove()
+    _configured = False
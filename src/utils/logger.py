@@ -1,10 +1,12 @@
 """Logging code"""
 from loguru import logger
 
-from utils.log_config import configure_logging
+from utils.log_config import configure_logging, sampled
 
 def log_event(event_type, message, **kwargs):
-    """Log event (basic)"""
+    """Log event (basic), high volume types are sampled"""
+    if not sampled(event_type):
+        return
     logger.bind(type=event_type).info(message, **kwargs)
 
 def log_join_event(user_id):
@@ -12,8 +14,10 @@ def log_join_event(user_id):
     log_event("join", f"User {user_id} joined the server.")
 
 def log_wordle_guess(user_id, guess):
-    """Logs wordle guesses"""
-    log_event("wordle_guess", f"User {user_id} guessed '{guess}' in Wordle.")
+    """Logs wordle guesses, the message is only built for sampled guesses"""
+    if not sampled("wordle_guess"):
+        return
+    logger.bind(type="wordle_guess").info("User {} guessed '{}' in Wordle.", user_id, guess)
 
 def log_general_event(event_description):
     """Logs general events"""
@@ -0,0 +1,186 @@
+"""Latency histograms"""
+
+import asyncio
+import functools
+import math
+import os
+import time
+from array import array
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+# Sub-buckets per power of two are 2 ** (SUB_BUCKET_BITS - 1), about 3% resolution
+SUB_BUCKET_BITS = 6
+# Largest tracked value is 2 ** MAX_VALUE_BITS microseconds, about 12 days
+MAX_VALUE_BITS = 40
+PERCENTILES = (0.5, 0.95, 0.99)
+PROMETHEUS_METRIC = "wordle_latency_seconds"
+
+
+class Histogram:
+    """Log-linear histogram of durations, in the style of HdrHistogram.
+
+    Values are stored as whole microseconds in buckets whose width grows with
+    the value, so every bucket has the same relative error and recording is a
+    couple of integer operations on a fixed array.
+    """
+
+    __slots__ = ("sub_bits", "counts", "count", "total", "max")
+
+    def __init__(self, sub_bucket_bits: int = SUB_BUCKET_BITS, max_value_bits: int = MAX_VALUE_BITS):
+        self.sub_bits = sub_bucket_bits
+        buckets = (max_value_bits - sub_bucket_bits + 2) << (sub_bucket_bits - 1)
+        self.counts = array("Q", bytes(8 * buckets))
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def _index(self, micros: int) -> int:
+        exponent = micros.bit_length() - self.sub_bits
+        if exponent <= 0:
+            return micros
+        return (exponent << (self.sub_bits - 1)) + (micros >> exponent)
+
+    def _upper(self, index: int) -> int:
+        """Largest microsecond value falling in bucket index"""
+        half = 1 << (self.sub_bits - 1)
+        if index < 2 * half:
+            return index
+        exponent = (index >> (self.sub_bits - 1)) - 1
+        mantissa = index - (exponent << (self.sub_bits - 1))
+        return ((mantissa + 1) << exponent) - 1
+
+    def record(self, seconds: float):
+        """Adds one duration"""
+        index = min(self._index(int(seconds * 1e6)), len(self.counts) - 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """Duration in seconds at or below which a share q of values fall"""
+        return self.percentiles((q,))[0]
+
+    def percentiles(self, qs) -> List[float]:
+        """Several percentiles in one pass over the buckets, qs ascending"""
+        if not self.count:
+            return [0.0] * len(qs)
+        ranks = [max(1, math.ceil(q * self.count)) for q in qs]
+        results: List[float] = []
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            if not bucket:
+                continue
+            seen += bucket
+            while len(results) < len(ranks) and seen >= ranks[len(results)]:
+                results.append(min(self._upper(index) / 1e6, self.max))
+            if len(results) == len(ranks):
+                break
+        return results + [self.max] * (len(ranks) - len(results))
+
+
+class Summary(NamedTuple):
+    """Percentiles of one stage in seconds"""
+
+    name: str
+    count: int
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+
+class Timer:
+    """Context manager recording its duration into a histogram"""
+
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.record(time.perf_counter() - self.started)
+
+
+class Metrics:
+    """Histograms by stage name, e.g. ``command.wordle`` or ``db.flush``"""
+
+    def __init__(self):
+        self.histograms: Dict[str, Histogram] = {}
+
+    def histogram(self, name: str) -> Histogram:
+        """Histogram of stage, created on first use"""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = Histogram()
+            self.histograms[name] = histogram
+        return histogram
+
+    def observe(self, name: str, seconds: float):
+        """Records a duration measured elsewhere"""
+        self.histogram(name).record(seconds)
+
+    def timer(self, name: str) -> Timer:
+        """``with metrics.timer("stage"):`` records the block's duration"""
+        return Timer(self.histogram(name))
+
+    def timed(self, name: str) -> Callable:
+        """Decorator recording every call of a function or coroutine function"""
+        def decorator(func):
+            histogram = self.histogram(name)
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with Timer(histogram):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with Timer(histogram):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def summaries(self) -> List[Summary]:
+        """Percentiles of every stage, by name"""
+        return [
+            Summary(name, histogram.count, *histogram.percentiles(PERCENTILES), histogram.max)
+            for name, histogram in sorted(self.histograms.items())
+        ]
+
+    def prometheus(self) -> str:
+        """Every histogram as a Prometheus summary in text format"""
+        lines = [f"# TYPE {PROMETHEUS_METRIC} summary"]
+        for name, histogram in sorted(self.histograms.items()):
+            for q, value in zip(PERCENTILES, histogram.percentiles(PERCENTILES)):
+                lines.append(f'{PROMETHEUS_METRIC}{{stage="{name}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'{PROMETHEUS_METRIC}_sum{{stage="{name}"}} {histogram.total:.6f}')
+            lines.append(f'{PROMETHEUS_METRIC}_count{{stage="{name}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Writes the text format file, for node_exporter's textfile collector"""
+        write_textfile(path, self.prometheus())
+
+
+def write_textfile(path: str, text: str):
+    """Replaces file atomically so scrapers never read it half written"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, mode="w", encoding="utf-8") as file:
+        file.write(text)
+    os.replace(temp_path, path)
+
+
+def prometheus_path() -> Optional[str]:
+    """Prometheus text file to write, if configured"""
+    return os.getenv("PROMETHEUS_TEXTFILE")
+
+
+# Shared by the bot, cogs and utils
+metrics = Metrics()
@@ -0,0 +1,71 @@
+"""Rate limiting helpers"""
+
+import asyncio
+import time
+from typing import Callable, Dict, Hashable, Iterable
+
+
+class TokenBucket:
+    """Allows ``rate`` acquisitions per second with bursts up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> bool:
+        """Takes a token if one is available"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def delay(self) -> float:
+        """Seconds until a token is available"""
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    async def acquire(self):
+        """Waits for a token"""
+        while not self.try_acquire():
+            await asyncio.sleep(self.delay())
+
+
+class BucketMap:
+    """Token buckets created on demand per route, sharing one global bucket"""
+
+    def __init__(self, global_bucket: TokenBucket, route_rate: float, route_capacity: float):
+        self.global_bucket = global_bucket
+        self.route_rate = route_rate
+        self.route_capacity = route_capacity
+        self._routes: Dict[Hashable, TokenBucket] = {}
+
+    def route(self, key: Hashable) -> TokenBucket:
+        """Bucket of route key"""
+        bucket = self._routes.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.route_rate, self.route_capacity, clock=self.global_bucket.clock)
+            self._routes[key] = bucket
+        return bucket
+
+    async def acquire(self, key: Hashable):
+        """Waits for a token of the route and then of the global bucket"""
+        await self.route(key).acquire()
+        await self.global_bucket.acquire()
+
+    def clear(self):
+        """Drops route buckets, full buckets hold no state worth keeping"""
+        self._routes.clear()
+
+    def discard(self, keys: Iterable[Hashable]):
+        """Drops the buckets of routes that are done sending"""
+        for key in keys:
+            self._routes.pop(key, None)
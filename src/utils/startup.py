@@ -0,0 +1,74 @@
+"""Startup timeline"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, NamedTuple, Optional
+
+from loguru import logger
+
+
+class Phase(NamedTuple):
+    """One startup phase, in seconds since the timeline began"""
+
+    name: str
+    started: float
+    duration: Optional[float]
+
+
+class StartupTimeline:
+    """Start and end of startup phases, which may overlap.
+
+    Phases end on the event loop and on warm-up threads alike. Once every
+    milestone phase has ended the whole timeline is logged once.
+    """
+
+    def __init__(self, *milestones: str):
+        self.began = time.perf_counter()
+        self.milestones = set(milestones)
+        self._phases: Dict[str, Phase] = {}
+        self._lock = threading.Lock()
+        self._reported = False
+
+    def begin(self, name: str):
+        """Marks the start of a phase"""
+        with self._lock:
+            self._phases[name] = Phase(name, time.perf_counter() - self.began, None)
+
+    def end(self, name: str):
+        """Marks the end of a phase, begun now if it never was"""
+        with self._lock:
+            now = time.perf_counter() - self.began
+            started = self._phases[name].started if name in self._phases else now
+            self._phases[name] = Phase(name, started, now - started)
+            done = not self._reported and all(
+                milestone in self._phases and self._phases[milestone].duration is not None
+                for milestone in self.milestones
+            )
+            if done:
+                self._reported = True
+        logger.debug("Startup phase {} took {:.3f}s", name, now - started)
+        if done:
+            logger.info("Startup finished in {:.3f}s\n{}", now, self.report())
+
+    @contextmanager
+    def phase(self, name: str):
+        """``with timeline.phase("lexicon"):`` records the block as a phase"""
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    def phases(self) -> List[Phase]:
+        """Phases in the order they began"""
+        with self._lock:
+            return sorted(self._phases.values(), key=lambda phase: phase.started)
+
+    def report(self) -> str:
+        """Start offset and duration of every phase"""
+        lines = []
+        for phase in self.phases():
+            duration = "running" if phase.duration is None else f"{phase.duration:.3f}s"
+            lines.append(f"  {phase.name:<12} +{phase.started:.3f}s  {duration}")
+        return "\n".join(lines)
@@ -1,4 +1,7 @@
 from game.word_manager import WordleManager
+from utils.metrics import metrics
 
 
-word_manager = WordleManager()
+# Loaded by the cog's warm-up so importing this never blocks startup, validation
+# runs deep inside the game so the manager times it
+word_manager = WordleManager(load=False, timer=metrics.timer)
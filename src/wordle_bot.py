@@ -1,8 +1,14 @@
 """Discord related Cog"""
 
+from typing import List, Optional
+
 import discord
+from loguru import logger
+from bot.broadcast import Broadcaster
 from utils.word_manager_instance import word_manager
-from utils.logger import log_event
+from utils.logger import log_event, log_general_event
+from utils.log_config import shutdown_logging
+from utils.startup import StartupTimeline
 
 
 class WordleBot(discord.Bot):
@@ -13,26 +19,41 @@ class WordleBot(discord.Bot):
         intents.members = True
         intents.message_content = True
         super().__init__(intents=intents)
+        # Logged once the gateway is ready and the cog has warmed up
+        self.startup = StartupTimeline("gateway", "warm_up")
         self.word_game = word_manager
+        self.broadcaster = Broadcaster()
+        self._announced_online = False
 
     async def setup_hook(self):
         """Cog Hooks"""
         # Load cogs
         await self.load_extension("src.bot.cogs.wordle")
-        print("Wordle cog loaded")
+        logger.info("Wordle cog loaded")
+
+    async def start(self, *args, **kwargs):
+        """Connects to the gateway while cogs warm up in the background"""
+        self.startup.begin("gateway")
+        await super().start(*args, **kwargs)
+
+    async def close(self):
+        """Unloads cogs so pending writes are flushed before disconnecting"""
+        for name in list(self.cogs):
+            self.remove_cog(name)
+        await super().close()
+        shutdown_logging()
 
     async def on_ready(self):
         """On Ready details"""
-        print(f"{self.user} has connected to Discord!")
-        print(f"Bot is in {len(self.guilds)} guilds.")
-        for guild in self.guilds:
-            for channel in guild.text_channels:
-                await guild.get_channel(channel.id).send('Hello! I am back online!')
-                break
-    
-    async def new_word_notification(self, old_word: str):
+        log_general_event(f"{self.user} has connected to Discord, in {len(self.guilds)} guilds")
+        # on_ready fires again after reconnects, announce once per start
+        if not self._announced_online:
+            self._announced_online = True
+            self.startup.end("gateway")
+            await self.broadcaster.broadcast(self.guilds, "Hello! I am back online!")
+
+    async def new_word_notification(self, old_word: str, guilds: Optional[List[discord.Guild]] = None):
         """Announce the old word for all channels that the bot is in!"""
-        print('sending new word notificaiton', old_word)
         if old_word:
             notification_message = (
                 f"🚨 The old word for Somali Wordle was: **{old_word}** 🚨"
@@ -42,16 +63,7 @@ class WordleBot(discord.Bot):
                 "🚨 No previous word to announce yet! 🚨"
             )
         
-        for guild in self.guilds:
-            for channel in guild.text_channels:
-                try:
-                    await guild.get_channel(channel.id).send(notification_message)
-                    break
-                except Exception as e:
-                    print(f"Failed to send message to channel {channel.id} in guild {guild.id}: {e}")
-                    # Optionally, log or handle the exception
-
-
+        await self.broadcaster.broadcast(self.guilds if guilds is None else guilds, notification_message)
 
     async def on_guild_join(self, guild: discord.Guild):
         """On guild join"""
@@ -71,4 +83,4 @@ class WordleBot(discord.Bot):
 
     async def on_message(self, message: discord.Message):
         """on message on guild"""
-        print('message is', message.content)
\ No newline at end of file
+        logger.trace("Message {} in channel {}", message.id, message.channel.id)
\ No newline at end of file
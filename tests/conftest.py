@@ -0,0 +1,19 @@
+import os
+import sys
+import tempfile
+
+# Bot modules import game, bot and utils as top level packages, like the running bot
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+try:
+    from utils.log_config import configure_logging, shutdown_logging
+except ImportError:
+    configure_logging = shutdown_logging = None
+else:
+    # Importing bot modules configures logging, keep its files out of the checkout
+    configure_logging(log_directory=tempfile.mkdtemp(prefix="wordle-logs-"))
+
+
+def pytest_unconfigure(config):
+    if shutdown_logging is not None:
+        shutdown_logging()
@@ -0,0 +1,33 @@
+import random
+import time
+from collections import Counter
+
+from src.game.answer_pool import AnswerPool
+
+
+def test_sample_follows_weights():
+    """Draw frequencies follow corpus counts."""
+    pool = AnswerPool([("aqoon", 1), ("baro", 9)], exclusion_window=0, rng=random.Random(7))
+    draws = Counter(pool.sample() for _ in range(10_000))
+    assert 0.85 < draws["baro"] / 10_000 < 0.95
+    assert pool.times_used[1] == draws["baro"]
+
+
+def test_recent_words_are_excluded():
+    """No word repeats within the exclusion window."""
+    pool = AnswerPool([(str(i), i + 1) for i in range(20)], exclusion_window=5, rng=random.Random(3))
+    draws = [pool.sample() for _ in range(500)]
+    for i, word in enumerate(draws):
+        assert word not in draws[max(0, i - 5):i]
+
+
+def test_draws_update_in_place():
+    """Draws only move weight in and out of the tree, never rebuild it."""
+    pool = AnswerPool([(f"w{i}", i % 7 + 1) for i in range(200_000)], exclusion_window=30, rng=random.Random(5))
+    tree = pool._tree
+    started = time.perf_counter()
+    for _ in range(2_000):
+        pool.sample()
+    assert time.perf_counter() - started < 1.0
+    assert pool._tree is tree
+    assert pool.total == sum(pool.weights) - sum(pool.weights[i] for i in pool.recent)
@@ -0,0 +1,191 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+discord = pytest.importorskip("discord")
+
+from bot import broadcast  # noqa: E402
+from bot.broadcast import Broadcaster, ChannelCache, DirectMessenger  # noqa: E402
+from utils.rate_limit import BucketMap, TokenBucket  # noqa: E402
+
+
+class VirtualTime:
+    """Clock of the token buckets, advanced by sleeping instead of waiting."""
+
+    def __init__(self, sleep):
+        self.now = 0.0
+        self.sleeps = []
+        self._sleep = sleep
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.sleeps.append(delay)
+        # Like a real timer, a wake-up takes at least a tick, or rounding could stall the clock
+        self.now += max(delay, 1e-6)
+        await self._sleep(0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = VirtualTime(asyncio.sleep)
+    # Token buckets and retries sleep on the same virtual clock
+    monkeypatch.setattr(asyncio, "sleep", clock.sleep)
+    return clock
+
+
+def broadcaster_on(clock, tmp_path, **kwargs):
+    broadcaster = Broadcaster(ChannelCache(str(tmp_path / "channels.json")), **kwargs)
+    broadcaster.buckets = BucketMap(
+        TokenBucket(rate=broadcast.GLOBAL_RATE, capacity=broadcast.GLOBAL_RATE, clock=clock),
+        route_rate=broadcast.CHANNEL_RATE,
+        route_capacity=broadcast.CHANNEL_BURST,
+    )
+    return broadcaster
+
+
+def http_error(status, retry_after=None):
+    error = discord.HTTPException(SimpleNamespace(status=status, reason="error"), "error")
+    if retry_after is not None:
+        error.retry_after = retry_after
+    return error
+
+
+class Channel:
+    """Text channel double, raising the queued errors before it accepts a send."""
+
+    def __init__(self, channel_id, *errors, clock=None):
+        self.id = channel_id
+        self.errors = list(errors)
+        self.clock = clock
+        self.sent = []
+
+    async def send(self, content):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((content, self.clock() if self.clock else None))
+
+    def permissions_for(self, member):
+        return SimpleNamespace(send_messages=True)
+
+
+def guild(guild_id, *channels):
+    return SimpleNamespace(
+        id=guild_id,
+        text_channels=list(channels),
+        system_channel=None,
+        me=None,
+        get_channel=lambda channel_id: next((c for c in channels if c.id == channel_id), None),
+    )
+
+
+def test_accepting_channel_is_cached(tmp_path, clock):
+    """The first channel that accepts is remembered, later broadcasts go straight to it."""
+    forbidden = Channel(1, discord.Forbidden(SimpleNamespace(status=403, reason="forbidden"), "forbidden"))
+    accepting = Channel(2)
+    broadcaster = broadcaster_on(clock, tmp_path)
+    cache = broadcaster.channel_cache
+
+    first = asyncio.run(broadcaster.broadcast([guild(10, forbidden, accepting)], "hello"))
+    assert (first.sent, first.failed, first.probes) == (1, 0, 2)
+    assert ChannelCache(cache.path).get(10) == 2
+
+    second = asyncio.run(broadcaster.broadcast([guild(10, forbidden, accepting)], "again"))
+    assert (second.sent, second.probes) == (1, 0)
+    assert [content for content, _ in accepting.sent] == ["hello", "again"]
+    assert list(broadcaster.history) == [first, second]
+
+
+def test_rate_limited_send_is_retried(tmp_path, clock):
+    """A 429 is retried after its retry_after, failures give up after max_retries."""
+    slow = Channel(1, http_error(429, retry_after=2.5), clock=clock)
+    broken = Channel(2, *(http_error(500) for _ in range(3)))
+    broadcaster = broadcaster_on(clock, tmp_path, max_retries=2)
+
+    metrics = asyncio.run(broadcaster.broadcast([guild(10, slow), guild(20, broken)], "hello"))
+    assert (metrics.sent, metrics.failed, metrics.retries) == (1, 1, 3)
+    assert 2.5 in clock.sleeps
+    assert slow.sent[0][1] >= 2.5
+    assert broken.sent == []
+
+
+def test_sends_are_paced_by_global_and_channel_buckets(tmp_path, clock):
+    """Beyond their bursts, guilds are sent to at the global rate and a channel at its own."""
+    channels = [Channel(index, clock=clock) for index in range(100)]
+    broadcaster = broadcaster_on(clock, tmp_path)
+
+    metrics = asyncio.run(broadcaster.broadcast([guild(index, channel) for index, channel in enumerate(channels)], "hi"))
+    assert metrics.sent == 100
+    times = sorted(sent_at for channel in channels for _, sent_at in channel.sent)
+    for index, sent_at in enumerate(times):
+        assert sent_at >= (index + 1 - broadcast.GLOBAL_RATE) / broadcast.GLOBAL_RATE - 1e-9
+
+    # A fresh global bucket, so only the channel's own one holds sends back
+    broadcaster = broadcaster_on(clock, tmp_path)
+    shared = Channel(1, clock=clock)
+    asyncio.run(broadcaster.broadcast([guild(index, shared) for index in range(broadcast.CHANNEL_BURST + 2)], "hi"))
+    times = [sent_at for _, sent_at in shared.sent]
+    assert times[-1] - times[0] >= 2 / broadcast.CHANNEL_RATE - 1e-9
+
+
+def test_finished_broadcast_keeps_other_routes(tmp_path, clock):
+    """Only the channels of the finished broadcast drop their buckets."""
+    broadcaster = broadcaster_on(clock, tmp_path)
+    busy = broadcaster.buckets.route(99)
+    busy.try_acquire()
+
+    asyncio.run(broadcaster.broadcast([guild(10, Channel(1))], "hello"))
+    assert broadcaster.buckets.route(99) is busy
+
+
+class DMUser:
+    """User double whose DM channel is opened on demand."""
+
+    def __init__(self, user_id, *errors, open_dm=True):
+        self.id = user_id
+        self.dm_channel = Channel(user_id, *errors) if open_dm else None
+        self.opened = 0
+        self.errors = errors
+
+    async def create_dm(self):
+        self.opened += 1
+        self.dm_channel = Channel(self.id, *self.errors)
+        return self.dm_channel
+
+
+class Client:
+    """Client double with a user cache and a fetch_user fallback."""
+
+    def __init__(self, cached, remote):
+        self.cached = {user.id: user for user in cached}
+        self.remote = {user.id: user for user in remote}
+        self.fetched = []
+
+    def get_user(self, user_id):
+        return self.cached.get(user_id)
+
+    async def fetch_user(self, user_id):
+        self.fetched.append(user_id)
+        if user_id not in self.remote:
+            raise discord.NotFound(SimpleNamespace(status=404, reason="not found"), "unknown user")
+        return self.remote[user_id]
+
+
+def test_dms_fetch_missing_users_and_isolate_failures(clock):
+    """Cached users are not fetched, and one failing user does not stop the others."""
+    cached = DMUser(1)
+    remote = DMUser(2, open_dm=False)
+    blocked = DMUser(3, discord.Forbidden(SimpleNamespace(status=403, reason="forbidden"), "blocked"))
+    client = Client(cached=[cached, blocked], remote=[remote])
+    bucket = TokenBucket(rate=broadcast.GLOBAL_RATE, capacity=broadcast.GLOBAL_RATE, clock=clock)
+    messenger = DirectMessenger(client, global_bucket=bucket)
+
+    metrics = asyncio.run(messenger.send_all([1, 2, 3, 4], "The word was aqoon."))
+    assert (metrics.targets, metrics.sent, metrics.failed, metrics.probes) == (4, 2, 2, 2)
+    assert sorted(client.fetched) == [2, 4]
+    assert cached.dm_channel.sent == [("The word was aqoon.", None)]
+    assert remote.opened == 1 and remote.dm_channel.sent == [("The word was aqoon.", None)]
+    # Two fetches, one DM channel opened and three send attempts
+    assert broadcast.GLOBAL_RATE - bucket.tokens == pytest.approx(6)
@@ -0,0 +1,187 @@
+import asyncio
+import os
+import sqlite3
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("discord")
+
+from bot.broadcast import Broadcaster, ChannelCache  # noqa: E402
+from bot.cogs import wordle as wordle_cog  # noqa: E402
+from bot.cogs.wordle import WordleCog  # noqa: E402
+from game.lexicon import Lexicon  # noqa: E402
+from game.trie import Trie  # noqa: E402
+from game.word_manager import WordleManager  # noqa: E402
+from utils.startup import StartupTimeline  # noqa: E402
+
+WORDS = {"aqoon": 900, "baaro": 700, "nabad": 500, "qabow": 300, "dhaqo": 200, "furan": 100}
+
+
+@pytest.fixture
+def bot(tmp_path, monkeypatch):
+    """Bot double with a small lexicon, storage goes to a scratch directory."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ENVIRONMENT", "testing")
+    os.makedirs("src/data")
+    manager = WordleManager(trie=Trie(lexicon=Lexicon.from_counts(WORDS)))
+    announcements = []
+
+    async def new_word_notification(old_word, guilds=None):
+        announcements.append(old_word)
+
+    return SimpleNamespace(
+        word_game=manager,
+        broadcaster=Broadcaster(ChannelCache(str(tmp_path / "channels.json"))),
+        startup=StartupTimeline("warm_up"),
+        guilds=[],
+        announcements=announcements,
+        new_word_notification=new_word_notification,
+    )
+
+
+class Context:
+    """Application context double recording responses."""
+
+    def __init__(self, user_id=1, guild_id=10):
+        self.author = SimpleNamespace(id=user_id, name="player")
+        self.guild = SimpleNamespace(id=guild_id)
+        self.responses = []
+
+    async def respond(self, content=None, **kwargs):
+        self.responses.append(content)
+
+
+async def warmed_up(cog: WordleCog) -> WordleCog:
+    """Waits until warm-up opened the gate or gave up."""
+    for _ in range(500):
+        if cog.ready.is_set() or cog.warm_up_failed:
+            return cog
+        await asyncio.sleep(0.01)
+    raise AssertionError("Warm-up did not finish")
+
+
+def test_new_round_survives_failed_flush_and_broadcast(bot):
+    """A failing flush or announcement is logged, the round still changes."""
+
+    async def run():
+        cog = await warmed_up(WordleCog(bot))
+        try:
+            round_id = cog.game.round_id
+
+            async def locked():
+                raise sqlite3.OperationalError("database is locked")
+
+            async def unreachable(old_word, guilds=None):
+                raise ConnectionError("gateway gone")
+
+            cog.user_repo.flush = locked
+            bot.new_word_notification = unreachable
+            bot.guilds = [SimpleNamespace(id=10)]
+            await cog.start_new_round()
+            assert cog.game.round_id > round_id
+        finally:
+            cog.cog_unload()
+
+    asyncio.run(run())
+
+
+def test_commands_before_warm_up_get_the_warming_up_reply(bot, monkeypatch):
+    """Commands answer right away while warm-up runs, and are served once it is done."""
+    release = threading.Event()
+    warm_up = WordleCog._warm_up
+
+    def blocked(self, startup):
+        release.wait(5)
+        warm_up(self, startup)
+
+    monkeypatch.setattr(WordleCog, "_warm_up", blocked)
+
+    async def run():
+        cog = WordleCog(bot)
+        try:
+            ctx = Context()
+            await asyncio.wait_for(cog.play_wordle.callback(cog, ctx, "aqoon"), timeout=1)
+            await asyncio.wait_for(cog.wordle_hint.callback(cog, ctx), timeout=1)
+            assert ctx.responses == [wordle_cog.WARMING_UP_MESSAGE] * 2
+            assert not cog.ready.is_set()
+
+            release.set()
+            await warmed_up(cog)
+            assert cog.ready.is_set()
+            assert not await cog.warming_up(ctx)
+        finally:
+            release.set()
+            cog.cog_unload()
+
+    asyncio.run(run())
+
+
+def test_failed_warm_up_is_retried(bot, monkeypatch):
+    """A failing warm-up is tried again, and the gate opens once it succeeds."""
+    attempts = []
+    warm_up = WordleCog._warm_up
+
+    def flaky(self, startup):
+        attempts.append(len(attempts))
+        if len(attempts) == 1:
+            raise OSError("disk not mounted yet")
+        warm_up(self, startup)
+
+    monkeypatch.setattr(WordleCog, "_warm_up", flaky)
+    monkeypatch.setattr(wordle_cog, "WARM_UP_BACKOFF_SECONDS", 0)
+
+    async def run():
+        cog = await warmed_up(WordleCog(bot))
+        cog.cog_unload()
+        return cog
+
+    cog = asyncio.run(run())
+    assert len(attempts) == 2
+    assert cog.ready.is_set() and not cog.warm_up_failed
+
+
+def test_warm_up_gives_up_after_its_attempts(bot, monkeypatch):
+    """Once every attempt failed, commands are told the game is unavailable."""
+    attempts = []
+
+    def broken(self, startup):
+        attempts.append(len(attempts))
+        raise OSError("disk gone")
+
+    monkeypatch.setattr(WordleCog, "_warm_up", broken)
+    monkeypatch.setattr(wordle_cog, "WARM_UP_BACKOFF_SECONDS", 0)
+
+    async def run():
+        cog = await warmed_up(WordleCog(bot))
+        try:
+            ctx = Context()
+            await cog.play_wordle.callback(cog, ctx, "aqoon")
+            return cog, ctx
+        finally:
+            cog.cog_unload()
+
+    cog, ctx = asyncio.run(run())
+    assert len(attempts) == wordle_cog.WARM_UP_ATTEMPTS
+    assert cog.warm_up_failed and not cog.ready.is_set()
+    assert ctx.responses == [wordle_cog.WARM_UP_FAILED_MESSAGE]
+
+
+def test_rules_show_the_length_of_the_guild(bot):
+    """The rules name the word length and attempts the guild plays this round."""
+
+    async def run():
+        cog = await warmed_up(WordleCog(bot))
+        try:
+            cog.modes.set(10, 6)
+            contexts = [Context(guild_id=10), Context(guild_id=20)]
+            for ctx in contexts:
+                await cog.wordle_rules.callback(cog, ctx)
+            return [ctx.responses[0] for ctx in contexts]
+        finally:
+            cog.cog_unload()
+
+    six, five = asyncio.run(run())
+    assert "You have 7 attempts to guess this round's 6-letter word." in six
+    assert "You have 6 attempts to guess this round's 5-letter word." in five
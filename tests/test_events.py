@@ -0,0 +1,49 @@
+import asyncio
+
+from src.game.events import GuessEventStore
+
+
+def test_round_and_word_stats(tmp_path):
+    """Aggregates cover buffered and written events across rounds."""
+    async def scenario():
+        store = GuessEventStore(str(tmp_path / "events.db"), batch_size=2)
+        try:
+            store.start_round(round_id=1, word="aqoon")
+            store.record(1, server_id=10, user_id=1, guess="baaro", pattern=0, attempt=1, solved=False)
+            store.record(1, server_id=10, user_id=1, guess="aqoon", pattern=242, attempt=2, solved=True)
+            store.record(1, server_id=20, user_id=2, guess="nabad", pattern=0, attempt=1, solved=False)
+            store.start_round(round_id=2, word="aqoon")
+            store.record(2, server_id=10, user_id=1, guess="aqoon", pattern=242, attempt=1, solved=True)
+            return (
+                await store.round_stats(1),
+                await store.round_stats(1, server_id=20),
+                await store.word_stats("aqoon"),
+                await store.attempt_distribution(1),
+            )
+        finally:
+            store.close()
+
+    round_stats, guild_stats, word_stats, distribution = asyncio.run(scenario())
+    assert (round_stats.players, round_stats.guesses, round_stats.solved) == (2, 3, 1)
+    assert round_stats.solve_rate == 0.5 and round_stats.average_attempts == 2
+    assert (guild_stats.players, guild_stats.solved) == (1, 0)
+    assert (word_stats.rounds, word_stats.players, word_stats.solved) == (2, 3, 2)
+    assert distribution == {2: 1}
+
+
+def test_word_stats_only_count_guesses_of_its_length(tmp_path):
+    """Guilds playing other lengths in the same round do not mix into a word's stats."""
+    async def scenario():
+        store = GuessEventStore(str(tmp_path / "events.db"))
+        try:
+            store.start_round(round_id=1, word="aqoon")
+            store.record_answer(round_id=1, word="aqoonta")
+            store.record(1, server_id=10, user_id=1, guess="aqoon", pattern=242, attempt=1, solved=True)
+            store.record(1, server_id=20, user_id=2, guess="baraare", pattern=0, attempt=1, solved=False)
+            return await store.word_stats("aqoon"), await store.word_stats("aqoonta")
+        finally:
+            store.close()
+
+    five, seven = asyncio.run(scenario())
+    assert (five.rounds, five.players, five.solved) == (1, 1, 1)
+    assert (seven.rounds, seven.players, seven.solved) == (1, 1, 0)
@@ -0,0 +1,33 @@
+import itertools
+
+from src.game.feedback import PatternMatrix, pattern_visual, score_guess, solved_pattern
+
+
+def test_duplicate_letters():
+    """Repeated letters are only yellow while unmatched copies remain."""
+    assert pattern_visual(score_guess("speed", "abide"), 5) == "⬛⬛🟨⬛🟨"
+    assert pattern_visual(score_guess("eerie", "abide"), 5) == "⬛⬛⬛🟨🟩"
+    assert pattern_visual(score_guess("array", "rarer"), 5) == "🟨🟨🟩⬛⬛"
+
+
+def test_solved_pattern():
+    """Guessing the answer is all green."""
+    assert score_guess("aqoon", "aqoon") == solved_pattern(5)
+
+
+def test_matrix_matches_scorer():
+    """Matrix rows agree with the single pair scorer."""
+    words = ["aqoon", "baaro", "roobo", "ooman", "nabad", "aabba"]
+    matrix = PatternMatrix(words, words)
+    for guess, answer in itertools.product(words, words):
+        assert matrix.lookup(guess, answer) == score_guess(guess, answer)
+
+
+def test_lookup_without_compute_keeps_rows():
+    """Lookups that may not compute rows score the pair and cache nothing."""
+    words = ["aqoon", "baaro", "roobo", "ooman", "nabad", "aabba"]
+    matrix = PatternMatrix(words, words)
+    assert matrix.lookup("baaro", "nabad", compute=False) == score_guess("baaro", "nabad")
+    assert not matrix._rows
+    matrix.row(1)
+    assert matrix.lookup("baaro", "nabad", compute=False) == score_guess("baaro", "nabad")
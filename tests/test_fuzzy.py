@@ -0,0 +1,36 @@
+import random
+
+from src.game.fuzzy import DeletionIndex, edit_distance
+
+WORD_COUNTS = [("aqoon", 900), ("aqaan", 40), ("baaro", 300), ("baari", 700), ("nabad", 50), ("qabow", 10)]
+
+
+def test_edit_distance():
+    """Substitutions, insertions, deletions and adjacent swaps cost one edit."""
+    assert edit_distance("baaro", "baaro") == 0
+    assert edit_distance("baaro", "baari") == 1
+    assert edit_distance("baaro", "abaro") == 1
+    assert edit_distance("baaro", "baro") == 1
+    assert edit_distance("aqoon", "aqaan") == 2
+    assert edit_distance("aqoon", "nabad") == 3
+
+
+def test_lookup_orders_by_distance_then_count():
+    """Closer words come first, more frequent ones among equals."""
+    index = DeletionIndex(WORD_COUNTS)
+    assert index.lookup("baaru") == ["baari", "baaro"]
+    assert index.lookup("aqoan") == ["aqoon", "aqaan"]
+    assert index.lookup("qaobw") == ["qabow"]
+    assert index.lookup("zzzzz") == []
+    assert index.lookup("baaro", limit=1) == ["baari"]
+
+
+def test_lookup_matches_brute_force():
+    """The index finds every word a full scan within two edits finds."""
+    rng = random.Random(7)
+    words = {"".join(rng.choice("abdnoqr") for _ in range(5)) for _ in range(300)}
+    index = DeletionIndex((word, 0) for word in words)
+    for _ in range(100):
+        query = "".join(rng.choice("abdnoqr") for _ in range(5))
+        expected = {word for word in words if word != query and edit_distance(query, word) <= 2}
+        assert set(index.lookup(query, limit=len(words))) == expected
@@ -0,0 +1,26 @@
+from src.game.feedback import PatternMatrix, score_guess
+from src.game.hints import HintEngine
+
+WORDS = ["aqoon", "baaro", "roobo", "ooman", "nabad", "aabba", "daaro", "qabow"]
+
+
+def test_hint_narrows_to_answer():
+    """Following hints always ends on the answer."""
+    engine = HintEngine(PatternMatrix(WORDS, WORDS))
+    for answer in WORDS:
+        guesses, patterns = [], []
+        for _ in range(len(WORDS)):
+            hint = engine.suggest(guesses, patterns)
+            guesses.append(hint.word)
+            patterns.append(score_guess(hint.word, answer))
+            if hint.word == answer:
+                break
+        assert guesses[-1] == answer
+
+
+def test_hints_are_memoized_by_state():
+    """Guess order does not change the cached state."""
+    engine = HintEngine(PatternMatrix(WORDS, WORDS))
+    first = engine.suggest(["aqoon", "nabad"], [score_guess("aqoon", "qabow"), score_guess("nabad", "qabow")])
+    second = engine.suggest(["nabad", "aqoon"], [score_guess("nabad", "qabow"), score_guess("aqoon", "qabow")])
+    assert first is second
@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from src.game.ingest import Chunk, count_words, read_chunk, split_file
+from src.game.snapshot import WORD_LENGTHS, read_word_counts
+
+MIN_COUNT = 50
+
+
+@pytest.fixture
+def ngrams(tmp_path):
+    """n-gram CSV with mixed case, repeated and non letter words of every length."""
+    rng = random.Random(11)
+    rows = ["word,count"]
+    for _ in range(3_000):
+        word = "".join(rng.choice("abdnoqrAB") for _ in range(rng.randint(2, 10)))
+        if rng.random() < 0.05:
+            word = word[:2] + "1" + word[2:]
+        rows.append(f"{word},{rng.randint(0, 200)}")
+    path = tmp_path / "ngrams.csv"
+    path.write_text("\n".join(rows) + "\n", encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_size", [97, 1 << 10, 1 << 20])
+def test_counts_match_csv_reader(ngrams, chunk_size):
+    """Chunked parallel counts equal the single pass CSV reader for every length."""
+    counts = count_words([ngrams], WORD_LENGTHS, MIN_COUNT, workers=2, chunk_size=chunk_size)
+    for length in WORD_LENGTHS:
+        assert counts[length] == read_word_counts(ngrams, length=length, min_count=MIN_COUNT)
+
+
+def test_chunks_own_the_lines_starting_in_them(tmp_path):
+    """Every line is read by exactly one chunk, wherever the boundaries fall."""
+    path = tmp_path / "lines.txt"
+    lines = [f"line{index}" * (index % 4 + 1) for index in range(200)]
+    path.write_text("\n".join(lines), encoding="utf-8")
+    for chunk_size in (1, 7, 64, 10_000):
+        data = b"".join(read_chunk(chunk) for chunk in split_file(str(path), chunk_size))
+        assert data.decode("utf-8").split("\n") == lines
+    assert read_chunk(Chunk(str(path), 3, 5)) == b""
+
+
+def test_text_words_need_more_than_one_occurrence(tmp_path):
+    """Words of text sources are merged across files and one-off typos dropped."""
+    first = tmp_path / "first.txt"
+    second = tmp_path / "second.txt"
+    first.write_text("Aqoon baaro nabad\nqabow aqoon-ta", encoding="utf-8")
+    second.write_text("aqoon baaro typoo\n", encoding="utf-8")
+
+    counts = count_words([str(first), str(second)], (5,), MIN_COUNT, workers=1, chunk_size=8)
+    assert counts[5] == {"aqoon": 2, "baaro": 2}
+    counts = count_words([str(first), str(second)], (5,), MIN_COUNT, workers=1, text_min_count=0)
+    assert counts[5] == {"aqoon": 2, "baaro": 2, "nabad": 1, "qabow": 1, "typoo": 1}
@@ -0,0 +1,85 @@
+from src.game.journal import RoundJournal
+
+
+def open_journal(tmp_path, **kwargs):
+    return RoundJournal(
+        path=str(tmp_path / "journal.jsonl"), snapshot_path=str(tmp_path / "snapshot.json"), **kwargs
+    )
+
+
+def test_replay_restores_round_and_guesses(tmp_path):
+    """A reopened journal resumes the round with every guess."""
+    journal = open_journal(tmp_path)
+    assert journal.recovered is None
+    journal.start_round(round_id=1, word="aqoon")
+    journal.record_guess(server_id=10, user_id=1, guess="baaro")
+    journal.record_guess(server_id=10, user_id=2, guess="aqoon")
+    journal.close()
+
+    state = open_journal(tmp_path).recovered
+    assert (state.round_id, state.word) == (1, "aqoon")
+    assert state.guesses == [(10, 1, "baaro"), (10, 2, "aqoon")]
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    """A partial last record is ignored and later records still replay."""
+    journal = open_journal(tmp_path)
+    journal.start_round(round_id=1, word="aqoon")
+    journal.record_guess(server_id=10, user_id=1, guess="baaro")
+    journal.close()
+    with open(tmp_path / "journal.jsonl", "ab") as file:
+        file.write(b'{"t":"gue')
+
+    journal = open_journal(tmp_path)
+    journal.record_guess(server_id=10, user_id=2, guess="nabad")
+    journal.close()
+
+    assert open_journal(tmp_path).recovered.guesses == [(10, 1, "baaro"), (10, 2, "nabad")]
+
+
+def test_compaction_does_not_repeat_records(tmp_path):
+    """Records folded into a snapshot are not applied twice."""
+    journal = open_journal(tmp_path, compact_after=2)
+    journal.start_round(round_id=1, word="aqoon")
+    journal.record_guess(server_id=10, user_id=1, guess="baaro")
+    journal.record_guess(server_id=10, user_id=1, guess="nabad")
+    assert journal.needs_compaction
+    journal.compact(journal.replay())
+    journal.record_guess(server_id=10, user_id=1, guess="aqoon")
+    journal.close()
+
+    state = open_journal(tmp_path).recovered
+    assert state.guesses == [(10, 1, "baaro"), (10, 1, "nabad"), (10, 1, "aqoon")]
+
+
+def test_commit_keeps_records_appended_meanwhile(tmp_path):
+    """Guesses journaled while a snapshot is written survive its commit."""
+    journal = open_journal(tmp_path)
+    journal.start_round(round_id=1, word="aqoon")
+    journal.record_guess(server_id=10, user_id=1, guess="baaro")
+    checkpoint = journal.checkpoint()
+    temp_path = journal.write_snapshot(journal.replay(), checkpoint)
+    journal.record_guess(server_id=10, user_id=2, guess="nabad")
+    assert journal.commit(temp_path, checkpoint)
+    assert journal.records == 1
+    journal.record_guess(server_id=10, user_id=3, guess="qabow")
+    journal.close()
+
+    state = open_journal(tmp_path).recovered
+    assert state.guesses == [(10, 1, "baaro"), (10, 2, "nabad"), (10, 3, "qabow")]
+
+
+def test_stale_snapshot_is_not_committed(tmp_path):
+    """A snapshot of a round that ended while it was written is discarded."""
+    journal = open_journal(tmp_path)
+    journal.start_round(round_id=1, word="aqoon")
+    journal.record_guess(server_id=10, user_id=1, guess="baaro")
+    checkpoint = journal.checkpoint()
+    temp_path = journal.write_snapshot(journal.replay(), checkpoint)
+    journal.start_round(round_id=2, word="nabad")
+    assert not journal.commit(temp_path, checkpoint)
+    journal.close()
+
+    state = open_journal(tmp_path).recovered
+    assert (state.round_id, state.guesses) == (2, [])
+    assert not list(tmp_path.glob("*.tmp"))
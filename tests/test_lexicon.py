@@ -0,0 +1,100 @@
+import os
+
+import pytest
+from src.game.lexicon import Lexicon
+from src.game import snapshot
+from src.game.snapshot import load_snapshot, write_snapshot
+
+
+@pytest.fixture
+def lexicon():
+    """Fixture to provide a small Lexicon."""
+    return Lexicon.from_words(["aqoon", "aqal", "aqoonta", "baro", "bari", "a"])
+
+
+def test_is_valid(lexicon):
+    """Only full words are valid."""
+    assert lexicon.is_valid("aqoon")
+    assert lexicon.is_valid("aqoonta")
+    assert lexicon.is_valid("a")
+    assert not lexicon.is_valid("aqoo")
+    assert not lexicon.is_valid("")
+    assert not lexicon.is_valid("zzz")
+
+
+def test_search(lexicon):
+    """Search returns every completion in alphabetical order."""
+    assert lexicon.search("aq") == ["aqal", "aqoon", "aqoonta"]
+    assert lexicon.search("bar") == ["bari", "baro"]
+    assert lexicon.search("x") == []
+
+
+def test_size_and_iteration(lexicon):
+    """Duplicates collapse and iteration yields every word."""
+    duplicated = Lexicon.from_words(["baro", "baro", "bari"])
+    assert len(duplicated) == 2
+    assert list(lexicon) == sorted(["aqoon", "aqal", "aqoonta", "baro", "bari", "a"])
+
+
+def test_snapshot_round_trip(tmp_path):
+    """A written snapshot maps back to the same lexicon."""
+    word_counts = {"aqoon": 900, "aqoonta": 40, "baro": 12}
+    lexicon = Lexicon.from_counts(word_counts)
+    path = str(tmp_path / "lexicon.bin")
+
+    write_snapshot(lexicon, checksum=b"a" * 32, path=path)
+    loaded = load_snapshot(path, checksum=b"a" * 32)
+
+    assert loaded is not None
+    assert dict(loaded.items()) == word_counts
+    assert loaded.search("aq") == ["aqoon", "aqoonta"]
+    assert load_snapshot(path, checksum=b"b" * 32) is None
+
+
+def test_corrupt_snapshot_is_rejected(tmp_path):
+    """Snapshots whose arrays do not fit their trailer are not mapped."""
+    path = tmp_path / "lexicon.bin"
+    write_snapshot(Lexicon.from_counts({"aqoon": 900, "baro": 12}), checksum=b"a" * 32, path=str(path))
+    data = path.read_bytes()
+    path.write_bytes(data[:10] + data[21:])
+
+    assert load_snapshot(str(path), checksum=b"a" * 32) is None
+
+
+def test_top_k_ranked_by_count():
+    """Top k returns the most frequent completions first."""
+    lexicon = Lexicon.from_counts({"aqoon": 900, "aqal": 5, "aqoonta": 40, "baro": 12, "aq": 100})
+
+    assert lexicon.top_k("aq", 3) == ["aqoon", "aq", "aqoonta"]
+    assert lexicon.top_k("aq", 10) == ["aqoon", "aq", "aqoonta", "aqal"]
+    assert lexicon.top_k("", 1) == ["aqoon"]
+    assert lexicon.top_k("z", 5) == []
+
+
+def test_unchanged_source_is_not_hashed(tmp_path, monkeypatch):
+    """The CSV is only hashed when its size or modification time changed."""
+    source = tmp_path / "ngrams.csv"
+    source.write_text("word,count\naqoon,900\nbaaro,700\n", encoding="utf-8")
+    path = str(tmp_path / "lexicon.bin")
+    hashed = []
+    checksum = snapshot.source_checksum
+
+    def counted_checksum(*args, **kwargs):
+        hashed.append(args)
+        return checksum(*args, **kwargs)
+
+    monkeypatch.setattr(snapshot, "source_checksum", counted_checksum)
+
+    assert list(snapshot.load_lexicon(source=str(source), path=path)) == ["aqoon", "baaro"]
+    assert list(snapshot.load_lexicon(source=str(source), path=path)) == ["aqoon", "baaro"]
+    assert len(hashed) == 1
+
+    # Same contents, new modification time: hashed once, then matched by stat again
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert list(snapshot.load_lexicon(source=str(source), path=path)) == ["aqoon", "baaro"]
+    assert list(snapshot.load_lexicon(source=str(source), path=path)) == ["aqoon", "baaro"]
+    assert len(hashed) == 2
+
+    source.write_text("word,count\naqoon,900\nnabad,800\n", encoding="utf-8")
+    assert list(snapshot.load_lexicon(source=str(source), path=path)) == ["aqoon", "nabad"]
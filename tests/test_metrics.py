@@ -0,0 +1,48 @@
+import random
+
+from src.game.lexicon import Lexicon
+from src.game.trie import Trie
+from src.game.word_manager import WordleManager
+from src.utils.metrics import Histogram, Metrics
+
+
+def test_percentiles_within_bucket_resolution():
+    """Percentiles land within a few percent of the exact values."""
+    rng = random.Random(0)
+    values = sorted(rng.uniform(0.0005, 0.5) for _ in range(10_000))
+    histogram = Histogram()
+    for value in values:
+        histogram.record(value)
+
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * len(values)) - 1]
+        assert abs(histogram.percentile(q) - exact) / exact < 0.04
+    assert histogram.percentile(1.0) == values[-1]
+
+
+def test_timed_and_prometheus_output():
+    """Timed calls are counted and exported per stage."""
+    metrics = Metrics()
+
+    @metrics.timed("stage.work")
+    def work():
+        return 1
+
+    assert [work() for _ in range(3)] == [1, 1, 1]
+    with metrics.timer("stage.block"):
+        pass
+
+    assert [(summary.name, summary.count) for summary in metrics.summaries()] == [
+        ("stage.block", 1), ("stage.work", 3)
+    ]
+    assert 'wordle_latency_seconds_count{stage="stage.work"} 3' in metrics.prometheus()
+
+
+def test_word_manager_times_validation():
+    """Validation is timed by the timer the manager was built with."""
+    metrics = Metrics()
+    manager = WordleManager(trie=Trie(lexicon=Lexicon.from_words(["aqoon", "baaro"])), timer=metrics.timer)
+
+    assert manager.is_valid_word("aqoon")
+    assert not manager.is_valid_word("zzzzz")
+    assert metrics.histogram("trie.validate").count == 2
@@ -0,0 +1,56 @@
+import pytest
+
+from src.game.lexicon import Lexicon
+from src.game.modes import GuildModes
+from src.game.trie import Trie
+from src.game.word_manager import WordleManager, WordPartition
+from src.game.wordle_game import GuessResult, WordleGame
+
+
+@pytest.fixture
+def word_manager():
+    """Manager with five and seven letter partitions only."""
+    manager = WordleManager(trie=Trie(lexicon=Lexicon.from_words(["hello", "world"])), load=False)
+    seven = Trie(lexicon=Lexicon.from_words(["example", "letters"]), length=7)
+    manager.partitions[7] = WordPartition(seven, 7)
+    return manager
+
+
+def test_modes_persist(tmp_path):
+    """Modes are saved on change and read back, invalid lengths refused."""
+    path = str(tmp_path / "modes.json")
+    modes = GuildModes(path)
+    modes.set(1, 7)
+    modes.set(2, 5)
+
+    assert GuildModes(path).lengths == {1: 7}
+    assert GuildModes(path).get(2) == 5
+    with pytest.raises(ValueError):
+        modes.set(1, 12)
+
+
+def test_guild_plays_its_length(word_manager, monkeypatch):
+    """A seven letter guild gets its own answer, attempts and validation."""
+    monkeypatch.setenv("ENVIRONMENT", "testing")
+    game = WordleGame(word_manager)
+    game.modes.set(7, 7)
+
+    assert game.guess(user_id=1, server_id=7, name="a", word_guess="hello").result == GuessResult.INVALID_WORD
+    answer = game.answer_for(7)
+    assert len(answer) == 7 and game.guesses[7].max_attempts == 8
+    assert game.guess(user_id=1, server_id=7, name="a", word_guess=answer).result == GuessResult.CORRECT
+    assert game.guess(user_id=1, server_id=5, name="a", word_guess=game.guess_word).result == GuessResult.CORRECT
+    # Only the lengths played were ever looked up
+    assert set(word_manager.partitions) == {5, 7}
+
+
+def test_mode_change_waits_for_next_round(word_manager, monkeypatch):
+    """Switching mid round keeps the length the guild already plays."""
+    monkeypatch.setenv("ENVIRONMENT", "testing")
+    game = WordleGame(word_manager)
+    game.guess(user_id=1, server_id=3, name="a", word_guess="hello")
+    game.modes.set(3, 7)
+
+    assert game.word_length(3) == 5
+    game.reset_game()
+    assert game.word_length(3) == 7
@@ -0,0 +1,31 @@
+from src.utils.rate_limit import BucketMap, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_allows_burst_then_paces():
+    """A full bucket allows a burst, then refills at its rate."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    assert bucket.delay() == 0.5
+    clock.now = 0.5
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+
+def test_routes_have_separate_buckets():
+    """Each route is limited on its own while sharing the global bucket."""
+    clock = FakeClock()
+    buckets = BucketMap(TokenBucket(rate=10, capacity=10, clock=clock), route_rate=1, route_capacity=1)
+
+    assert buckets.route(1).try_acquire()
+    assert not buckets.route(1).try_acquire()
+    assert buckets.route(2).try_acquire()
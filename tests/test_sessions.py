@@ -0,0 +1,43 @@
+from src.game.sessions import SessionManager
+
+
+def test_sessions_are_sharded_per_guild():
+    """Guilds keep separate players and locks."""
+    sessions = SessionManager()
+    sessions.shard(10).player(1).guesses.append("aqoon")
+    sessions.shard(20).player(1)
+
+    assert sessions[10][1].attempts() == 1
+    assert sessions[20][1].attempts() == 0
+    assert sessions.shard(10).lock is not sessions.shard(20).lock
+
+
+def test_finished_players_are_packed():
+    """Finished players past the limit are packed but still refused."""
+    sessions = SessionManager(max_finished=1, idle_seconds=3600)
+    session = sessions.shard(10)
+    for user_id in (1, 2, 3):
+        user_guess = session.player(user_id)
+        user_guess.guesses.append("aqoon")
+        user_guess.patterns.append(242)
+        user_guess.completed = user_id != 3
+
+    assert sessions.evict_idle() == 1
+    assert list(session.players) == [2, 3]
+    assert session[1].finished() and session[1].guesses == ["aqoon"]
+    assert len(session) == 3
+
+
+def test_unsolved_players_across_guilds():
+    """Players that missed the word are listed once, packed or not."""
+    sessions = SessionManager(max_finished=0, idle_seconds=3600)
+    for server_id, user_id, completed in ((10, 1, False), (10, 2, True), (20, 1, False), (20, 3, False)):
+        user_guess = sessions.shard(server_id).player(user_id)
+        user_guess.guesses.append("aqoon")
+        user_guess.completed = completed
+    sessions.shard(20).player(4)
+    sessions.shard(10)[1].guesses.extend(["baaro"] * 5)
+    sessions.evict_idle()
+
+    assert sessions.shard(10).packed
+    assert sessions.unsolved_players() == {1, 3}
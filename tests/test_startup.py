@@ -0,0 +1,37 @@
+import threading
+
+from src.game.lexicon import Lexicon
+from src.game.trie import Trie
+from src.game.word_manager import WordleManager
+from src.utils.startup import StartupTimeline
+
+
+def test_phases_overlap_and_report():
+    """Phases ended on other threads are recorded with their start offsets."""
+    timeline = StartupTimeline("gateway", "warm_up")
+    timeline.begin("gateway")
+    worker = threading.Thread(target=timeline.begin, args=("lexicon",))
+    with timeline.phase("warm_up"):
+        worker.start()
+        worker.join()
+
+    phases = {phase.name: phase for phase in timeline.phases()}
+    assert phases["gateway"].duration is None
+    assert phases["lexicon"].duration is None
+    assert phases["warm_up"].duration >= 0
+    assert phases["warm_up"].started >= phases["gateway"].started
+    assert "running" in timeline.report()
+
+    timeline.end("gateway")
+    assert timeline._reported
+
+
+def test_word_manager_loads_on_demand():
+    """An unloaded manager reads no word list until load is called."""
+    assert not WordleManager(load=False).loaded
+
+    trie = Trie(lexicon=Lexicon.from_words(["hello", "world"]))
+    manager = WordleManager(trie=trie, load=False)
+    manager.load()
+    assert manager.loaded and manager.trie is trie
+    assert manager.is_valid_word("hello")
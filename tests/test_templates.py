@@ -0,0 +1,25 @@
+from types import SimpleNamespace
+
+import pytest
+
+discord = pytest.importorskip("discord")
+
+from src.bot.views.templates import EmbedTemplate  # noqa: E402
+
+
+def test_render_matches_constructed_embed():
+    """A rendered template serializes like an embed built field by field."""
+    author = SimpleNamespace(display_name="player", display_avatar=SimpleNamespace(url="https://cdn/a.png"))
+    template = EmbedTemplate("Wordle Guess", discord.Color.blue())
+
+    expected = discord.Embed(title="Wordle Guess", color=discord.Color.blue(), description="Not quite!")
+    expected.set_author(name="player", icon_url="https://cdn/a.png")
+    expected.add_field(name="Your Guess", value="🟩⬛", inline=False)
+    expected.set_footer(text="Score: 1 | Streak: 0")
+
+    rendered = template.render(
+        description="Not quite!", author=author, footer="Score: 1 | Streak: 0", fields=(("Your Guess", "🟩⬛", False),)
+    )
+    assert rendered.to_dict() == expected.to_dict()
+    # Renders never share their fields
+    assert template.render().fields == []
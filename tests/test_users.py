@@ -0,0 +1,162 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from src.game.user import User
+from src.game.user_cache import UserCache
+from src.game.users import AsyncUserRepository, UserRepository
+from src.utils.metrics import Metrics
+
+
+def test_async_repository_round_trip(tmp_path):
+    """Flushed writes are visible to leaderboard reads."""
+    async def scenario():
+        repo = AsyncUserRepository(str(tmp_path / "wordle.db"))
+        try:
+            user = await repo.get_or_create(user_id=1, server_id=10, name="test_user")
+            user.score = 12
+            await repo.save(user)
+            await repo.get_or_create(user_id=2, server_id=10, name="other_user")
+            await repo.flush()
+            return await repo.get_top_n_users_by_score(n=5, server_id=10)
+        finally:
+            repo.close()
+
+    top = asyncio.run(scenario())
+    assert [(user.id, user.score) for user in top] == [(1, 12), (2, 0)]
+
+
+def test_async_repository_times_user_calls(tmp_path):
+    """Lookups and saves of the guess path are timed with the given timer."""
+    metrics = Metrics()
+
+    async def scenario():
+        repo = AsyncUserRepository(str(tmp_path / "wordle.db"), timer=metrics.timer)
+        try:
+            user = await repo.get_or_create(user_id=1, server_id=10, name="test_user")
+            await repo.get_or_create(user_id=1, server_id=10, name="test_user")
+            await repo.save(user)
+        finally:
+            repo.close()
+
+    asyncio.run(scenario())
+    assert metrics.histogram("db.get_or_create").count == 2
+    assert metrics.histogram("db.save").count == 1
+
+
+def test_write_behind_coalesces_saves(tmp_path):
+    """Repeated saves become one row written by a single flush."""
+    async def scenario():
+        repo = AsyncUserRepository(str(tmp_path / "wordle.db"))
+        try:
+            user = await repo.get_or_create(user_id=1, server_id=10, name="test_user")
+            for _ in range(5):
+                user.score += 2
+                await repo.save(user)
+            assert await repo.get_or_create(user_id=1, server_id=10) is user
+            assert await repo.get_top_n_users_by_score(n=5, server_id=10) == []
+
+            assert await repo.flush() == 1
+            return repo.pending.coalesced, await repo.get_top_n_users_by_score(n=5, server_id=10)
+        finally:
+            repo.close()
+
+    coalesced, top = asyncio.run(scenario())
+    assert coalesced == 5
+    assert [(user.id, user.score) for user in top] == [(1, 10)]
+
+
+def test_players_are_kept_per_guild(tmp_path):
+    """The same player has separate records in each guild."""
+    repo = UserRepository(str(tmp_path / "wordle.db"))
+    first = repo.get_or_create(user_id=1, server_id=10, name="test_user")
+    first.score = 7
+    repo.save(first)
+
+    second = repo.get_or_create(user_id=1, server_id=20, name="test_user")
+    assert second.server_id == 20 and second.score == 0
+    assert [user.score for user in repo.get_top_n_users_by_score(n=5, server_id=10)] == [7]
+
+
+def test_leaderboard_cache_invalidated_on_score_change(tmp_path):
+    """Cached leaderboards are reused until a score in the guild changes."""
+    repo = UserRepository(str(tmp_path / "wordle.db"))
+    user = repo.get_or_create(user_id=1, server_id=10, name="test_user")
+    repo.get_top_n_users_by_score(n=5, server_id=10)
+    repo.get_top_n_users_by_score(n=5, server_id=10)
+    assert repo.leaderboard.hits == 1
+
+    other_guild = repo.get_or_create(user_id=2, server_id=20, name="other_user")
+    other_guild.score = 3
+    repo.save(other_guild)
+    repo.get_top_n_users_by_score(n=5, server_id=10)
+    assert repo.leaderboard.hits == 2
+
+    user.score = 4
+    repo.save(user)
+    assert repo.get_top_n_users_by_score(n=5, server_id=10)[0].score == 4
+    assert repo.leaderboard.hits == 2
+
+    repo.leaderboard.clear()
+    repo.get_top_n_users_by_score(n=5, server_id=10)
+    assert repo.leaderboard.hits == 2
+
+
+def test_user_cache_keeps_unsaved_users():
+    """Eviction skips dirty users and lookups return the cached object."""
+    dirty = {(10, 1)}
+    cache = UserCache(max_size=2, is_dirty=dirty.__contains__)
+    first = cache.put(User(1, 10, "first"))
+    cache.put(User(2, 10, "second"))
+    cache.put(User(3, 10, "third"))
+
+    assert cache.get(user_id=1, server_id=10) is first
+    assert cache.get(user_id=2, server_id=10) is None
+    assert cache.put(User(1, 10, "copy")) is first
+    assert (cache.hits, cache.misses, cache.evictions) == (1, 1, 1)
+
+
+def _v0_database(path, table="users"):
+    """Database with the id keyed schema and no user_version."""
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, server_id INTEGER, name TEXT, score INTEGER, streak INTEGER)")
+    conn.execute(f"INSERT INTO {table} VALUES (1, 7, 'asha', 12, 2)")
+    conn.commit()
+    conn.close()
+
+
+def test_failed_migration_is_rolled_back(tmp_path):
+    """A migration failing half way leaves the old table and version as they were."""
+    path = str(tmp_path / "wordle.db")
+    conn = sqlite3.connect(path)
+    # No streak column, so the copy into the new table fails
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, server_id INTEGER, name TEXT, score INTEGER)")
+    conn.commit()
+    conn.close()
+
+    with pytest.raises(sqlite3.OperationalError):
+        UserRepository(path)
+
+    conn = sqlite3.connect(path)
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert tables == {"users"}
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+    conn.close()
+
+
+def test_half_finished_migration_is_resumed(tmp_path):
+    """users_v0 left behind by an interrupted migration is copied again."""
+    path = str(tmp_path / "wordle.db")
+    _v0_database(path, table="users_v0")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER NOT NULL, server_id INTEGER NOT NULL, name TEXT NOT NULL, score INTEGER NOT NULL, streak INTEGER NOT NULL, PRIMARY KEY (server_id, id))")
+    conn.commit()
+    conn.close()
+
+    repo = UserRepository(path)
+    user = repo.get(1, 7)
+    assert (user.name, user.score, user.streak) == ("asha", 12, 2)
+    tables = {name for (name,) in repo.conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert "users_v0" not in tables
+    repo.close()
@@ -1,9 +1,13 @@
 import pytest
+from src.game.feedback import score_guess
+from src.game.lexicon import Lexicon
+from src.game.trie import Trie
 from src.game.wordle_game import WordleGame, GuessResult
-from src.game.user import User
-from src.game.users import UserRepository
 from src.game.word_manager import WordleManager
 
+WORDS = ["aqoon", "baaro", "roobo", "ooman", "nabad", "aabba", "daaro", "qabow"]
+SERVER_ID = 42
+
 
 @pytest.fixture
 def set_testing_environment(monkeypatch):
@@ -13,14 +17,8 @@ def set_testing_environment(monkeypatch):
 
 @pytest.fixture
 def word_manager():
-    """Fixture to provide a real WordleManager."""
-    return WordleManager()
-
-
-@pytest.fixture
-def user_repo(set_testing_environment):
-    """Fixture to provide a UserRepository for testing (in-memory)."""
-    return UserRepository()
+    """Fixture to provide a WordleManager over a small lexicon."""
+    return WordleManager(trie=Trie(lexicon=Lexicon.from_words(WORDS)))
 
 
 @pytest.fixture
@@ -29,62 +27,61 @@ def wordle_game(word_manager, set_testing_environment):
     return WordleGame(word_manager=word_manager)
 
 
-@pytest.fixture
-def mock_user():
-    """Fixture to create a mock User."""
-    return User(user_id=1, name="test_user")
-
-
 def test_new_word(wordle_game):
     """Test if the game sets a new word on start."""
     wordle_game.new_word()
     assert len(wordle_game.guess_word) == 5  # Assuming all words are 5 letters
 
 
-def test_guess_correct(wordle_game, mock_user):
+def test_guess_correct(wordle_game):
     """Test a correct guess."""
     wordle_game.new_word()
     correct_word = wordle_game.guess_word
 
-    result = wordle_game.guess(user_id=1, name="test_user", word_guess=correct_word)
+    outcome = wordle_game.guess(user_id=1, server_id=SERVER_ID, name="test_user", word_guess=correct_word)
 
-    assert result == GuessResult.CORRECT
-    assert wordle_game.guesses[1].completed is True
+    assert outcome.result == GuessResult.CORRECT
+    assert wordle_game.guesses[SERVER_ID][1].completed is True
 
 
-def test_guess_incorrect(wordle_game, mock_user):
+def test_guess_incorrect(wordle_game):
     """Test an incorrect guess."""
     wordle_game.new_word()
 
     random_word = get_incorrect_valid_word(game=wordle_game)
 
-    result = wordle_game.guess(user_id=1, name="test_user", word_guess=random_word)
+    outcome = wordle_game.guess(user_id=1, server_id=SERVER_ID, name="test_user", word_guess=random_word)
 
-    assert result == GuessResult.INCORRECT
-    assert not wordle_game.guesses[1].completed
+    assert outcome.result == GuessResult.INCORRECT
+    assert not wordle_game.guesses[SERVER_ID][1].completed
 
 
-def test_guess_unknown_word(wordle_game, mock_user):
+def test_guess_unknown_word(wordle_game):
     """Test guessing an unknown word."""
     wordle_game.new_word()
 
-    result = wordle_game.guess(user_id=1, name="test_user", word_guess="wrongword")
+    outcome = wordle_game.guess(user_id=1, server_id=SERVER_ID, name="test_user", word_guess="wrong")
+
+    assert outcome.result == GuessResult.UNKNOWN_WORD
+    assert outcome.pattern is None and outcome.attempts == 0
+    assert 1 not in wordle_game.guesses[SERVER_ID]
 
-    assert result == GuessResult.UNKNOWN_WORD
-    assert not wordle_game.guesses
 
-def test_max_attempts(wordle_game, mock_user):
+def test_max_attempts(wordle_game):
     """continously guesses until reaching max count"""
     guess = get_incorrect_valid_word(game=wordle_game)
+    max_attempts = wordle_game.guesses.shard(SERVER_ID).max_attempts
+
+    for _ in range(max_attempts):
+        wordle_game.guess(user_id=1, server_id=SERVER_ID, name='test_user', word_guess=guess)
 
-    for _ in range(wordle_game.max_attempts):
-        wordle_game.guess(user_id=1, name='test_user', word_guess=guess)
+    outcome = wordle_game.guess(user_id=1, server_id=SERVER_ID, name='test_user', word_guess=guess)
+    assert outcome.result == GuessResult.MAX_ATTEMPTS
+    assert outcome.attempts == max_attempts
 
-    result = wordle_game.guess(user_id=1, name='test_user', word_guess=guess)
-    assert result == GuessResult.MAX_ATTEMPTS
+    new_user_outcome = wordle_game.guess(user_id=12, server_id=SERVER_ID, name='test_user', word_guess=guess)
+    assert new_user_outcome.result == GuessResult.INCORRECT
 
-    new_user_result = wordle_game.guess(user_id=12, name='test_user', word_guess=guess)
-    assert new_user_result == GuessResult.INCORRECT
 
 def test_score_calculation(wordle_game):
     """Test if the score calculation works based on attempts."""
@@ -92,20 +89,51 @@ def test_score_calculation(wordle_game):
     word = wordle_game.guess_word
 
     # First attempt win
-    wordle_game.guess(user_id=12, name='random', word_guess=word)
-    user = wordle_game.user_repo.get_or_create(12)
+    wordle_game.guess(user_id=12, server_id=SERVER_ID, name='random', word_guess=word)
+    user = wordle_game.user_repo.get_or_create(user_id=12, server_id=SERVER_ID)
     assert user.score == 10  # Score should be 10 for 1st attempt
 
-def test_score_reduction_on_loss(wordle_game, mock_user):
+
+def test_score_reduction_on_loss(wordle_game):
     """Test if the score is reduced when the user loses."""
     wordle_game.new_word()
     guess = get_incorrect_valid_word(game=wordle_game)
-    
+
     for _ in range(6):
-        wordle_game.guess(user_id=1, name=mock_user.name, word_guess=guess)
+        outcome = wordle_game.guess(user_id=1, server_id=SERVER_ID, name="test_user", word_guess=guess)
+
+    assert outcome.result == GuessResult.FAILED
+    assert outcome.user.streak == 0  # Streak should be reset on loss
+    assert outcome.user.score == 0    # Score never drops below 0
+
+
+def test_outcome_has_everything_to_render(wordle_game):
+    """The outcome carries the pattern, attempts and a user copy of its guess."""
+    guess = get_incorrect_valid_word(game=wordle_game)
+
+    first = wordle_game.guess(user_id=1, server_id=SERVER_ID, name="test_user", word_guess=guess.upper())
+    assert first.guess == guess and first.answer == wordle_game.guess_word
+    assert first.pattern == score_guess(guess, wordle_game.guess_word)
+    assert (first.attempts, first.max_attempts, first.word_length) == (1, 6, 5)
+
+    win = wordle_game.guess(user_id=1, server_id=SERVER_ID, name="test_user", word_guess=wordle_game.guess_word)
+    assert win.attempts == 2 and win.user.score == 7
+    # Earlier outcomes keep the user as it was then
+    assert first.user.score == 0 and first.user is not win.user
+
+
+def test_guess_validates_once(wordle_game, monkeypatch):
+    """One guess looks the word up once."""
+    guess = get_incorrect_valid_word(game=wordle_game)
+    lookups = []
+    is_valid_word = wordle_game.word_manager.is_valid_word
+    monkeypatch.setattr(
+        wordle_game.word_manager, "is_valid_word", lambda word: lookups.append(word) or is_valid_word(word)
+    )
+
+    wordle_game.guess(user_id=1, server_id=SERVER_ID, name="test_user", word_guess=guess)
+    assert lookups == [guess]
 
-    assert mock_user.streak == 0  # Streak should be reset on loss
-    assert mock_user.score == 0    # Assuming 0 score reduction for losing
 
 def test_multiple_user_support(wordle_game):
     """Test if the game can handle multiple users guessing independently."""
@@ -113,24 +141,24 @@ def test_multiple_user_support(wordle_game):
     guess = get_incorrect_valid_word(game=wordle_game)
 
     # User 1 guesses
-    wordle_game.guess(user_id=1, name="user1", word_guess=guess)
-    assert not wordle_game.guesses[1].completed
+    wordle_game.guess(user_id=1, server_id=SERVER_ID, name="user1", word_guess=guess)
+    assert not wordle_game.guesses[SERVER_ID][1].completed
 
     # User 2 guesses correctly
-    result = wordle_game.guess(user_id=2, name="user2", word_guess=wordle_game.guess_word)
-    assert result == GuessResult.CORRECT
-    assert wordle_game.guesses[2].completed
+    outcome = wordle_game.guess(user_id=2, server_id=SERVER_ID, name="user2", word_guess=wordle_game.guess_word)
+    assert outcome.result == GuessResult.CORRECT
+    assert wordle_game.guesses[SERVER_ID][2].completed
 
     # Ensure User 1's game state is unchanged
-    assert not wordle_game.guesses[1].completed
+    assert not wordle_game.guesses[SERVER_ID][1].completed
 
 
 def test_game_reset(wordle_game):
     """Test if the game can reset properly between rounds."""
     wordle_game.new_word()
     old_guess_word = wordle_game.guess_word
-    wordle_game.guess(user_id=1, name="test_user", word_guess=old_guess_word)
-    assert wordle_game.guesses[1].completed
+    wordle_game.guess(user_id=1, server_id=SERVER_ID, name="test_user", word_guess=old_guess_word)
+    assert wordle_game.guesses[SERVER_ID][1].completed
 
     # Reset the game and ensure previous guesses are cleared
     wordle_game.reset_game()
@@ -139,9 +167,13 @@ def test_game_reset(wordle_game):
 
 def get_incorrect_valid_word(game):
     """Gets a word that is not the guess word"""
-    random_word = "apple"
-    while (
-        not game.is_valid(random_word) and random_word != game.guess_word
-    ):
-        random_word = game.word_manager.get_random_word()
-    return random_word
\ No newline at end of file
+    return next(word for word in WORDS if game.is_valid(word) and word != game.guess_word)
+
+
+def test_rounds_started_together_get_distinct_ids(wordle_game):
+    """Rounds started within one second still get increasing ids."""
+    round_ids = [wordle_game.round_id]
+    for _ in range(3):
+        wordle_game.reset_game()
+        round_ids.append(wordle_game.round_id)
+    assert round_ids == sorted(set(round_ids))